@@ -3,6 +3,27 @@ import pytest
 pytest_plugins = ("pytest_jupyter.jupyter_server", )
 
 
+def pytest_addoption(parser):
+    group = parser.getgroup("cropmstudio")
+    group.addoption("--benchmarks", action="store_true",
+                    help="Run the benchmarks of cropmstudio/tests/benchmarks")
+    group.addoption("--benchmark-json", metavar="PATH",
+                    help="Run the benchmarks and write their results as JSON to PATH")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: performance benchmark, run with --benchmarks")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmarks") or config.getoption("--benchmark-json"):
+        return
+    skip = pytest.mark.skip(reason="Benchmarks are run with --benchmarks")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture
 def jp_server_config(jp_server_config):
     return {"ServerApp": {"jpserver_extensions": {"cropmstudio": True}}}
@@ -7,7 +7,6 @@ except ImportError:
     import warnings
     warnings.warn("Importing 'cropmstudio' outside a proper installation.")
     __version__ = "dev"
-from .routes import setup_route_handlers
 
 
 def _jupyter_labextension_paths():
@@ -31,6 +30,12 @@ def _load_jupyter_server_extension(server_app):
     server_app: jupyterlab.labapp.LabApp
         JupyterLab application instance
     """
+    # The handlers are only imported when the server extension is loaded,
+    # not when the labextension paths are looked up
+    from .config import apply_settings
+    from .routes import setup_route_handlers
+
+    apply_settings(server_app.web_app.settings)
     setup_route_handlers(server_app.web_app)
     name = "cropmstudio"
     server_app.log.info(f"Registered {name} server extension")
@@ -0,0 +1,69 @@
+"""
+Server extension settings
+
+The settings are read from the "cropmstudio" entry of the tornado settings,
+which can be set in the Jupyter server configuration, e.g.:
+
+    c.ServerApp.tornado_settings = {
+        "cropmstudio": {"parse_cache_max_bytes": 128 * 1024 * 1024}
+    }
+"""
+
+
+from . import executor
+from .crop2ml_utils.cache import DEFAULT_MAX_BYTES, package_cache
+from .crop2ml_utils.dependencies import dependency_graph
+from .crop2ml_utils.package_index import DEFAULT_ROOTS, package_index
+from .crop2ml_utils.template import package_template
+from .crop2ml_utils.testrun import DEFAULT_TIMEOUT
+from .jobs import DEFAULT_MAX_JOBS, job_manager
+from .metrics import metrics
+
+
+DEFAULTS = {
+    # Estimated memory cap of the parsed package cache, in bytes of xml
+    "parse_cache_max_bytes": DEFAULT_MAX_BYTES,
+    # Number of threads running the blocking work of the handlers
+    "max_workers": executor.DEFAULT_MAX_WORKERS,
+    # Number of worker processes running the transpilations
+    "max_processes": executor.DEFAULT_MAX_PROCESSES,
+    # Number of transpilation jobs running at the same time, the others are queued
+    "max_jobs": DEFAULT_MAX_JOBS,
+    # Maximum size of a package uploaded to import-package-upload, in bytes
+    "max_upload_bytes": 10 * 1024 * 1024 * 1024,
+    # Directories listed by get-packages, and searched by get-dependencies
+    "package_roots": list(DEFAULT_ROOTS),
+    # Local cookiecutter-crop2ml template directory used by create-package, instead of the cached clone
+    "package_template": None,
+    # Directory of the cached clone of the template, the Jupyter data directory if None
+    "package_template_cache": None,
+    # Maximum duration of a call of the generated model code, a test or a sweep batch, in seconds
+    "model_timeout": DEFAULT_TIMEOUT,
+    # Whether the requests are timed, see the metrics endpoint
+    "metrics": False,
+}
+
+
+def get_setting(settings, name):
+    """
+    Returns the value of a cropmstudio setting, or its default value
+
+    Args:
+        settings: The tornado application settings
+        name: The setting name, one of DEFAULTS keys
+    """
+    return settings.get("cropmstudio", {}).get(name, DEFAULTS[name])
+
+
+def apply_settings(settings):
+    """
+    Configures the module level services from the tornado application settings
+    """
+    package_cache.max_bytes = get_setting(settings, "parse_cache_max_bytes")
+    executor.configure(get_setting(settings, "max_workers"), get_setting(settings, "max_processes"))
+    job_manager.max_jobs = get_setting(settings, "max_jobs")
+    package_index.roots = list(get_setting(settings, "package_roots"))
+    dependency_graph.roots = list(get_setting(settings, "package_roots"))
+    package_template.local = get_setting(settings, "package_template")
+    package_template.cache_dir = get_setting(settings, "package_template_cache")
+    metrics.enabled = get_setting(settings, "metrics")
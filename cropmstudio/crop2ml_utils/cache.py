@@ -0,0 +1,176 @@
+"""
+Parsed package cache
+
+Keeps the models parsed by pycropml in memory, keyed by package path, so that
+repeated requests on the same package only re-parse the XML files that
+changed on disk since the previous call.
+"""
+
+
+from collections import OrderedDict
+import os
+import threading
+from xml.etree import ElementTree
+
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def parse_unit_file(path, filename):
+    """
+    Parse a single unit model xml file of a package
+
+    This mirrors what pycropml.pparse.ModelParser.parse does for each file of
+    the crop2ml directory, so the returned objects are the same as the ones
+    returned by pycropml.pparse.model_parser.
+
+    Args:
+        path: The path of the package
+        filename: The name of the xml file in the crop2ml directory
+
+    Returns:
+        List of ModelUnit objects defined in the file
+    """
+    from pycropml import pparse
+
+    parser = pparse.ModelParser()
+    parser.models = []
+    parser.crop2ml_dir = path
+    parser.algorep = os.path.join(path, 'src')
+    doc = ElementTree.parse(os.path.join(path, 'crop2ml', filename))
+    parser.dispatch(doc.getroot())
+    return parser.models
+
+
+class PackageCache():
+    """
+    LRU cache of parsed packages.
+
+    Each package entry stores, for every unit xml file of its crop2ml
+    directory, the (mtime, size) signature of the file and the models parsed
+    from it. A lookup stats the files and only re-parses the ones whose
+    signature changed.
+
+    The memory footprint of an entry is estimated from the size of its xml
+    files. When the total goes over max_bytes, the least recently used
+    packages are dropped.
+
+    The files are parsed outside of the lock, which is only held to read and
+    install the entries, so lookups of other packages are not blocked.
+
+    Parameters : \n
+        - max_bytes : int
+    """
+
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+
+        self.max_bytes = max_bytes
+        self._packages = OrderedDict()
+        self._sizes = {}
+        self._total = 0
+        self._lock = threading.RLock()
+
+
+
+    def get_models(self, path):
+        """
+        Returns the models of the package, re-parsing only the changed files
+        """
+
+        key = os.path.abspath(path)
+        crop2ml = os.path.join(path, 'crop2ml')
+
+        signatures = {}
+        if os.path.isdir(crop2ml):
+            with os.scandir(crop2ml) as it:
+                for entry in it:
+                    if entry.name.startswith('unit') and entry.name.endswith('.xml') and entry.is_file():
+                        st = entry.stat()
+                        signatures[entry.name] = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            cached = self._packages.get(key, {})
+
+        files = {}
+        for filename, signature in signatures.items():
+            if filename in cached and cached[filename][0] == signature:
+                files[filename] = cached[filename]
+            else:
+                files[filename] = (signature, parse_unit_file(path, filename))
+
+        with self._lock:
+            self._store(key, files)
+
+        models = []
+        for _, file_models in files.values():
+            models.extend(file_models)
+        return models
+
+
+
+    def get_file_models(self, path, filename):
+        """
+        Returns the models of a single xml file of the package, without
+        looking at the other files
+        """
+
+        key = os.path.abspath(path)
+        st = os.stat(os.path.join(path, 'crop2ml', filename))
+        signature = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            cached = self._packages.get(key, {})
+            if filename in cached and cached[filename][0] == signature:
+                self._packages.move_to_end(key)
+                return cached[filename][1]
+
+        models = parse_unit_file(path, filename)
+
+        with self._lock:
+            files = dict(self._packages.get(key, {}))
+            files[filename] = (signature, models)
+            self._store(key, files)
+        return models
+
+
+
+    def invalidate(self, path=None):
+        """
+        Drops the given package from the cache, or every package if path is None
+        """
+
+        with self._lock:
+            if path is None:
+                self._packages.clear()
+                self._sizes.clear()
+                self._total = 0
+                return
+
+            key = os.path.abspath(path)
+            if key in self._packages:
+                del self._packages[key]
+                self._total -= self._sizes.pop(key)
+
+
+
+    def _store(self, key, files):
+        """
+        Stores a package entry and evicts the least recently used ones
+        """
+
+        size = sum(signature[1] for signature, _ in files.values())
+
+        if key in self._packages:
+            self._total -= self._sizes[key]
+        self._packages[key] = files
+        self._packages.move_to_end(key)
+        self._sizes[key] = size
+        self._total += size
+
+        while self._total > self.max_bytes and len(self._packages) > 1:
+            oldest, _ = self._packages.popitem(last=False)
+            self._total -= self._sizes.pop(oldest)
+
+
+package_cache = PackageCache()
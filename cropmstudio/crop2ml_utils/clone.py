@@ -0,0 +1,210 @@
+"""
+Package cloning
+
+A package is cloned file by file with the cheapest copy the filesystem
+supports: a copy-on-write reflink where possible, a hardlink for the
+generated files of the src directory, and a plain copy otherwise. The
+package state directory is not cloned, its caches are rebuilt on demand.
+
+The model files of the crop2ml directory are rewritten with the ids of the
+new package. Their text is only changed in the id attributes of the model
+headers and of the local models of the compositions, the rest of the
+documents is kept as is.
+
+Hardlinked files are shared by both packages until the transpilation, which
+breaks the links of the src directory before writing to it.
+"""
+
+
+import errno
+import os
+import re
+import shutil
+import uuid
+
+from .utils import STATE_DIRNAME
+from .xmlwriter import atomic_write
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# Linux ioctl cloning a file into another one, _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+# Generated directories whose files can be hardlinked
+GENERATED_DIRNAMES = ('src',)
+
+_NO_REFLINK = (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EPERM)
+
+_UNIT_TAG = re.compile(r'<ModelUnit\b[^>]*>')
+_COMPOSITION_TAG = re.compile(r'<ModelComposition\b[^>]*>')
+_MODEL_TAG = re.compile(r'<Model\s[^>]*>')
+_ID = r'(\b{}=")([^"]*)(")'
+
+
+def reflink(src, dst):
+    """
+    Clones src to dst with a copy-on-write reflink, and returns whether the
+    filesystem supports it
+    """
+    if fcntl is None:
+        return False
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+    except OSError as e:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        if e.errno in _NO_REFLINK:
+            return False
+        raise
+    shutil.copystat(src, dst)
+    return True
+
+
+def hardlink(src, dst):
+    """
+    Hardlinks dst to src, and returns whether the filesystem supports it
+    """
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            return False
+        raise
+    return True
+
+
+def _rewrite_id(match, attribute, package):
+    """
+    Returns the start tag with the package of its id attribute replaced
+    """
+    pattern = re.compile(_ID.format(attribute))
+
+    def replace(id_match):
+        value = id_match.group(2)
+        name = value.rsplit('.', 1)[-1]
+        return '{}{}.{}{}'.format(id_match.group(1), package, name, id_match.group(3))
+
+    return pattern.sub(replace, match.group(0), count=1)
+
+
+def rewrite_ids(text, package):
+    """
+    Returns the text of a model file with its ids moved to the package
+
+    The id of the model header is rewritten, and in a composition, the ids
+    of the models of the package, i.e. without a package_name attribute.
+    """
+    text = _UNIT_TAG.sub(lambda m: _rewrite_id(m, 'modelid', package), text, count=1)
+    text = _COMPOSITION_TAG.sub(lambda m: _rewrite_id(m, 'id', package), text, count=1)
+    return _MODEL_TAG.sub(lambda m: m.group(0) if 'package_name=' in m.group(0) else _rewrite_id(m, 'id', package),
+                          text)
+
+
+def _is_model_file(relpath):
+
+    directory, filename = os.path.split(relpath)
+    return directory == 'crop2ml' and filename.startswith(('unit.', 'composition.')) and filename.endswith('.xml')
+
+
+def clone_package(src, dst, package=None):
+    """
+    Clones a package
+
+    The package is cloned into a temporary directory next to dst, which is
+    renamed to dst once complete, so a failed clone leaves nothing behind.
+
+    Args:
+        src: The path of the package to clone
+        dst: The path of the new package, which must not exist
+        package: The package of the model ids, the dst directory name if None
+
+    Returns:
+        Dict of the number of files 'reflinked', 'hardlinked', 'copied' and
+        'rewritten'
+    """
+    src = os.path.abspath(src)
+    dst = os.path.abspath(dst)
+    package = package or os.path.basename(dst)
+    if os.path.exists(dst):
+        raise FileExistsError(f"{dst} already exists")
+
+    stats = {'reflinked': 0, 'hardlinked': 0, 'copied': 0, 'rewritten': 0}
+    tmp = os.path.join(os.path.dirname(dst), '.{}.{}.tmp'.format(os.path.basename(dst), uuid.uuid4().hex[:8]))
+    can_reflink = True
+
+    try:
+        for root, dirs, files in os.walk(src):
+            rel = os.path.relpath(root, src)
+            if rel == '.':
+                dirs[:] = [d for d in dirs if d != STATE_DIRNAME]
+                rel = ''
+            os.makedirs(os.path.join(tmp, rel), exist_ok=True)
+            generated = rel.split(os.path.sep)[0] in GENERATED_DIRNAMES
+
+            # Symbolic links are cloned as links, and not followed
+            for name in [d for d in dirs if os.path.islink(os.path.join(root, d))]:
+                dirs.remove(name)
+                files.append(name)
+
+            for file in files:
+                relpath = os.path.join(rel, file)
+                source, target = os.path.join(src, relpath), os.path.join(tmp, relpath)
+
+                if os.path.islink(source):
+                    os.symlink(os.readlink(source), target)
+                    stats['copied'] += 1
+                    continue
+
+                if _is_model_file(relpath):
+                    with open(source, encoding='utf8', newline='') as f:
+                        text = f.read()
+                    with atomic_write(target) as f:
+                        f.write(rewrite_ids(text, package))
+                    shutil.copymode(source, target)
+                    stats['rewritten'] += 1
+                    continue
+
+                # Stop trying once the filesystem does not support reflinks
+                if can_reflink:
+                    can_reflink = reflink(source, target)
+                    if can_reflink:
+                        stats['reflinked'] += 1
+                        continue
+
+                if generated and hardlink(source, target):
+                    stats['hardlinked'] += 1
+                else:
+                    shutil.copy2(source, target)
+                    stats['copied'] += 1
+
+        os.rename(tmp, dst)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    return stats
+
+
+def unshare_links(directory):
+    """
+    Replaces the hardlinked files of a directory by copies, so writing to
+    them does not change the package they were cloned from
+    """
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            path = os.path.join(root, file)
+            try:
+                if os.lstat(path).st_nlink < 2:
+                    continue
+            except OSError:
+                continue
+            tmp = os.path.join(root, '.{}.{}.tmp'.format(file, uuid.uuid4().hex[:8]))
+            shutil.copy2(path, tmp)
+            os.replace(tmp, path)
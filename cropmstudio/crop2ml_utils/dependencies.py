@@ -0,0 +1,203 @@
+"""
+Model dependency graph
+
+Indexes the models used by the compositions of the packages of the package
+roots, from the <Model filename=... package_name=...> entries of their
+Composition element. A model is identified by its (package name, filename)
+pair, the package name being the directory name of the package, as in the
+package_name references.
+
+The forward index maps a composition to the models it uses, and the reverse
+index maps a model to the compositions using it. Each composition file is
+parsed once, and parsed again only when its modification time or size
+changes, its edges then replacing its previous ones in both indexes.
+"""
+
+
+import os
+import threading
+import xml.etree.ElementTree as ET
+
+from .package_index import DEFAULT_ROOTS, _scan_dirs, _scan_files
+
+
+def read_dependencies(file_path, package):
+    """
+    Returns the models used by a composition file
+
+    Args:
+        file_path: The path of the composition file
+        package: The name of the package of the composition, the package of
+                 the models without a package_name
+
+    Returns:
+        Tuple of (package name, filename) pairs, in the composition order
+    """
+    root = ET.parse(file_path).getroot()
+    return tuple((model.get('package_name') or package, model.get('filename'))
+                 for model in root.iterfind('Composition/Model') if model.get('filename'))
+
+
+class DependencyGraph():
+    """
+    Memoized forward and reverse dependency indexes of the compositions of
+    the package roots
+
+    Parameters : \n
+        - roots : [str], the directories containing the packages
+    """
+
+
+    def __init__(self, roots=DEFAULT_ROOTS):
+
+        self.roots = list(roots)
+        self._packages = {}
+        self._files = {}
+        self._forward = {}
+        self._reverse = {}
+        self._lock = threading.Lock()
+
+
+
+    def dependencies(self, package, model, recursive=False):
+        """
+        Returns the models used by a composition
+
+        Args:
+            package: The package name of the composition
+            model: The filename of the composition
+            recursive: Whether to include the models used by the compositions used
+
+        Returns:
+            List of (package name, filename) pairs
+        """
+
+        with self._lock:
+            self._refresh()
+            return self._walk(self._forward, (package, model), recursive)
+
+
+
+    def dependents(self, package, model, recursive=False):
+        """
+        Returns the compositions using a model
+
+        Args:
+            package: The package name of the model
+            model: The filename of the model
+            recursive: Whether to include the compositions using these compositions
+
+        Returns:
+            List of (package name, filename) pairs
+        """
+
+        with self._lock:
+            self._refresh()
+            return self._walk(self._reverse, (package, model), recursive)
+
+
+
+    def resolve(self, package, model):
+        """
+        Returns the path of a model file, or None if its package or the file
+        does not exist
+        """
+
+        path = self._packages.get(package)
+        if path is None:
+            return None
+        file_path = os.path.join(path, 'crop2ml', model)
+        return file_path if os.path.isfile(file_path) else None
+
+
+
+    def _walk(self, index, node, recursive):
+        """
+        Returns the nodes adjacent to node in the index, or reachable from it
+        if recursive, in breadth first order
+        """
+
+        result = []
+        seen = {node}
+        queue = [node]
+        for current in queue:
+            neighbours = index.get(current, ())
+            # The dependents are sets, sorted for a stable order
+            if isinstance(neighbours, set):
+                neighbours = sorted(neighbours)
+            for neighbour in neighbours:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    result.append(neighbour)
+                    if recursive:
+                        queue.append(neighbour)
+        return result
+
+
+
+    def _refresh(self):
+        """
+        Updates the indexes with the composition files which were added,
+        changed or removed
+        """
+
+        packages = {}
+        for root in self.roots:
+            for name in sorted(_scan_dirs(root)):
+                packages.setdefault(name, os.path.join(root, name))
+
+        seen = set()
+        for name, path in packages.items():
+            crop2ml = os.path.join(path, 'crop2ml')
+            for filename, st in _scan_files(crop2ml):
+                if filename.startswith('composition.') and filename.endswith('.xml'):
+                    file_path = os.path.join(crop2ml, filename)
+                    seen.add(file_path)
+                    self._update(file_path, (name, filename), (st.st_mtime_ns, st.st_size))
+
+        for file_path in set(self._files) - seen:
+            self._unlink(file_path)
+
+        self._packages = packages
+
+
+
+    def _update(self, file_path, node, key):
+        """
+        Indexes the edges of a composition file, unless it did not change
+        """
+
+        cached = self._files.get(file_path)
+        if cached is not None and cached[0] == key and cached[1] == node:
+            return
+        if cached is not None:
+            self._unlink(file_path)
+
+        try:
+            dependencies = read_dependencies(file_path, node[0])
+        except (OSError, ET.ParseError):
+            dependencies = ()
+
+        self._files[file_path] = (key, node, dependencies)
+        self._forward[node] = dependencies
+        for dependency in dependencies:
+            self._reverse.setdefault(dependency, set()).add(node)
+
+
+
+    def _unlink(self, file_path):
+        """
+        Removes the edges of a composition file from the indexes
+        """
+
+        _, node, dependencies = self._files.pop(file_path)
+        self._forward.pop(node, None)
+        for dependency in dependencies:
+            dependents = self._reverse.get(dependency)
+            if dependents is not None:
+                dependents.discard(node)
+                if not dependents:
+                    del self._reverse[dependency]
+
+
+dependency_graph = DependencyGraph()
@@ -0,0 +1,181 @@
+"""
+Synthetic package generator
+
+Writes Crop2ML packages of any size, for benchmarks and load tests, with the
+same writers as the model creation handlers.
+
+Each unit model has an exogenous input x, parameters p1..pn and an output
+<model>_out = x + p1 + ... + pn, so its testsets can actually be checked.
+The unit models are chained in compositions: the output of a model is the
+input x of the next one. With a depth greater than 1, the compositions are
+themselves chained in compositions, up to a single top level composition.
+
+Usage:
+    python -m cropmstudio.crop2ml_utils.generate ROOT --models 1000 --depth 3
+"""
+
+
+import argparse
+import math
+import os
+
+from .records import Parameterset, Test, Testset, Variable
+from .writecompositionxml import writecompositionXML
+from .writeunitxml import writeunitXML
+
+
+def _header(path, name, package, model_type):
+
+    return {
+        'Path': path,
+        'Model type': model_type,
+        'Model name': name,
+        'Model ID': package,
+        'Version': '1.0',
+        'Timestep': '1',
+        'Title': '{} model'.format(name),
+        'Authors': 'cropmstudio',
+        'Institution': 'cropmstudio',
+        'Reference': 'Synthetic model',
+        'ExtendedDescription': 'Synthetic {} model {}'.format(model_type, name)
+    }
+
+
+def _value(value):
+
+    return repr(round(value, 6))
+
+
+def _write_unit(crop2ml, package, name, variables, parametersets, testsets, tests):
+    """
+    Writes a unit model and its algorithm, and returns its output name
+    """
+    output = '{}_out'.format(name.lower())
+    params = ['p{}'.format(j) for j in range(1, variables)]
+    defaults = {param: 0.1 * j for j, param in enumerate(params, 1)}
+
+    inputs = [Variable('x', 'input', 'exogenous input', 'variable', 'exogenous', 'DOUBLE',
+                       default='0.0', min='-1000000.0', max='1000000.0', unit='')]
+    inputs += [Variable(param, 'input', 'parameter {}'.format(param), 'parameter', 'constant', 'DOUBLE',
+                        default=_value(defaults[param]), min='-1000.0', max='1000.0', unit='')
+               for param in params]
+    inputs.append(Variable(output, 'output', 'output', 'variable', 'state', 'DOUBLE',
+                           min='-1000000.0', max='1000000.0', unit=''))
+
+    paramsetdict = {}
+    for k in range(parametersets):
+        values = {param: defaults[param] + k for param in params}
+        paramsetdict['set{}'.format(k)] = Parameterset('set{}'.format(k), 'parameterset {}'.format(k),
+                                                       {param: _value(v) for param, v in values.items()})
+
+    testsetdict = {}
+    for k in range(testsets):
+        paramset = 'set{}'.format(k % parametersets) if parametersets else ''
+        offset = k % parametersets if parametersets else 0
+        total = sum(defaults[param] + offset for param in params)
+        testsetdict['check{}'.format(k)] = Testset(
+            'check{}'.format(k), 'testset {}'.format(k), paramset,
+            tuple(Test('test{}'.format(t), {'x': _value(float(t))}, {output: (_value(t + total), '2')})
+                  for t in range(tests)))
+
+    datas = _header(crop2ml, name, package, 'unit')
+    df = {'Inputs': inputs, 'Functions': [], 'init': False}
+    writeunitXML(datas, df, paramsetdict, testsetdict, iscreate=True)._write()
+
+    with open(os.path.join(crop2ml, 'algo', 'pyx', '{}.pyx'.format(name.lower())), 'w', encoding='utf8') as f:
+        f.write('{} = {}\n'.format(output, ' + '.join(['x'] + params)))
+
+    return output
+
+
+def _write_composition(crop2ml, package, name, children):
+    """
+    Writes a composition chaining its children, a list of (filename, name,
+    output), and returns its output name
+    """
+    output = '{}_out'.format(name.lower())
+    listlink = [{'Link type': 'InputLink', 'Target': '{}.x'.format(children[0][1]), 'Source': 'x'}]
+    for (_, source, source_output), (_, target, _) in zip(children, children[1:]):
+        listlink.append({'Link type': 'InternalLink',
+                         'Target': '{}.x'.format(target),
+                         'Source': '{}.{}'.format(source, source_output)})
+    listlink.append({'Link type': 'OutputLink',
+                     'Target': output,
+                     'Source': '{}.{}'.format(children[-1][1], children[-1][2])})
+
+    datas = _header(crop2ml, name, package, 'composition')
+    writecompositionXML(datas, [child[0] for child in children], listlink).write()
+    return output
+
+
+def generate_package(root, name='Synthetic', models=10, variables=4, parametersets=1,
+                     testsets=1, tests=2, depth=1):
+    """
+    Writes a synthetic package
+
+    Args:
+        root: The directory of the package
+        name: The package name
+        models: The number of unit models
+        variables: The number of inputs of each unit model, its input x and
+                   variables - 1 parameters
+        parametersets: The number of parametersets of each unit model
+        testsets: The number of testsets of each unit model
+        tests: The number of tests of each testset
+        depth: The number of composition levels, 0 for no composition
+
+    Returns:
+        The package path
+    """
+    if models < 1 or variables < 1:
+        raise ValueError("A package needs at least one model with one variable")
+
+    path = os.path.join(root, name)
+    crop2ml = os.path.join(path, 'crop2ml')
+    os.makedirs(os.path.join(crop2ml, 'algo', 'pyx'), exist_ok=True)
+
+    width = len(str(models - 1))
+    children = []
+    for i in range(models):
+        model = 'Model{}'.format(str(i).zfill(width))
+        output = _write_unit(crop2ml, name, model, variables, parametersets, testsets, tests)
+        children.append(('unit.{}.xml'.format(model), model, output))
+
+    # Each level groups about models ** (1 / depth) children per composition
+    fanout = max(2, math.ceil(models ** (1 / depth))) if depth else 0
+    for level in range(depth, 0, -1):
+        if level == 1:
+            groups = [children]
+        else:
+            groups = [children[i:i + fanout] for i in range(0, len(children), fanout)]
+
+        parents = []
+        for j, group in enumerate(groups):
+            composition = name if level == 1 else 'Level{}Group{}'.format(level - 1, j)
+            output = _write_composition(crop2ml, name, composition, group)
+            parents.append(('composition.{}.xml'.format(composition), composition, output))
+        children = parents
+
+    return path
+
+
+def main(argv=None):
+
+    parser = argparse.ArgumentParser(description="Writes a synthetic Crop2ML package")
+    parser.add_argument("root", help="directory of the package")
+    parser.add_argument("--name", default="Synthetic", help="package name")
+    parser.add_argument("--models", type=int, default=10, help="number of unit models")
+    parser.add_argument("--variables", type=int, default=4, help="number of inputs of each unit model")
+    parser.add_argument("--parametersets", type=int, default=1, help="number of parametersets of each unit model")
+    parser.add_argument("--testsets", type=int, default=1, help="number of testsets of each unit model")
+    parser.add_argument("--tests", type=int, default=2, help="number of tests of each testset")
+    parser.add_argument("--depth", type=int, default=1, help="number of composition levels, 0 for none")
+    args = parser.parse_args(argv)
+
+    path = generate_package(args.root, args.name, args.models, args.variables, args.parametersets,
+                            args.testsets, args.tests, args.depth)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
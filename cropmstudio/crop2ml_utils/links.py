@@ -0,0 +1,242 @@
+"""
+Composition link validation
+
+The links of a composition are checked against the interfaces of its models
+before the composition is written. The inputs and outputs of each model file
+are read once with ElementTree and indexed in sets, cached until the file
+changes, so each link is checked in constant time.
+
+The models created in the same request as the composition are not written
+yet, their interfaces are given as pending interfaces, by file path.
+
+A composition used as a model has the sources of its InputLinks as inputs
+and the targets of its OutputLinks as outputs. These composition side names
+may be left empty by the forms, the model side of these links is checked.
+"""
+
+
+import os
+import xml.etree.ElementTree as ET
+
+
+LINK_TYPES = ('InputLink', 'InternalLink', 'OutputLink')
+
+
+class Interface():
+    """
+    Inputs and outputs of a model
+
+    Parameters : \n
+        - inputs : frozenset, the input names
+        - outputs : frozenset, the output names
+    """
+
+    __slots__ = ('inputs', 'outputs')
+
+
+    def __init__(self, inputs, outputs):
+
+        self.inputs = frozenset(inputs)
+        self.outputs = frozenset(outputs)
+
+
+def links_interface(listlink):
+    """
+    Returns the Interface of a composition from its links
+    """
+    return Interface((link.get('Source', '') for link in listlink if link.get('Link type') == 'InputLink'),
+                     (link.get('Target', '') for link in listlink if link.get('Link type') == 'OutputLink'))
+
+
+def read_interface(file_path):
+    """
+    Returns the Interface of a unit or composition model file
+    """
+    root = ET.parse(file_path).getroot()
+    if root.tag == 'ModelComposition':
+        links = root.find('Composition/Links')
+        links = links if links is not None else ()
+        return Interface((link.get('source') for link in links if link.tag == 'InputLink'),
+                         (link.get('target') for link in links if link.tag == 'OutputLink'))
+    return Interface((var.get('name') for var in root.iterfind('Inputs/Input')),
+                     (var.get('name') for var in root.iterfind('Outputs/Output')))
+
+
+class InterfaceIndex():
+    """
+    Cache of the model interfaces, by file path, valid while the file
+    modification time and size do not change
+    """
+
+
+    def __init__(self):
+
+        self._interfaces = {}
+
+
+
+    def get(self, file_path):
+
+        stat = os.stat(file_path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._interfaces.get(file_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        interface = read_interface(file_path)
+        self._interfaces[file_path] = (key, interface)
+        return interface
+
+
+
+    def clear(self):
+
+        self._interfaces.clear()
+
+
+interface_index = InterfaceIndex()
+
+
+def model_file(crop2ml, model):
+    """
+    Returns the name and the file path of a model of a composition list
+
+    Args:
+        crop2ml: The crop2ml directory of the composition
+        model: 'unit.<name>.xml', or '<package>:unit.<name>.xml' for a model
+               of another package of the same directory
+    """
+    package, _, filename = model.rpartition(':')
+    name = filename.split('.')[1] if filename.count('.') >= 2 else filename
+    if package:
+        packages = os.path.dirname(os.path.dirname(os.path.abspath(crop2ml)))
+        return name, os.path.join(packages, package, 'crop2ml', filename)
+    return name, os.path.join(crop2ml, filename)
+
+
+def _split(reference):
+    """
+    Returns the (model, variable) of a 'model.variable' link end, or None
+    """
+    model, dot, variable = reference.partition('.')
+    if not dot or not model or not variable:
+        return None
+    return model, variable
+
+
+def _find_cycle(graph):
+    """
+    Returns a cycle of the model graph as a list of models, or None
+    """
+    WHITE, GREY, BLACK = 0, 1, 2
+    color = dict.fromkeys(graph, WHITE)
+
+    for start in graph:
+        if color[start] != WHITE:
+            continue
+        color[start] = GREY
+        path = [start]
+        stack = [iter(graph[start])]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                color[path.pop()] = BLACK
+                stack.pop()
+            elif color.get(node, WHITE) == GREY:
+                return path[path.index(node):] + [node]
+            elif color.get(node, WHITE) == WHITE:
+                color[node] = GREY
+                path.append(node)
+                stack.append(iter(graph.get(node, ())))
+    return None
+
+
+def validate_links(crop2ml, listmodel, listlink, index=interface_index, pending=None):
+    """
+    Checks the links of a composition against the interfaces of its models
+
+    Args:
+        crop2ml: The crop2ml directory of the composition
+        listmodel: The models of the composition, as written by writecompositionXML
+        listlink: The links, dicts with 'Link type', 'Source' and 'Target'
+        index: The InterfaceIndex of the model files
+        pending: Dict of the absolute paths of the model files not written
+                 yet to their Interface, which take precedence over the files
+
+    Returns:
+        The list of error messages, empty if the links are valid
+    """
+    errors = []
+    interfaces = {}
+    pending = pending or {}
+    for model in listmodel:
+        name, file_path = model_file(crop2ml, model)
+        if name in interfaces:
+            errors.append(f"Model {name} is listed twice")
+            continue
+        if os.path.abspath(file_path) in pending:
+            interfaces[name] = pending[os.path.abspath(file_path)]
+            continue
+        try:
+            interfaces[name] = index.get(file_path)
+        except OSError:
+            errors.append(f"Model file not found: {model}")
+            interfaces[name] = None
+        except ET.ParseError as e:
+            errors.append(f"Model file {model} could not be parsed: {e}")
+            interfaces[name] = None
+
+    def check(reference, side, link):
+        split = _split(reference)
+        if split is None:
+            errors.append(f"{link}: {reference} is not a model.variable reference")
+            return None
+        model, variable = split
+        if model not in interfaces:
+            errors.append(f"{link}: unknown model {model}")
+            return None
+        interface = interfaces[model]
+        if interface is not None and variable not in getattr(interface, side):
+            errors.append(f"{link}: {model} has no {side[:-1]} {variable}")
+        return model
+
+    graph = {}
+    targets = set()
+    outputs = set()
+    for link in listlink:
+        link_type = link.get('Link type', '')
+        source, target = link.get('Source', ''), link.get('Target', '')
+        label = f"{link_type or 'Link'} {source} -> {target}"
+
+        if link_type not in LINK_TYPES:
+            errors.append(f"{label}: unknown link type")
+            continue
+
+        if link_type == 'OutputLink':
+            check(source, 'outputs', label)
+            if '.' in target:
+                errors.append(f"{label}: the target must be an output name of the composition")
+            elif target and target in outputs:
+                errors.append(f"{label}: output {target} is already linked")
+            outputs.add(target)
+            continue
+
+        source_model = None
+        if link_type == 'InputLink':
+            if '.' in source:
+                errors.append(f"{label}: the source must be an input name of the composition")
+        else:
+            source_model = check(source, 'outputs', label)
+
+        target_model = check(target, 'inputs', label)
+        if target in targets:
+            errors.append(f"{label}: input {target} is already linked")
+        targets.add(target)
+
+        if link_type == 'InternalLink' and source_model and target_model:
+            graph.setdefault(source_model, set()).add(target_model)
+
+    cycle = _find_cycle(graph)
+    if cycle:
+        errors.append("Cycle in the internal links: {}".format(' -> '.join(cycle)))
+
+    return errors
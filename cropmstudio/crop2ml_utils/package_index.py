@@ -0,0 +1,163 @@
+"""
+Package index
+
+Lists the packages of one or more package roots, with a summary of each
+package: model count by type, size, last modification time and transpiled
+targets.
+
+The root listings and the package summaries are cached, and invalidated by
+the modification time of the directories they are computed from.
+"""
+
+
+import os
+import threading
+
+from .utils import STATE_DIRNAME
+
+
+DEFAULT_ROOTS = ("./packages",)
+
+
+def _mtime(path):
+
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _scan_files(directory):
+    """
+    Returns the regular files of a directory as a list of (name, stat)
+    """
+    try:
+        with os.scandir(directory) as it:
+            return [(entry.name, entry.stat()) for entry in it if entry.is_file()]
+    except OSError:
+        return []
+
+
+def _scan_dirs(directory):
+    """
+    Returns the names of the subdirectories of a directory
+    """
+    try:
+        with os.scandir(directory) as it:
+            return [entry.name for entry in it if entry.is_dir() and not entry.name.startswith('.')]
+    except OSError:
+        return []
+
+
+class PackageIndex():
+    """
+    Cached index of the packages of the package roots.
+
+    A package entry only depends on the content of its own directory, of its
+    crop2ml and crop2ml/algo/pyx directories, of its src directory and of
+    its transpilation state directory. It is computed again when one of
+    their modification times changes.
+
+    Parameters : \n
+        - roots : [str], the directories containing the packages
+    """
+
+
+    def __init__(self, roots=DEFAULT_ROOTS):
+
+        self.roots = list(roots)
+        self._listings = {}
+        self._packages = {}
+        self._lock = threading.Lock()
+
+
+
+    def get_packages(self):
+        """
+        Returns the summary of every package of the roots
+        """
+
+        with self._lock:
+            packages = []
+            seen = set()
+            for root in self.roots:
+                for name in self._list_root(root):
+                    path = os.path.join(root, name)
+                    packages.append(self._summary(path, name))
+                    seen.add(path)
+
+            # Forget the packages which were removed
+            for path in set(self._packages) - seen:
+                del self._packages[path]
+
+            return packages
+
+
+
+    def _list_root(self, root):
+        """
+        Returns the package directory names of a root
+        """
+
+        mtime = _mtime(root)
+        cached = self._listings.get(root)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        names = sorted(_scan_dirs(root))
+        self._listings[root] = (mtime, names)
+        return names
+
+
+
+    def _summary(self, path, name):
+        """
+        Returns the summary of a package
+        """
+
+        crop2ml = os.path.join(path, 'crop2ml')
+        algo = os.path.join(crop2ml, 'algo', 'pyx')
+        src = os.path.join(path, 'src')
+        state = os.path.join(path, STATE_DIRNAME, 'transpile')
+
+        signature = tuple(_mtime(d) for d in (path, crop2ml, algo, src, state))
+        cached = self._packages.get(path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        models = {"unit": 0, "composition": 0}
+        size = 0
+        modified = max(m for m in signature if m is not None)
+
+        for filename, st in _scan_files(crop2ml):
+            split = filename.split('.')
+            if split[-1] == 'xml' and split[0] in models:
+                models[split[0]] += 1
+                size += st.st_size
+                modified = max(modified, st.st_mtime_ns)
+
+        for filename, st in _scan_files(algo):
+            if filename.endswith('.pyx'):
+                size += st.st_size
+                modified = max(modified, st.st_mtime_ns)
+
+        # Targets transpiled by cropmstudio, and the ones found in the output
+        # directory for the packages transpiled outside of it
+        targets = set(_scan_dirs(src))
+        for filename, _ in _scan_files(state):
+            if filename.startswith('package.') and filename.endswith('.json'):
+                targets.add(filename[len('package.'):-len('.json')])
+
+        summary = {
+            "path": path,
+            "name": name,
+            "models": models,
+            "size": size,
+            "modified": modified / 1e9,
+            "targets": sorted(targets)
+        }
+        self._packages[path] = (signature, summary)
+        return summary
+
+
+package_index = PackageIndex()
@@ -0,0 +1,203 @@
+"""
+Model records
+
+Compact immutable records of the variables, parametersets and testsets of a
+unit model. They are built once from the form JSON or from a parsed model,
+and are used as is by the JSON serialization and the xml writer.
+"""
+
+
+from typing import NamedTuple
+
+
+def _text(value):
+    """
+    Returns the str of a value, or '' for None
+    """
+    return '' if value is None else str(value)
+
+
+class Variable(NamedTuple):
+    """
+    A variable of a unit model
+
+    type is 'input', 'output' or 'input & output', inputtype is 'variable'
+    or 'parameter', and category is the variable or parameter category.
+    """
+    name: str
+    type: str
+    description: str = ''
+    inputtype: str = ''
+    category: str = ''
+    datatype: str = ''
+    len: str = ''
+    default: str = ''
+    min: str = ''
+    max: str = ''
+    unit: str = ''
+    uri: str = ''
+
+    @classmethod
+    def from_json(cls, item):
+        """
+        Returns the variable of an item of the inputs-outputs form
+        """
+        return cls(item.get('Name', ''), item.get('Type', ''), item.get('Description', ''),
+                   item.get('InputType', ''), item.get('Category', ''), item.get('DataType', ''),
+                   item.get('Len', ''), item.get('Default', ''), item.get('Min', ''),
+                   item.get('Max', ''), item.get('Unit', ''), item.get('Uri', ''))
+
+    @classmethod
+    def from_model(cls, var, type):
+        """
+        Returns the variable of a parsed pycropml input or output
+        """
+        category = var.variablecategory if hasattr(var, 'variablecategory') else var.parametercategory
+        return cls(var.name, type, var.description, getattr(var, 'inputtype', '') or '', category,
+                   var.datatype, getattr(var, 'len', '') or '', getattr(var, 'default', '') or '',
+                   _text(getattr(var, 'min', None)), _text(getattr(var, 'max', None)),
+                   var.unit, getattr(var, 'uri', '') or '')
+
+    def to_json(self):
+        """
+        Returns the item of the inputs-outputs form, without the empty
+        optional fields
+        """
+        data = {
+            "Type": self.type,
+            "Name": self.name,
+            "Description": self.description,
+            "Category": self.category,
+            "DataType": self.datatype,
+            "Unit": self.unit
+        }
+        if self.type != 'output' or self.inputtype:
+            data["InputType"] = self.inputtype
+        for key, value in (("Len", self.len), ("Default", self.default), ("Min", self.min),
+                           ("Max", self.max), ("Uri", self.uri)):
+            if value:
+                data[key] = value
+        return data
+
+
+class Parameterset(NamedTuple):
+    """
+    A parameterset of a unit model, params maps the parameter names to their
+    values
+    """
+    name: str
+    description: str
+    params: dict
+
+    @classmethod
+    def from_json(cls, item):
+        """
+        Returns the parameterset of an item of the parametersets form
+        """
+        return cls(item.get('name', ''), item.get('description', ''), item.get('parameters', {}))
+
+    @classmethod
+    def from_model(cls, pset):
+        """
+        Returns the parameterset of a parsed pycropml parameterset
+        """
+        params = {param.name: _text(getattr(param, 'value', None)) for param in getattr(pset, 'params', ())}
+        return cls(pset.name, getattr(pset, 'description', ''), params)
+
+    def to_json(self):
+        return {
+            "name": self.name,
+            "description": self.description,
+            "parameters": self.params
+        }
+
+
+class Test(NamedTuple):
+    """
+    A test of a testset, inputs maps the input names to their values and
+    outputs maps the output names to their (value, precision)
+    """
+    name: str
+    inputs: dict
+    outputs: dict
+
+    @classmethod
+    def from_json(cls, item):
+        """
+        Returns the test of an item of the testsets form
+        """
+        outputs = {name: (data.get('value', ''), data.get('precision', ''))
+                   for name, data in item.get('outputs', {}).items()}
+        return cls(item.get('name', ''), item.get('inputs', {}), outputs)
+
+    @classmethod
+    def from_model(cls, test):
+        """
+        Returns the test of a parsed pycropml test
+        """
+        inputs = {inp.name: _text(getattr(inp, 'value', None)) for inp in getattr(test, 'inputs', ())}
+        outputs = {out.name: (_text(getattr(out, 'value', None)), _text(getattr(out, 'precision', None)))
+                   for out in getattr(test, 'outputs', ())}
+        return cls(test.name, inputs, outputs)
+
+    def to_json(self):
+        outputs = {}
+        for name, (value, precision) in self.outputs.items():
+            outputs[name] = {"value": value}
+            if precision:
+                outputs[name]["precision"] = precision
+        return {
+            "name": self.name,
+            "inputs": self.inputs,
+            "outputs": outputs
+        }
+
+
+class Testset(NamedTuple):
+    """
+    A testset of a unit model, run with the parameterset of the given name
+    """
+    name: str
+    description: str
+    parameterset: str
+    tests: tuple
+
+    @classmethod
+    def from_json(cls, item):
+        """
+        Returns the testset of an item of the testsets form
+        """
+        return cls(item.get('name', ''), item.get('description', ''), item.get('parameterset', ''),
+                   tuple(Test.from_json(test) for test in item.get('tests', [])))
+
+    @classmethod
+    def from_model(cls, tset):
+        """
+        Returns the testset of a parsed pycropml testset
+        """
+        return cls(tset.name, getattr(tset, 'description', ''), getattr(tset, 'parameterset', ''),
+                   tuple(Test.from_model(test) for test in getattr(tset, 'tests', ())))
+
+    def to_json(self):
+        return {
+            "name": self.name,
+            "description": self.description,
+            "parameterset": self.parameterset,
+            "tests": [test.to_json() for test in self.tests]
+        }
+
+
+def model_variables(xml):
+    """
+    Returns the variables of a parsed unit model, the inputs first, with the
+    outputs which are also inputs marked as 'input & output'
+    """
+    variables = {}
+    for var in xml.inputs or ():
+        variables[var.name] = Variable.from_model(var, 'input')
+    for var in xml.outputs or ():
+        if var.name in variables:
+            variables[var.name] = variables[var.name]._replace(type='input & output')
+        else:
+            variables[var.name] = Variable.from_model(var, 'output')
+    return list(variables.values())
@@ -0,0 +1,149 @@
+"""
+Workflow image cache
+
+Rendering the workflow of a package with pycropml is slow for large
+compositions, so the rendered images are cached in memory and in the package
+state directory, keyed by a hash of the crop2ml/*.xml model files. An image
+is rendered again only when one of these files changes.
+"""
+
+
+import hashlib
+import os
+import tempfile
+import threading
+
+from .utils import STATE_DIRNAME
+
+
+def models_hash(path):
+    """
+    Returns the sha256 of the names and contents of the crop2ml/*.xml files
+    of a package
+    """
+    crop2ml = os.path.join(path, 'crop2ml')
+    digest = hashlib.sha256()
+
+    with os.scandir(crop2ml) as it:
+        filenames = sorted(entry.name for entry in it if entry.name.endswith('.xml') and entry.is_file())
+
+    for filename in filenames:
+        digest.update(filename.encode('utf8') + b'\0')
+        with open(os.path.join(crop2ml, filename), 'rb') as f:
+            digest.update(f.read())
+        digest.update(b'\0')
+
+    return digest.hexdigest()
+
+
+def render_wf_svg(package_name, path):
+    """
+    Builds the package topology and renders its workflow image
+    """
+    from pycropml.topology import Topology
+
+    topo = Topology(package_name, pkg=path)
+    return topo.get_wf_svg()
+
+
+class WorkflowSvgCache():
+    """
+    Cache of the rendered workflow images.
+
+    The images are bytes, or base64 str, as returned by pycropml. They are
+    stored in <package>/.cropmstudio/svg/<hash>.svg or <hash>.b64 depending
+    on their type, and the last one of each package is kept in memory.
+
+    Parameters : \n
+        - render : callable(package_name, path), renders the workflow image
+    """
+
+
+    def __init__(self, render=render_wf_svg):
+
+        self.render = render
+        self._images = {}
+        self._lock = threading.Lock()
+
+
+
+    def get_wf_svg(self, package_name, path):
+        """
+        Returns the workflow image of the package, rendering it if its model
+        files changed since it was cached
+        """
+
+        key = models_hash(path)
+        path = os.path.abspath(path)
+
+        with self._lock:
+            cached = self._images.get(path)
+        if cached is not None and cached[0] == (package_name, key):
+            return cached[1]
+
+        directory = os.path.join(path, STATE_DIRNAME, 'svg')
+        image = self._load(directory, key)
+        if image is None:
+            image = self.render(package_name, path)
+            self._save(directory, key, image)
+
+        with self._lock:
+            self._images[path] = ((package_name, key), image)
+        return image
+
+
+
+    def invalidate(self, path=None):
+        """
+        Forgets the in memory image of a package, or of all of them
+        """
+
+        with self._lock:
+            if path is None:
+                self._images.clear()
+            else:
+                self._images.pop(os.path.abspath(path), None)
+
+
+
+    def _load(self, directory, key):
+
+        for extension, binary in (('.svg', True), ('.b64', False)):
+            try:
+                with open(os.path.join(directory, key + extension), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            return data if binary else data.decode('utf8')
+        return None
+
+
+
+    def _save(self, directory, key, image):
+        """
+        Writes the image atomically and removes the older images of the package
+        """
+
+        if isinstance(image, str):
+            extension, data = '.b64', image.encode('utf8')
+        elif isinstance(image, bytes):
+            extension, data = '.svg', image
+        else:
+            return
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, os.path.join(directory, key + extension))
+
+            for filename in os.listdir(directory):
+                if not filename.startswith(key) and not filename.endswith('.tmp'):
+                    os.remove(os.path.join(directory, filename))
+        except OSError:
+            # The disk cache is an optimization, the image is still returned
+            pass
+
+
+svg_cache = WorkflowSvgCache()
@@ -0,0 +1,375 @@
+"""
+Parameter sweeps
+
+Evaluates a unit model over combinations of values of its inputs, with its
+Python code generated by the py transpilation. The swept values are given,
+or spread between the min and max of the inputs, and combined as a grid or
+zipped. The other inputs take their default, parameterset or given values.
+
+The combinations are evaluated by batches with run_batch, which the server
+runs in its model process pool with the timeout of the model code, so a
+crashing or hanging model does not affect the server. A batch which times
+out or whose worker dies has NaN outputs. With NumPy, the model is first
+called on the whole batch, the swept inputs as arrays. Algorithms which do
+not broadcast (branches on the inputs, math functions...) fail or return
+values of the wrong shape, and their batches are then evaluated once per
+combination.
+
+The results are columns of float64, the swept inputs then the outputs, a
+failed run having NaN outputs.
+"""
+
+
+from array import array
+import base64
+import math
+import os
+import sys
+import traceback
+import xml.etree.ElementTree as ET
+
+from .testrun import (ModelTimeout, call_model, find_model_functions, load_module, model_arguments, read_unit_tests,
+                      time_limit, worker_error)
+
+
+# Maximum number of combinations of a sweep
+MAX_RUNS = 1000000
+
+# Number of combinations evaluated by a call or a worker task
+BATCH_SIZE = 10000
+
+# Number of values between the min and max of an input, by default
+DEFAULT_STEPS = 10
+
+_NUMERIC_TYPES = ('DOUBLE', 'FLOAT', 'REAL', 'INT')
+
+
+class SweepError(ValueError):
+    """
+    An invalid sweep specification
+    """
+
+
+def sweep_values(name, spec, datatype, bounds):
+    """
+    Returns the values of a swept input
+
+    Args:
+        name: The input name
+        spec: {"values": [...]} or {"min": ..., "max": ..., "steps": ...}, the
+              min and max defaulting to the input bounds
+        datatype: The input datatype
+        bounds: The (min, max) xml values of the input
+    """
+    if datatype.upper() not in _NUMERIC_TYPES:
+        raise SweepError("Input {} of type {} cannot be swept".format(name, datatype))
+
+    if 'values' in spec:
+        try:
+            values = [float(value) for value in spec['values']]
+        except (TypeError, ValueError):
+            raise SweepError("Input {} has non numeric values".format(name))
+    else:
+        try:
+            low = float(spec['min'] if 'min' in spec else bounds[0])
+            high = float(spec['max'] if 'max' in spec else bounds[1])
+        except (TypeError, ValueError):
+            raise SweepError("Input {} has no min and max to sweep".format(name))
+        try:
+            steps = int(spec.get('steps', DEFAULT_STEPS))
+        except (TypeError, ValueError):
+            raise SweepError("Input {} has an invalid number of steps".format(name))
+        if steps < 1:
+            raise SweepError("Input {} needs at least one step".format(name))
+        values = [low] if steps == 1 else [low + (high - low) * i / (steps - 1) for i in range(steps)]
+
+    if datatype.upper() == 'INT':
+        values = [float(round(value)) for value in values]
+    if not values:
+        raise SweepError("Input {} has no values".format(name))
+    return values
+
+
+def combine(values, mode='grid'):
+    """
+    Returns the columns of the combinations of the swept values
+
+    Args:
+        values: Dict of the input names to their values
+        mode: 'grid' for every combination, the last input varying fastest,
+              or 'zip' for the values of the same rank
+
+    Returns:
+        Dict of the input names to array('d') columns
+    """
+    if mode == 'zip':
+        count = len(next(iter(values.values()), []))
+        if any(len(column) != count for column in values.values()):
+            raise SweepError("The zipped inputs must have the same number of values")
+        if count > MAX_RUNS:
+            raise SweepError("The sweep has {} combinations, at most {} are allowed".format(count, MAX_RUNS))
+        return {name: array('d', column) for name, column in values.items()}
+    if mode != 'grid':
+        raise SweepError("Unknown sweep mode {}".format(mode))
+
+    count = math.prod(len(column) for column in values.values())
+    if count > MAX_RUNS:
+        raise SweepError("The sweep has {} combinations, at most {} are allowed".format(count, MAX_RUNS))
+
+    columns = {}
+    stride = count
+    for name, column in values.items():
+        stride //= len(column)
+        repeat = count // (stride * len(column))
+        columns[name] = array('d', [value for value in column for _ in range(stride)] * repeat)
+    return columns
+
+
+def _arguments(fixed, columns, ints, i):
+
+    arguments = dict(fixed)
+    for name, column in columns.items():
+        arguments[name] = int(column[i]) if name in ints else column[i]
+    return arguments
+
+
+def _run_scalar(func, fixed, columns, ints, outputs):
+    """
+    Evaluates the model once per combination of a batch
+    """
+    count = len(next(iter(columns.values())))
+    results = {name: array('d', [math.nan]) * count for name in outputs}
+    failed, error = 0, None
+
+    for i in range(count):
+        try:
+            values = call_model(func, _arguments(fixed, columns, ints, i), outputs)
+            for name in outputs:
+                results[name][i] = float(values[name])
+        except ModelTimeout:
+            raise
+        except Exception:
+            failed += 1
+            error = error or traceback.format_exc()
+    return results, failed, error
+
+
+def _run_vectorized(func, fixed, columns, ints, outputs):
+    """
+    Evaluates the model on a batch with array inputs, and returns the output
+    columns, or None if NumPy is not installed or the algorithm does not
+    broadcast
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        return None
+
+    count = len(next(iter(columns.values())))
+    arguments = dict(fixed)
+    for name, column in columns.items():
+        values = np.frombuffer(column, dtype=np.float64)
+        arguments[name] = values.astype(np.int64) if name in ints else values
+
+    try:
+        with np.errstate(all='ignore'):
+            values = call_model(func, arguments, outputs)
+        results = {name: np.broadcast_to(np.asarray(values[name], dtype=np.float64), (count,))
+                   for name in outputs}
+    except ModelTimeout:
+        raise
+    except Exception:
+        return None
+
+    # A broadcast result may still differ from the scalar one, e.g. with
+    # numpy integer semantics. Only the first combination of the batch is
+    # checked, an algorithm giving the scalar result for it is assumed to
+    # give it for the others
+    try:
+        first = call_model(func, _arguments(fixed, {n: c[:1] for n, c in columns.items()}, ints, 0), outputs)
+        if not all(math.isclose(float(first[name]), float(results[name][0]), rel_tol=1e-9, abs_tol=1e-12)
+                   or (math.isnan(float(first[name])) and math.isnan(float(results[name][0])))
+                   for name in outputs):
+            return None
+    except ModelTimeout:
+        raise
+    except Exception:
+        return None
+
+    return {name: array('d', column.tobytes()) for name, column in results.items()}
+
+
+def run_batch(file_path, function, fixed, columns, ints, outputs, timeout=None):
+    """
+    Evaluates the model on a batch of combinations, in a worker process
+
+    The model is called on the whole batch with NumPy arrays if possible, and
+    once per combination otherwise.
+
+    Args:
+        file_path: The generated Python file
+        function: The model function name
+        fixed: Dict of the input names to their fixed values
+        columns: Dict of the swept input names to their array('d') values
+        ints: The names of the swept INT inputs
+        outputs: The output names, in the model order
+        timeout: The maximum duration of the batch in seconds, see time_limit
+
+    Returns:
+        (dict of the output names to array('d') values, number of failed
+        runs, first error, whether the batch was vectorized)
+
+    Raises:
+        ModelTimeout: The batch did not complete within the timeout
+    """
+    with time_limit(timeout):
+        func = getattr(load_module(file_path), function)
+        results = _run_vectorized(func, fixed, columns, ints, outputs)
+        if results is not None:
+            return results, 0, None, True
+        return _run_scalar(func, fixed, columns, ints, outputs) + (False,)
+
+
+def failed_batch(plan, batch, error):
+    """
+    Returns the run_batch result of a batch whose worker failed
+    """
+    count = len(next(iter(batch.values())))
+    return {name: array('d', [math.nan]) * count for name in plan['outputs']}, count, error, False
+
+
+def plan_sweep(path, model, spec):
+    """
+    Reads a unit model and prepares its parameter sweep
+
+    Args:
+        path: The path of the package
+        model: The unit model file, e.g. 'unit.Model.xml'
+        spec: The sweep specification:
+              {
+                  "parameters": {"<input>": {"values": [...]} or {"min": ..., "max": ..., "steps": ...}, ...},
+                  "parameterset": "<name>",  # optional, the values of the other inputs
+                  "inputs": {"<input>": value, ...},  # optional, the values of the other inputs
+                  "mode": "grid" or "zip"  # optional, grid by default
+              }
+
+    Returns:
+        Dict with the swept 'columns', the 'outputs' names, the 'count' of
+        combinations, and the 'batches' of columns, each evaluated by
+        run_batch(*batch_arguments(plan, batch))
+    """
+    try:
+        unit = read_unit_tests(os.path.join(path, 'crop2ml', model))
+    except (OSError, ET.ParseError) as e:
+        raise SweepError("Model file {} could not be read: {}".format(model, e))
+
+    generated = find_model_functions(path).get((unit.name or '').lower())
+    if generated is None:
+        raise SweepError("No generated Python code for model {}, transpile the package to py first".format(unit.name))
+
+    parameters = spec.get('parameters') or {}
+    if not parameters:
+        raise SweepError("The sweep has no parameters")
+    for name in parameters:
+        if name not in unit.inputs:
+            raise SweepError("Model {} has no input {}".format(unit.name, name))
+
+    pset = {}
+    if spec.get('parameterset'):
+        if spec['parameterset'] not in unit.parametersets:
+            raise SweepError("Unknown parameterset {}".format(spec['parameterset']))
+        pset = unit.parametersets[spec['parameterset']].params
+    try:
+        fixed = model_arguments(unit, pset, {name: str(value) for name, value in (spec.get('inputs') or {}).items()})
+    except (ValueError, SyntaxError) as e:
+        raise SweepError("Invalid input value: {}".format(e))
+
+    values = {name: sweep_values(name, parameters[name] or {}, unit.inputs[name][0], unit.bounds.get(name, ('', '')))
+              for name in parameters}
+    columns = combine(values, spec.get('mode', 'grid'))
+    for name in columns:
+        fixed.pop(name, None)
+
+    count = len(next(iter(columns.values())))
+    return {
+        "generated": generated,
+        "fixed": fixed,
+        "columns": columns,
+        "ints": [name for name in columns if unit.inputs[name][0].upper() == 'INT'],
+        "outputs": list(unit.outputs),
+        "count": count,
+        "batches": [{name: column[start:start + BATCH_SIZE] for name, column in columns.items()}
+                    for start in range(0, count, BATCH_SIZE)]
+    }
+
+
+def batch_arguments(plan, batch):
+    """
+    Returns the run_batch arguments of a batch of the plan, without the timeout
+    """
+    return (*plan['generated'], plan['fixed'], batch, plan['ints'], plan['outputs'])
+
+
+def sweep_result(plan, results):
+    """
+    Returns the result of a sweep from the run_batch results of its batches
+
+    Returns:
+        Dict with the 'columns' names, the swept 'inputs' and the 'outputs'
+        names, the combinations 'count', whether the model was 'vectorized',
+        the number of 'failed' runs with the first 'error', and the columns
+        of float64 as 'data', a dict of the names to array('d')
+    """
+    data = dict(plan['columns'])
+    for name in plan['outputs']:
+        data[name] = array('d')
+        for result in results:
+            data[name].extend(result[0][name])
+
+    return {
+        "columns": list(data),
+        "inputs": list(plan['columns']),
+        "outputs": plan['outputs'],
+        "count": plan['count'],
+        "vectorized": all(result[3] for result in results),
+        "failed": sum(result[1] for result in results),
+        "error": next((result[2] for result in results if result[2]), None),
+        "data": data
+    }
+
+
+def run_sweep(path, model, spec, timeout=None):
+    """
+    Runs a parameter sweep of a unit model in the calling thread
+
+    Args:
+        path: The path of the package
+        model: The unit model file, e.g. 'unit.Model.xml'
+        spec: The sweep specification, see plan_sweep
+        timeout: The maximum duration of a batch in seconds, see time_limit
+
+    Returns:
+        The result of sweep_result
+    """
+    plan = plan_sweep(path, model, spec)
+    results = []
+    for batch in plan['batches']:
+        try:
+            results.append(run_batch(*batch_arguments(plan, batch), timeout))
+        except ModelTimeout as e:
+            results.append(failed_batch(plan, batch, worker_error(e, timeout)))
+    return sweep_result(plan, results)
+
+
+def encode_columns(data):
+    """
+    Returns the base64 of the little endian float64 columns, one after the
+    other
+    """
+    chunks = []
+    for column in data.values():
+        if sys.byteorder == 'big':
+            column = array('d', column)
+            column.byteswap()
+        chunks.append(column.tobytes())
+    return base64.b64encode(b''.join(chunks)).decode('ascii')
@@ -0,0 +1,126 @@
+"""
+Package template
+
+The packages are created from the cookiecutter-crop2ml template. Instead of
+cloning it for each new package, the template is rendered from a local copy:
+either a configured template directory, or a clone cached in the Jupyter data
+directory. The network is only used to fetch the cached clone, when it is
+explicitly updated: creating a package without a template raises an error
+telling how to get one.
+"""
+
+
+import os
+import shutil
+import tempfile
+import threading
+
+from jupyter_core.paths import jupyter_data_dir
+
+
+TEMPLATE_URL = "https://github.com/AgriculturalModelExchangeInitiative/cookiecutter-crop2ml"
+
+
+def default_cache_dir():
+
+    return os.path.join(jupyter_data_dir(), 'cropmstudio', 'templates', 'cookiecutter-crop2ml')
+
+
+class PackageTemplate():
+    """
+    Local copy of the package template
+
+    Parameters : \n
+        - local : str, a template directory used as is, or None to use the cached clone
+        - cache_dir : str, the directory of the cached clone, or None for the default one
+        - url : str, the repository of the template
+    """
+
+
+    def __init__(self, local=None, cache_dir=None, url=TEMPLATE_URL):
+
+        self.local = local
+        self.cache_dir = cache_dir
+        self.url = url
+        self._lock = threading.Lock()
+
+
+
+    def get_path(self):
+        """
+        Returns the local template directory
+
+        Raises:
+            FileNotFoundError: There is no template in the configured
+                               directory, or the template was never fetched
+        """
+
+        if self.local:
+            if not os.path.isfile(os.path.join(self.local, 'cookiecutter.json')):
+                raise FileNotFoundError(f"No package template in {self.local}, check the package_template setting")
+            return self.local
+
+        cache_dir = self.cache_dir or default_cache_dir()
+        with self._lock:
+            if not os.path.isfile(os.path.join(cache_dir, 'cookiecutter.json')):
+                raise FileNotFoundError("The package template was not fetched yet, fetch it with "
+                                        "POST /cropmstudio/update-package-template or set the "
+                                        "package_template setting to a local template directory")
+        return cache_dir
+
+
+
+    def update(self, checkout=None):
+        """
+        Fetches the template from its repository into the cache, and returns
+        the cache directory
+
+        Args:
+            checkout: The branch, tag or commit to check out, the default branch if None
+        """
+
+        cache_dir = self.cache_dir or default_cache_dir()
+        with self._lock:
+            self._clone(cache_dir, checkout)
+        return cache_dir
+
+
+
+    def render(self, output_dir, extra_context):
+        """
+        Creates a package in output_dir from the local template
+        """
+
+        path = self.get_path()
+
+        from cookiecutter.main import cookiecutter
+
+        return cookiecutter(path, no_input=True, extra_context=extra_context, output_dir=output_dir)
+
+
+
+    def _clone(self, cache_dir, checkout=None):
+        """
+        Clones the template next to the cache, then swaps it in, so the cache
+        is never left half written
+        """
+
+        from cookiecutter.vcs import clone
+
+        parent = os.path.dirname(cache_dir)
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=parent, prefix='.clone-')
+        try:
+            cloned = clone(self.url, checkout=checkout, clone_to_dir=tmp, no_input=True)
+            if os.path.isdir(cache_dir):
+                old = tempfile.mkdtemp(dir=parent, prefix='.old-')
+                os.replace(cache_dir, os.path.join(old, 'template'))
+                os.replace(cloned, cache_dir)
+                shutil.rmtree(old, ignore_errors=True)
+            else:
+                os.replace(cloned, cache_dir)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+package_template = PackageTemplate()
@@ -0,0 +1,502 @@
+"""
+Testset execution
+
+Runs the tests of the unit models against the Python code generated by the
+transpilation of the package to the py target. The model function
+model_<name> of the generated code is called with the input defaults,
+updated by the parameterset of the testset and by the inputs of the test,
+and each output is compared to its expected value within its precision.
+
+The tests are independent: plan_tests returns the run_test calls to make,
+which the server runs in its model process pool, and complete_tests compares
+their outputs. run_tests runs them all in the calling thread. The results of
+a model are cached in the package state directory, keyed by the hashes of
+its xml file, its algorithm files and its generated code, so the tests of an
+unchanged model are not run again.
+
+A test running longer than the timeout is interrupted in its worker, and
+reported as failed like a test whose worker crashed. The results of these
+models are not cached.
+"""
+
+
+import ast
+import asyncio
+from concurrent.futures import BrokenExecutor
+from contextlib import contextmanager
+import hashlib
+import importlib
+import inspect
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import traceback
+import types
+import xml.etree.ElementTree as ET
+
+from .records import Parameterset, Test, Testset
+from .utils import STATE_DIRNAME
+
+
+# Decimals compared when an output has no precision, as numpy.testing
+DEFAULT_PRECISION = 7
+
+# Maximum duration of a test, in seconds
+DEFAULT_TIMEOUT = 60
+
+# Additional wait for the result of a call in a worker, before giving up on it
+TIMEOUT_GRACE = 5
+
+_MODEL_FUNCTION = re.compile(r'^def (model_\w+)\s*\(', re.MULTILINE)
+
+
+class UnitTests():
+    """
+    The inputs, outputs, parametersets and testsets of a unit model file
+
+    Parameters : \n
+        - name : str, the model name
+        - inputs : {name: (datatype, default)}
+        - bounds : {name: (min, max)}, the input bounds, as written in the file
+        - outputs : {name: datatype}
+        - algorithms : [str], the algorithm files, relative to the crop2ml directory
+        - parametersets : {name: Parameterset}
+        - testsets : [Testset]
+    """
+
+
+    def __init__(self, name, inputs, outputs, algorithms, parametersets, testsets, bounds=None):
+
+        self.name = name
+        self.inputs = inputs
+        self.bounds = bounds or {}
+        self.outputs = outputs
+        self.algorithms = algorithms
+        self.parametersets = parametersets
+        self.testsets = testsets
+
+
+def read_unit_tests(file_path):
+    """
+    Returns the UnitTests of a unit model file
+    """
+    root = ET.parse(file_path).getroot()
+
+    inputs = {var.get('name'): (var.get('datatype', ''), var.get('default', ''))
+              for var in root.iterfind('Inputs/Input')}
+    bounds = {var.get('name'): (var.get('min', ''), var.get('max', '')) for var in root.iterfind('Inputs/Input')}
+    outputs = {var.get('name'): var.get('datatype', '') for var in root.iterfind('Outputs/Output')}
+    algorithms = [element.get('filename') for element in root
+                  if element.tag in ('Algorithm', 'Function', 'Initialization') and element.get('filename')]
+
+    parametersets = {}
+    for pset in root.iterfind('Parametersets/Parameterset'):
+        params = {param.get('name'): param.text or '' for param in pset.iterfind('Param')}
+        parametersets[pset.get('name')] = Parameterset(pset.get('name'), pset.get('description', ''), params)
+
+    testsets = []
+    for tset in root.iterfind('Testsets/Testset'):
+        tests = tuple(Test(test.get('name'),
+                           {value.get('name'): value.text or '' for value in test.iterfind('InputValue')},
+                           {value.get('name'): (value.text or '', value.get('precision', ''))
+                            for value in test.iterfind('OutputValue')})
+                      for test in tset.iterfind('Test'))
+        testsets.append(Testset(tset.get('name'), tset.get('description', ''), tset.get('parameterset', ''), tests))
+
+    return UnitTests(root.get('name'), inputs, outputs, algorithms, parametersets, testsets, bounds)
+
+
+def convert(value, datatype):
+    """
+    Returns the Python value of an xml value of a Crop2ML datatype
+    """
+    value = value.strip()
+    datatype = datatype.upper()
+    if datatype in ('DOUBLE', 'FLOAT', 'REAL'):
+        return float(value)
+    if datatype == 'INT':
+        return int(float(value))
+    if datatype == 'BOOLEAN':
+        return value.lower() in ('true', '1')
+    if datatype.endswith(('ARRAY', 'LIST')):
+        if not value:
+            return []
+        items = ast.literal_eval(value if value.startswith('[') else '[{}]'.format(value))
+        return [convert(str(item), datatype[:-len('ARRAY')] if datatype.endswith('ARRAY') else datatype[:-len('LIST')])
+                for item in items]
+    return value
+
+
+def compare(actual, expected, precision):
+    """
+    Returns whether an output matches its expected value, the numbers within
+    1.5 * 10 ** -precision, as numpy.testing.assert_almost_equal
+    """
+    if isinstance(expected, (list, tuple)):
+        try:
+            actual = list(actual)
+        except TypeError:
+            return False
+        return len(actual) == len(expected) and all(compare(a, e, precision) for a, e in zip(actual, expected))
+    if isinstance(expected, float) or isinstance(actual, float):
+        try:
+            return abs(float(actual) - float(expected)) < 1.5 * 10 ** -precision
+        except (TypeError, ValueError):
+            return False
+    return actual == expected
+
+
+def find_model_functions(path):
+    """
+    Returns the model functions of the generated Python code of a package
+
+    Returns:
+        Dict of lowercase model names to (file path, function name)
+    """
+    functions = {}
+    src = os.path.join(path, 'src', 'py')
+    for root, dirs, files in os.walk(src):
+        dirs.sort()
+        for file in sorted(files):
+            if not file.endswith('.py'):
+                continue
+            file_path = os.path.join(root, file)
+            try:
+                with open(file_path, encoding='utf8') as f:
+                    text = f.read()
+            except (OSError, UnicodeDecodeError):
+                continue
+            for function in _MODEL_FUNCTION.findall(text):
+                functions.setdefault(function[len('model_'):].lower(), (file_path, function))
+    return functions
+
+
+_modules = {}
+
+
+def _package_name(key):
+
+    return '_cropmstudio_generated_{}'.format(hashlib.sha256(repr(key).encode()).hexdigest()[:16])
+
+
+def load_module(file_path):
+    """
+    Imports a generated module under a name unique to its file and content,
+    with its directory as parent package so its relative imports work
+
+    The modules of the previous versions of the file are unloaded.
+    """
+    key = (file_path, os.stat(file_path).st_mtime_ns)
+    module = _modules.get(key)
+    if module is not None:
+        return module
+
+    for old in [old for old in _modules if old[0] == file_path]:
+        del _modules[old]
+        prefix = _package_name(old)
+        for name in [name for name in sys.modules if name == prefix or name.startswith(prefix + '.')]:
+            del sys.modules[name]
+
+    directory, filename = os.path.split(file_path)
+    package = _package_name(key)
+    if package not in sys.modules:
+        parent = types.ModuleType(package)
+        parent.__path__ = [directory]
+        sys.modules[package] = parent
+    module = importlib.import_module('{}.{}'.format(package, filename[:-len('.py')]))
+    _modules[key] = module
+    return module
+
+
+def call_model(func, arguments, outputs):
+    """
+    Calls a model function with the arguments it accepts, and returns its
+    outputs by name
+
+    Args:
+        func: The model function
+        arguments: Dict of the input names to their values
+        outputs: The output names, in the model order
+    """
+    parameters = inspect.signature(func).parameters
+    if not any(p.kind == p.VAR_KEYWORD for p in parameters.values()):
+        arguments = {name: value for name, value in arguments.items() if name in parameters}
+    result = func(**arguments)
+
+    if isinstance(result, dict):
+        return result
+    if len(outputs) == 1:
+        return {outputs[0]: result}
+    if isinstance(result, (tuple, list)) and len(result) == len(outputs):
+        return dict(zip(outputs, result))
+    raise ValueError("{} returned {} values, {} outputs expected".format(
+        func.__name__, len(result) if isinstance(result, (tuple, list)) else 1, len(outputs)))
+
+
+class ModelTimeout(Exception):
+    """
+    The model code did not complete within its timeout
+    """
+
+
+def _interrupt(signum, frame):
+
+    raise ModelTimeout()
+
+
+@contextmanager
+def time_limit(timeout):
+    """
+    Raises ModelTimeout in the block once it ran for timeout seconds
+
+    The limit is enforced with a timer signal, so only in the main thread of
+    a process, e.g. a worker process, and is ignored elsewhere or if None.
+    """
+    timer = (timeout is not None and hasattr(signal, 'setitimer')
+             and threading.current_thread() is threading.main_thread())
+    if not timer:
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _interrupt)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def worker_error(error, timeout):
+    """
+    Returns the message of an error raised by a call to a worker
+    """
+    if isinstance(error, (ModelTimeout, TimeoutError, asyncio.TimeoutError)):
+        return "The model did not complete within {} s".format(timeout)
+    if isinstance(error, BrokenExecutor):
+        return "The worker process stopped unexpectedly"
+    return "The model could not be run: {}".format(error)
+
+
+def run_test(file_path, function, arguments, outputs, timeout=None):
+    """
+    Runs a test in a worker process
+
+    Args:
+        file_path: The generated Python file
+        function: The model function name
+        arguments: Dict of the input names to their values
+        outputs: The output names, in the model order
+        timeout: The maximum duration of the test in seconds, see time_limit
+
+    Returns:
+        Dict of 'outputs', the output names to their values, or 'error'
+    """
+    try:
+        with time_limit(timeout):
+            values = call_model(getattr(load_module(file_path), function), arguments, outputs)
+    except ModelTimeout as e:
+        return {"error": worker_error(e, timeout), "retry": True}
+    except Exception:
+        return {"error": traceback.format_exc()}
+
+    # Numpy values and arrays as plain Python values
+    return {"outputs": {name: value.tolist() if hasattr(value, 'tolist') else value for name, value in values.items()}}
+
+
+def _hash_files(file_paths):
+
+    digest = hashlib.sha256()
+    for file_path in file_paths:
+        digest.update(file_path.encode('utf8'))
+        try:
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        except OSError:
+            digest.update(b'\0missing')
+    return digest.hexdigest()
+
+
+def _cache_file(path, model):
+
+    return os.path.join(path, STATE_DIRNAME, 'tests', '{}.json'.format(model))
+
+
+def _read_cache(path, model, key):
+
+    try:
+        with open(_cache_file(path, model), encoding='utf8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return cached.get('tests') if cached.get('hash') == key else None
+
+
+def _write_cache(path, model, key, tests):
+
+    cache_file = _cache_file(path, model)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp = '{}.{}.tmp'.format(cache_file, os.getpid())
+    with open(tmp, 'w', encoding='utf8') as f:
+        json.dump({'hash': key, 'tests': tests}, f)
+    os.replace(tmp, cache_file)
+
+
+def model_arguments(unit, *values):
+    """
+    Returns the input defaults of a unit model, updated by the dicts of
+    input names to xml values, in order
+    """
+    arguments = {}
+    for name, (datatype, default) in unit.inputs.items():
+        if default.strip():
+            arguments[name] = convert(default, datatype)
+    for inputs in values:
+        for name, value in inputs.items():
+            arguments[name] = convert(value, unit.inputs.get(name, ('', ''))[0])
+    return arguments
+
+
+def _plan(unit, file_path, function):
+    """
+    Returns the results of the tests of a model, and the (result, test,
+    run_test arguments) of the ones which can run
+    """
+    results, runs = [], []
+    for testset in unit.testsets:
+        pset = unit.parametersets.get(testset.parameterset) if testset.parameterset else None
+        for test in testset.tests:
+            result = {"testset": testset.name, "test": test.name}
+            if testset.parameterset and pset is None:
+                result.update(success=False, error="Unknown parameterset {}".format(testset.parameterset))
+                results.append(result)
+                continue
+            try:
+                arguments = model_arguments(unit, pset.params if pset else {}, test.inputs)
+            except (ValueError, SyntaxError) as e:
+                result.update(success=False, error="Invalid input value: {}".format(e))
+                results.append(result)
+                continue
+            results.append(result)
+            runs.append((result, test, (file_path, function, arguments, list(unit.outputs))))
+    return results, runs
+
+
+def _check(result, test, unit, run):
+    """
+    Completes the result of a test with its run and the output comparisons
+    """
+    if 'error' in run:
+        result.update(success=False, error=run['error'])
+        return
+
+    outputs = {}
+    for name, (value, precision) in test.outputs.items():
+        precision = int(precision) if precision.strip() else DEFAULT_PRECISION
+        expected = convert(value, unit.outputs.get(name, ''))
+        actual = run['outputs'].get(name)
+        outputs[name] = {"expected": expected, "actual": actual, "precision": precision,
+                         "success": name in run['outputs'] and compare(actual, expected, precision)}
+    result.update(success=all(output["success"] for output in outputs.values()), outputs=outputs)
+
+
+def plan_tests(path, models=None, force=False):
+    """
+    Reads the tests of unit models of a package
+
+    Args:
+        path: The path of the package
+        models: The unit model files to test, e.g. ['unit.Model.xml'], all
+                the unit models of the package if None
+        force: Whether to run the tests of the models whose results are cached
+
+    Returns:
+        (reports, pending), the reports of the models and the tests to run,
+        whose run_test arguments are listed by test_arguments
+    """
+    crop2ml = os.path.join(path, 'crop2ml')
+    if models is None:
+        models = sorted(f for f in os.listdir(crop2ml) if f.startswith('unit.') and f.endswith('.xml'))
+    functions = find_model_functions(path)
+
+    reports, pending = [], []
+    for model in models:
+        report = {"model": model, "cached": False}
+        reports.append(report)
+        file_path = os.path.join(crop2ml, model)
+        try:
+            unit = read_unit_tests(file_path)
+        except (OSError, ET.ParseError) as e:
+            report.update(success=False, error="Model file {} could not be read: {}".format(model, e))
+            continue
+
+        generated = functions.get((unit.name or '').lower())
+        if generated is None:
+            report.update(success=False, error="No generated Python code for model {}, transpile the package to py first".format(unit.name))
+            continue
+
+        key = _hash_files([file_path, generated[0]] + [os.path.join(crop2ml, a) for a in unit.algorithms])
+        tests = None if force else _read_cache(path, model, key)
+        if tests is not None:
+            report.update(cached=True, tests=tests)
+            continue
+
+        tests, runs = _plan(unit, *generated)
+        report["tests"] = tests
+        pending.append((report, unit, key, runs))
+
+    return reports, pending
+
+
+def test_arguments(pending):
+    """
+    Returns the run_test arguments of the pending tests, without the timeout
+    """
+    return [run[2] for _, _, _, model_runs in pending for run in model_runs]
+
+
+def complete_tests(path, reports, pending, outcomes):
+    """
+    Completes the reports with the run_test results of the pending tests, in
+    the order of test_arguments, and caches them
+
+    Returns:
+        List of dicts with the 'model', whether its results are 'cached',
+        its 'success', and its 'tests' results or an 'error'
+    """
+    outcomes = iter(outcomes)
+    for report, unit, key, model_runs in pending:
+        retry = False
+        for result, test, _ in model_runs:
+            run = next(outcomes)
+            retry = retry or run.get("retry", False)
+            _check(result, test, unit, run)
+        # The interrupted tests may pass on another run
+        if not retry:
+            _write_cache(path, report["model"], key, report["tests"])
+
+    for report in reports:
+        if "tests" in report:
+            report["success"] = all(test["success"] for test in report["tests"])
+    return reports
+
+
+def run_tests(path, models=None, force=False, timeout=DEFAULT_TIMEOUT):
+    """
+    Runs the tests of unit models of a package in the calling thread
+
+    Args:
+        path: The path of the package
+        models: The unit model files to test, all the unit models if None
+        force: Whether to run the tests of the models whose results are cached
+        timeout: The maximum duration of a test in seconds, see time_limit
+
+    Returns:
+        The reports of complete_tests
+    """
+    reports, pending = plan_tests(path, models, force)
+    outcomes = [run_test(*args, timeout) for args in test_arguments(pending)]
+    return complete_tests(path, reports, pending, outcomes)
@@ -0,0 +1,292 @@
+"""
+Transpilation of packages with pycropml
+
+The functions of this module are run in worker processes, so they only take
+and return picklable values and capture the output of the transpiler.
+
+The transpilation is incremental: the content hashes of the inputs of each
+successful run are recorded per target in the package state directory, with
+the size and modification time of the files it wrote to src/<target> and
+test/<target>, and a target whose inputs did not change since is not
+transpiled again, unless its output was deleted or changed.
+"""
+
+
+from contextlib import redirect_stderr, redirect_stdout
+import hashlib
+import io
+import json
+import os
+import traceback
+import xml.etree.ElementTree as ET
+
+from .clone import unshare_links
+from .dependencies import read_dependencies
+from .utils import STATE_DIRNAME
+
+
+# Map UI names to transpiler codes
+LANGUAGES = {
+    'Java': 'java',
+    'CSharp': 'cs',
+    'Fortran': 'f90',
+    'Python': 'py',
+    'R': 'r',
+    'Cpp': 'cpp'
+}
+
+PLATFORMS = {
+    'Simplace': 'simplace',
+    'Bioma': 'bioma',
+    'Dssat': 'dssat',
+    'OpenAlea': 'openalea',
+    'Record': 'record',
+    'Stics': 'stics',
+    'Apsim': 'apsim',
+    'Sirius': 'sirius'
+}
+
+
+def get_target_list(languages, platforms):
+    """
+    Returns the transpiler codes of the selected languages and platforms
+
+    Args:
+        languages: Dict of UI language names to booleans
+        platforms: Dict of UI platform names to booleans
+    """
+    # Combine languages and platforms into one list
+    target_list = []
+
+    # Add selected languages (check boolean values)
+    for lang_name, lang_code in LANGUAGES.items():
+        if languages.get(lang_name, False):
+            target_list.append(lang_code)
+
+    # Add selected platforms (check boolean values)
+    for platform_name, platform_code in PLATFORMS.items():
+        if platforms.get(platform_name, False):
+            target_list.append(platform_code)
+
+    return target_list
+
+
+def _hash_file(file_path):
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def input_hashes(path, component=False):
+    """
+    Returns the content hashes of the transpilation inputs of a package
+
+    The inputs of a Crop2ML package are the unit.*.xml and composition.*.xml
+    model files and the algo/pyx/*.pyx algorithm files of its crop2ml
+    directory, and the model and algorithm files of the other packages its
+    compositions use. The inputs of a platform component are all the package files
+    outside of the crop2ml directory, which is its output.
+
+    Args:
+        path: The path of the package
+        component: Whether the package is transpiled from a platform
+
+    Returns:
+        Dict of file paths relative to the package to their sha256
+    """
+    hashes = {}
+
+    if component:
+        for root, dirs, files in os.walk(path):
+            if root == path:
+                dirs[:] = [d for d in dirs if d not in ('crop2ml', STATE_DIRNAME)]
+            for file in files:
+                file_path = os.path.join(root, file)
+                hashes[os.path.relpath(file_path, path)] = _hash_file(file_path)
+        return hashes
+
+    crop2ml = os.path.join(path, 'crop2ml')
+    for directory, prefixes, extension in [(crop2ml, ('unit.', 'composition.'), '.xml'),
+                                           (os.path.join(crop2ml, 'algo', 'pyx'), ('',), '.pyx')]:
+        if not os.path.isdir(directory):
+            continue
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.startswith(prefixes) and entry.name.endswith(extension) and entry.is_file():
+                    hashes[os.path.relpath(entry.path, path)] = _hash_file(entry.path)
+
+    hashes.update(_external_hashes(path, [os.path.join(path, name) for name in hashes
+                                          if os.path.basename(name).startswith('composition.')]))
+    return hashes
+
+
+def _external_hashes(path, compositions):
+    """
+    Returns the content hashes of the models of other packages used by the
+    compositions, and of their algorithm files, recursively
+
+    The packages are looked up next to the package, as pycropml does. The
+    files which do not exist are recorded with a None hash.
+    """
+    hashes = {}
+    root = os.path.dirname(os.path.abspath(path))
+    package = os.path.basename(os.path.abspath(path))
+
+    queue = [(package, file_path) for file_path in compositions]
+    for current, file_path in queue:
+        try:
+            dependencies = read_dependencies(file_path, current)
+        except (OSError, ET.ParseError):
+            continue
+        for name, filename in dependencies:
+            if name == package:
+                continue
+            crop2ml = os.path.join(root, name, 'crop2ml')
+            model_path = os.path.join(crop2ml, filename)
+            key = os.path.relpath(model_path, path)
+            if key in hashes:
+                continue
+            if not os.path.isfile(model_path):
+                hashes[key] = None
+                continue
+            hashes[key] = _hash_file(model_path)
+
+            if filename.startswith('composition.'):
+                queue.append((name, model_path))
+                continue
+            try:
+                algorithms = ET.parse(model_path).getroot().iter('Algorithm')
+                filenames = [algorithm.get('filename') for algorithm in algorithms if algorithm.get('filename')]
+            except ET.ParseError:
+                continue
+            for algorithm in filenames:
+                algorithm_path = os.path.join(crop2ml, algorithm)
+                exists = os.path.isfile(algorithm_path)
+                hashes[os.path.relpath(algorithm_path, path)] = _hash_file(algorithm_path) if exists else None
+    return hashes
+
+
+def output_dir(path, target):
+    """
+    Returns the directory pycropml writes the code of a target to
+    """
+    return os.path.join(path, 'src', target)
+
+
+def generated_tests_dir(path, target):
+    """
+    Returns the directory pycropml writes the tests of a target to
+    """
+    return os.path.join(path, 'test', target)
+
+
+def output_manifest(path, target):
+    """
+    Returns the size and modification time of the generated code and tests
+    of a target, by path relative to the package, or None if there is no
+    generated code
+    """
+    if not os.path.isdir(output_dir(path, target)):
+        return None
+
+    manifest = {}
+    for directory in (output_dir(path, target), generated_tests_dir(path, target)):
+        for root, dirs, files in os.walk(directory):
+            for file in files:
+                file_path = os.path.join(root, file)
+                st = os.stat(file_path)
+                manifest[os.path.relpath(file_path, path)] = [st.st_size, st.st_mtime_ns]
+    return manifest
+
+
+def _state_file(path, target, component):
+
+    kind = 'component' if component else 'package'
+    return os.path.join(path, STATE_DIRNAME, 'transpile', f'{kind}.{target}.json')
+
+
+def is_up_to_date(path, target, hashes, component=False):
+    """
+    Returns whether the target was successfully transpiled from these inputs,
+    and for a package, whether its generated files are unchanged since
+
+    The components are all written back to the package Crop2ML tree, their
+    output is not checked. A target using a missing file of another package
+    is never up to date.
+    """
+    if None in hashes.values():
+        return False
+    try:
+        with open(_state_file(path, target, component), encoding='utf8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return False
+    if not isinstance(state, dict) or state.get('inputs') != hashes:
+        return False
+    return component or state.get('outputs') is not None and state['outputs'] == output_manifest(path, target)
+
+
+def record_state(path, target, hashes, component=False):
+    """
+    Records the inputs of a successful transpilation of the target, and for
+    a package, the manifest of its generated files
+    """
+    state_file = _state_file(path, target, component)
+    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+    state = {'inputs': hashes, 'outputs': None if component else output_manifest(path, target)}
+    with open(state_file, 'w', encoding='utf8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+
+
+def transpile(path, target, component=False, force=False):
+    """
+    Transpiles a package to one target and captures the transpiler output
+
+    The target is skipped if its inputs did not change since its last
+    successful transpilation, unless force is set.
+
+    Args:
+        path: The path of the package
+        target: The transpiler code of the target
+        component: Whether to transpile a platform component to Crop2ML
+                   instead of a Crop2ML package to a platform
+        force: Whether to transpile even if the inputs did not change
+
+    Returns:
+        Dict with 'target', 'success', 'skipped', 'logs' and 'error' if it failed
+    """
+    hashes = input_hashes(path, component)
+    if not force and is_up_to_date(path, target, hashes, component):
+        return {"target": target, "success": True, "skipped": True, "logs": ""}
+
+    from pycropml.cyml import transpile_package, transpile_component
+
+    # The generated files of a cloned package may be shared with its origin.
+    # pycropml also rewrites files of src shared by the targets, such as the
+    # pyx code, so the whole directory is unshared, the transpilations of a
+    # package running one at a time
+    if not component:
+        unshare_links(os.path.join(path, 'src'))
+
+    output = io.StringIO()
+    result = {"target": target, "success": True, "skipped": False}
+
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            if component:
+                transpile_component(path, path, target)
+            else:
+                transpile_package(path, target)
+        except Exception as e:
+            traceback.print_exc()
+            result["success"] = False
+            result["error"] = f"Error transpiling to {target}: {str(e)}"
+
+    if result["success"]:
+        record_state(path, target, hashes, component)
+
+    result["logs"] = output.getvalue()
+    return result
@@ -8,7 +8,13 @@ to the legacy format expected by writeunitXML and writecompositionXML
 
 import os
 
-from pycropml import pparse
+from .cache import package_cache
+from .records import Parameterset, Testset, Variable
+
+
+# Directory of the package files managed by cropmstudio (transpilation state, caches...)
+STATE_DIRNAME = '.cropmstudio'
+
 
 def adapt_header_data(json_data):
     """
@@ -37,48 +43,16 @@ def adapt_header_data(json_data):
 
 def adapt_inputs_outputs(json_data):
     """
-    Adapt inputs/outputs from JSON Schema format (array) to writeXML format (dict of arrays)
+    Adapt inputs/outputs from JSON Schema format (array) to writeXML format
 
     Args:
         json_data: Dict with 'Inputs', 'Functions', 'init' from inputs-outputs-form.json
 
     Returns:
-        Dict with 'Inputs' (as dict of arrays), 'Functions', 'init'
+        Dict with 'Inputs' (as a list of Variable), 'Functions', 'init'
     """
-    inputs_list = json_data.get('Inputs', [])
-
-    # Convert array of objects to dict of arrays (column-oriented)
-    df_dict = {
-        'Name': [],
-        'Type': [],
-        'Description': [],
-        'InputType': [],
-        'Category': [],
-        'DataType': [],
-        'Len': [],
-        'Default': [],
-        'Min': [],
-        'Max': [],
-        'Unit': [],
-        'Uri': []
-    }
-
-    for item in inputs_list:
-        df_dict['Name'].append(item.get('Name', ''))
-        df_dict['Type'].append(item.get('Type', ''))
-        df_dict['Description'].append(item.get('Description', ''))
-        df_dict['InputType'].append(item.get('InputType', ''))
-        df_dict['Category'].append(item.get('Category', ''))
-        df_dict['DataType'].append(item.get('DataType', ''))
-        df_dict['Len'].append(item.get('Len', ''))
-        df_dict['Default'].append(item.get('Default', ''))
-        df_dict['Min'].append(item.get('Min', ''))
-        df_dict['Max'].append(item.get('Max', ''))
-        df_dict['Unit'].append(item.get('Unit', ''))
-        df_dict['Uri'].append(item.get('Uri', ''))
-
     return {
-        'Inputs': df_dict,
+        'Inputs': [Variable.from_json(item) for item in json_data.get('Inputs', [])],
         'Functions': json_data.get('Functions', []),
         'init': json_data.get('init', False)
     }
@@ -92,18 +66,15 @@ def adapt_parametersets(json_data):
         json_data: Dict with 'parametersets' array from parametersets-form.json
 
     Returns:
-        Dict in format: {name: [{param: value}, description]}
+        Dict in format: {name: Parameterset}
     """
     if not json_data or 'parametersets' not in json_data:
         return {}
 
     result = {}
-    for pset in json_data.get('parametersets', []):
-        name = pset.get('name', '')
-        description = pset.get('description', '')
-        parameters = pset.get('parameters', {})
-
-        result[name] = [parameters, description]
+    for item in json_data.get('parametersets', []):
+        pset = Parameterset.from_json(item)
+        result[pset.name] = pset
 
     return result
 
@@ -116,37 +87,15 @@ def adapt_testsets(json_data):
         json_data: Dict with 'testsets' array from testsets-form.json
 
     Returns:
-        Dict in format: {testset_name: [{test_name: {inputs: {}, outputs: {}}}, description, parameterset]}
+        Dict in format: {testset_name: Testset}
     """
     if not json_data or 'testsets' not in json_data:
         return {}
 
     result = {}
-    for tset in json_data.get('testsets', []):
-        testset_name = tset.get('name', '')
-        description = tset.get('description', '')
-        parameterset = tset.get('parameterset', '')
-        tests = tset.get('tests', [])
-
-        tests_dict = {}
-        for test in tests:
-            test_name = test.get('name', '')
-            inputs = test.get('inputs', {})
-            outputs_raw = test.get('outputs', {})
-
-            # Convert outputs format: {name: {value, precision}} -> {name: [value, precision]}
-            outputs = {}
-            for var_name, var_data in outputs_raw.items():
-                value = var_data.get('value', '')
-                precision = var_data.get('precision', '')
-                outputs[var_name] = [value, precision]
-
-            tests_dict[test_name] = {
-                'inputs': inputs,
-                'outputs': outputs
-            }
-
-        result[testset_name] = [tests_dict, description, parameterset]
+    for item in json_data.get('testsets', []):
+        tset = Testset.from_json(item)
+        result[tset.name] = tset
 
     return result
 
@@ -251,8 +200,34 @@ def get_models(path: str) -> list[str]:
 def parse_xml(path: str, modelName: str):
     """
     Parses the xml file and calls _buildEdit method to order collected datas
+
+    The package is parsed through the package cache, so only the xml files
+    changed since the previous call are parsed again.
     """
-    parsing = pparse.model_parser(path)
+    parsing = package_cache.get_models(path)
+
+    for j in parsing:
+        if j.name == modelName:
+            return j
+
+
+
+def parse_model_file(path: str, model: str):
+    """
+    Parses a single model xml file of a package, without parsing the others
+
+    Args:
+        path: The path of the package
+        model: The xml file name in the crop2ml directory (e.g. unit.X.xml)
+
+    Returns:
+        The model object, as returned by parse_xml, or None if not found
+    """
+    if not os.path.isfile(os.path.join(path, 'crop2ml', model)):
+        return None
+
+    modelName = model.split('.')[1]
+    parsing = package_cache.get_file_models(path, model)
 
     for j in parsing:
         if j.name == modelName:
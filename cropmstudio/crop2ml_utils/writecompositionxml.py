@@ -1,5 +1,8 @@
 import os
 
+from .xmlwriter import atomic_write, attributes, escape_attribute, escape_text, tag
+
+
 class writecompositionXML():
     """
     Class managing the writing of a composition model xml file with all gathered data with pycrop2ml' user interface.
@@ -43,32 +46,49 @@ class writecompositionXML():
 
 
 
-    def write(self):
+    def _serialize(self, f):
         """
-        Writes the xml file with the new data set
+        Writes the xml document of the composition to the file f
         """
 
         split = self._datas['Path'].split(os.path.sep)
-        buffer = ''
-
-        buffer += '<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE ModelComposition PUBLIC " " "https://raw.githubusercontent.com/AgriculturalModelExchangeInitiative/crop2ml/master/ModelComposition.dtd">\n'
-        buffer += '<ModelComposition name="{0}" id="{1}.{0}" version="{2}" timestep ="{3}">'.format(self._datas['Model name'], self._datas['Model ID'], self._datas['Version'], self._datas['Timestep'])
-        buffer += '\n\t<Description>\n\t\t<Title>{}</Title>\n\t\t<Authors>{}</Authors>\n\t\t<Institution>{}</Institution>\n\t\t<Reference>{}</Reference>\n\t\t<ExtendedDescription>{}</ExtendedDescription>'.format(self._datas['Title'], self._datas['Authors'], self._datas['Institution'], self._datas['Reference'], self._datas['ExtendedDescription'])
-        buffer += '\n\t</Description>\n\n\t<Composition>'
+        name = self._datas['Model name']
+
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE ModelComposition PUBLIC " " "https://raw.githubusercontent.com/AgriculturalModelExchangeInitiative/crop2ml/master/ModelComposition.dtd">\n')
+        f.write('<ModelComposition {} timestep ="{}">'.format(attributes([('name', name),
+                                                                         ('id', '{}.{}'.format(self._datas['Model ID'], name)),
+                                                                         ('version', self._datas['Version'])]),
+                                                             escape_attribute(self._datas['Timestep'])))
+        f.write('\n\t<Description>')
+        for field in ('Title', 'Authors', 'Institution', 'Reference', 'ExtendedDescription'):
+            f.write('\n\t\t<{0}>{1}</{0}>'.format(field, escape_text(self._datas[field])))
+        f.write('\n\t</Description>\n\n\t<Composition>')
 
         for i in self._listmodel:
-            buffer += '\n\t\t<Model name="{0}" id="{1}.{0}" filename="{2}" {3}/>'.format(i.split('.')[1], i.split(':')[0] if ':' in i else split[-2], i.split(':')[-1], ('package_name="{}" '.format(i.split(':')[0]) if ':' in i else ''))
+            pairs = [('name', i.split('.')[1]),
+                     ('id', '{}.{}'.format(i.split(':')[0] if ':' in i else split[-2], i.split('.')[1])),
+                     ('filename', i.split(':')[-1])]
+            if ':' in i:
+                pairs.append(('package_name', i.split(':')[0]))
+            f.write('\n\t\t' + tag('Model', pairs, ' />'))
+
+        f.write("\n\n\t\t<Links>")
 
-        buffer += "\n\n\t\t<Links>"
-        
         for j in self._listlink:
-            buffer += '\n\t\t\t<{} target="{}" source="{}" />'.format(j['Link type'], j['Target'], j['Source'])
-                    
-        buffer += '\n\t\t</Links>\n\t</Composition>\n</ModelComposition>'
+            f.write('\n\t\t\t' + tag(j['Link type'], [('target', j['Target']), ('source', j['Source'])], ' />'))
+
+        f.write('\n\t\t</Links>\n\t</Composition>\n</ModelComposition>')
+
+
+
+    def write(self):
+        """
+        Writes the xml file with the new data set
+        """
 
         try:
-            with open('{}{}{}.{}.xml'.format(self._datas['Path'], os.path.sep, self._datas['Model type'], self._datas['Model name']), "w", encoding='utf8') as f:
-                f.write(buffer)
+            with atomic_write('{}{}{}.{}.xml'.format(self._datas['Path'], os.path.sep, self._datas['Model type'], self._datas['Model name'])) as f:
+                self._serialize(f)
         except IOError as ioerr:
             raise Exception('File {} could not be opened in write mode. {}'.format(self._datas['Path'], ioerr))
 
@@ -1,9 +1,10 @@
 import os
 
-from IPython.display import display
+from .utils import parse_model_file
+from .xmlwriter import atomic_write, escape_text, tag, text_element
 
-from pycropml.pparse import model_parser
-from pycropml.transpiler.generators import docGenerator
+
+ARRAY_TYPES = ['STRINGARRAY', 'DATARRAY', 'INTARRAY', 'DOUBLEARRAY']
 
 
 class writeunitXML():
@@ -26,24 +27,14 @@ class writeunitXML():
                     'Old name':'' IF iscreate=False
                    }
 
-        - df : {'Inputs' : pandas.DataFrame,
-                'Algorithms' : [],
-                'Functions' : dict(),
-                'Outputs' : pandas.DataFrame -> only if iscreate is False
+        - df : {'Inputs' : [Variable],
+                'Functions' : [{'file': '', 'type': ''}],
+                'init' : bool
                }
 
-        - paramsetdict : {paramset_name : [
-                                          {param : value},
-                                          description
-                                          ]
-                         }
+        - paramsetdict : {paramset_name : Parameterset}
 
-        - testsetdict : {name : [
-                                {testname : type(vardict)},
-                                parameterset,
-                                description
-                                ]
-                        }
+        - testsetdict : {name : Testset}
 
         - iscreate : bool
     """
@@ -59,8 +50,9 @@ class writeunitXML():
         self._change_algo = True
         self._change_init = False
         self.local = local
-        if "unit.modelunit.xml" in os.listdir(self._datas['Path']) : os.remove(os.path.join(self._datas['Path'],"unit.modelunit.xml"))
-        if "composition.modelcomposite.xml" in os.listdir(self._datas['Path']) : os.remove(os.path.join(self._datas['Path'],"composition.modelcomposite.xml"))
+        for filename in ("unit.modelunit.xml", "composition.modelcomposite.xml"):
+            if os.path.exists(os.path.join(self._datas['Path'], filename)):
+                os.remove(os.path.join(self._datas['Path'], filename))
 
 
     def _getDoc(self, f):
@@ -68,24 +60,18 @@ class writeunitXML():
         Returns the documentation of the current's model xml file
         """
 
-        parse = os.path.split(self._datas['Path'])[0]
-        print(f"parse {parse}")
-        parsing = model_parser(parse)
-        print(f"parsing {parsing}")
-        index = None
+        from pycropml.transpiler.generators import docGenerator
 
-        for j in range(0, len(parsing)):
-            if parsing[j].name == self._datas['Model name']:
-                index = j
-                break
+        parse = os.path.split(self._datas['Path'])[0]
+        model = parse_model_file(parse, 'unit.{}.xml'.format(self._datas['Model name']))
 
-        if index is None:
+        if model is None:
             f.close()
             # with self._out:
             #     raise Exception('Critical error : model not found.')
             raise Exception('Critical error : model not found.')
 
-        return docGenerator.DocGenerator(parsing[index])
+        return docGenerator.DocGenerator(model)
 
 
 
@@ -137,107 +123,163 @@ class writeunitXML():
 
 
 
-    def _write(self):
+
+    def _serialize(self, f):
         """
-        Saves all gathered datas in an xml format
+        Writes the xml document of the gathered datas to the file f
         """
 
-        try:
-            if self._change_algo:
-                open("{0}{2}algo{2}pyx{2}{1}.pyx".format(self._datas['Path'], self._datas['Model name'].lower(), os.path.sep), 'w', encoding='utf8').close()
-            if self._change_init or ('init' in dir(self._df) and self._df["init"]):
-                open("{0}{2}algo{2}pyx{2}init.{1}.pyx".format(self._datas['Path'], self._datas['Model name'].lower(), os.path.sep), 'w', encoding='utf8').close()
-        except IOError as ioerr:
-            # with self._out:
-            #     raise Exception(ioerr)
-            raise Exception(ioerr)
+        name = self._datas['Model name']
+        variables = self._df['Inputs']
+
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE Model PUBLIC " " "https://raw.githubusercontent.com/AgriculturalModelExchangeInitiative/crop2ml/master/ModelUnit.dtd">\n')
+        f.write(tag('ModelUnit', [('modelid', '{}.{}'.format(self._datas['Model ID'], name)),
+                                  ('name', name),
+                                  ('timestep', self._datas['Timestep']),
+                                  ('version', self._datas['Timestep'])], '>'))
+        f.write('\n\t<Description>')
+        for field in ('Title', 'Authors', 'Institution', 'Reference', 'ExtendedDescription'):
+            f.write('\n\t\t<{0}>{1}</{0}>'.format(field, escape_text(self._datas[field])))
+        f.write('\n\t</Description>')
+        f.write('\n\n\t<Inputs>')
+
+        for var in variables:
+            if any([not self._iscreate,
+                    self._iscreate and var.type == 'input',
+                    self._iscreate and var.type == 'input & output']):
+
+                category = 'variablecategory' if var.inputtype == 'variable' else 'parametercategory'
+                pairs = [('name', var.name),
+                         ('description', var.description),
+                         ('inputtype', var.inputtype),
+                         (category, var.category),
+                         ('datatype', var.datatype)]
+                if var.datatype in ARRAY_TYPES:
+                    pairs.append(('len', var.len))
+                pairs += [('default', var.default),
+                          ('min', var.min),
+                          ('max', var.max),
+                          ('unit', var.unit),
+                          ('uri', var.uri)]
+                f.write('\n\t\t' + tag('Input', pairs))
+
+        f.write('\n\t</Inputs>\n\n\t<Outputs>')
 
+        # Always use the same logic: outputs are in Inputs with Type='output' or 'input & output'
+        for var in variables:
+            if var.type in ('output', 'input & output'):
+
+                pairs = [('name', var.name),
+                         ('description', var.description),
+                         ('variablecategory', var.category),
+                         ('datatype', var.datatype)]
+                if var.datatype in ARRAY_TYPES:
+                    pairs.append(('len', var.len))
+                pairs += [('min', var.min),
+                          ('max', var.max),
+                          ('unit', var.unit),
+                          ('uri', var.uri)]
+                f.write('\n\t\t' + tag('Output', pairs))
+
+        f.write('\n\t</Outputs>\n')
 
-        #split = self._datas['Path'].split(os.path.sep)
-        buffer = ''
+        if self._df['Functions']:
+            for func in self._df['Functions']:
+                file = func['file']
+                # Extract name without extension and path
+                function_name = file.split('.')[0].split('/')[-1]
+                f.write('\n\t' + tag('Function', [('name', function_name),
+                                                   ('language', 'Cyml'),
+                                                   ('filename', 'algo/pyx/{}'.format(file)),
+                                                   ('type', func['type']),
+                                                   ('description', '')], ' />'))
 
-        buffer += '<?xml version="1.0" encoding="UTF-8"?>\n<!DOCTYPE Model PUBLIC " " "https://raw.githubusercontent.com/AgriculturalModelExchangeInitiative/crop2ml/master/ModelUnit.dtd">\n'
-        buffer += '<ModelUnit modelid="{0}.{1}" name="{1}" timestep="{2}" version="{2}">'.format(self._datas['Model ID'],self._datas['Model name'],self._datas['Timestep'], self._datas['Version'])
-        buffer += '\n\t<Description>\n\t\t<Title>{}</Title>'.format(self._datas['Title'])
-        buffer += '\n\t\t<Authors>{}</Authors>'.format(self._datas['Authors'])
-        buffer += '\n\t\t<Institution>{}</Institution>'.format(self._datas['Institution'])
-        buffer += '\n\t\t<Reference>{}</Reference>'.format(self._datas['Reference'])
-        buffer += '\n\t\t<ExtendedDescription>{}</ExtendedDescription>'.format(self._datas['ExtendedDescription'])+'\n\t</Description>'
-        buffer += '\n\n\t<Inputs>'
+        f.write('\n\n\t' + tag('Algorithm', [('language', 'Cyml'),
+                                                ('platform', ''),
+                                                ('filename', 'algo/pyx/{}.pyx'.format(name.lower()))], ' />'))
 
-        for i in range(0,len(self._df['Inputs']['Name'])):
-            if any([not self._iscreate,
-                    self._iscreate and self._df['Inputs']['Type'][i] == 'input',
-                    self._iscreate and self._df['Inputs']['Type'][i] == 'input & output']):
+        if ('init' in dir(self._df) and self._df['init']) or (self._change_init):
+            f.write('\n\n\t' + tag('Initialization', [('name', 'init.{}'.format(name.lower())),
+                                                         ('language', 'Cyml'),
+                                                         ('filename', 'algo/pyx/init.{}.pyx'.format(name.lower())),
+                                                         ('description', '')], ' />'))
+        f.write('\n\n\t<Parametersets>')
 
-                if self._df['Inputs']['InputType'][i] == 'variable':
-                    if self._df['Inputs']['DataType'][i] in ['STRINGARRAY','DATARRAY','INTARRAY','DOUBLEARRAY']:
-                        buffer += '\n\t\t<Input name="{}" description="{}" inputtype="{}" variablecategory="{}" datatype="{}" len="{}" default="{}" min="{}" max="{}" unit="{}" uri="{}"/>'.format(self._df['Inputs']['Name'][i],self._df['Inputs']['Description'][i],self._df['Inputs']['InputType'][i],self._df['Inputs']['Category'][i],self._df['Inputs']['DataType'][i],self._df['Inputs']['Len'][i],self._df['Inputs']['Default'][i],self._df['Inputs']['Min'][i],self._df['Inputs']['Max'][i],self._df['Inputs']['Unit'][i],self._df['Inputs']['Uri'][i])
-                    else:
-                        buffer += '\n\t\t<Input name="{}" description="{}" inputtype="{}" variablecategory="{}" datatype="{}" default="{}" min="{}" max="{}" unit="{}" uri="{}"/>'.format(self._df['Inputs']['Name'][i],self._df['Inputs']['Description'][i],self._df['Inputs']['InputType'][i],self._df['Inputs']['Category'][i],self._df['Inputs']['DataType'][i],self._df['Inputs']['Default'][i],self._df['Inputs']['Min'][i],self._df['Inputs']['Max'][i],self._df['Inputs']['Unit'][i],self._df['Inputs']['Uri'][i])
+        for paramset, pset in self._paramsetdict.items():
+            f.write('\n\t\t' + tag('Parameterset', [('name', paramset), ('description', pset.description)], ' >'))
 
-                else:
-                    if self._df['Inputs']['DataType'][i] in ['STRINGARRAY','DATARRAY','INTARRAY','DOUBLEARRAY']:
-                        buffer += '\n\t\t<Input name="{}" description="{}" inputtype="{}" parametercategory="{}" datatype="{}" len="{}" default="{}" min="{}" max="{}" unit="{}" uri="{}"/>'.format(self._df['Inputs']['Name'][i],self._df['Inputs']['Description'][i],self._df['Inputs']['InputType'][i],self._df['Inputs']['Category'][i],self._df['Inputs']['DataType'][i],self._df['Inputs']['Len'][i],self._df['Inputs']['Default'][i],self._df['Inputs']['Min'][i],self._df['Inputs']['Max'][i],self._df['Inputs']['Unit'][i],self._df['Inputs']['Uri'][i])
-                    else:
-                        buffer += '\n\t\t<Input name="{}" description="{}" inputtype="{}" parametercategory="{}" datatype="{}" default="{}" min="{}" max="{}" unit="{}" uri="{}"/>'.format(self._df['Inputs']['Name'][i],self._df['Inputs']['Description'][i],self._df['Inputs']['InputType'][i],self._df['Inputs']['Category'][i],self._df['Inputs']['DataType'][i],self._df['Inputs']['Default'][i],self._df['Inputs']['Min'][i],self._df['Inputs']['Max'][i],self._df['Inputs']['Unit'][i],self._df['Inputs']['Uri'][i])
+            for k, v in pset.params.items():
+                f.write('\n\t\t\t' + text_element('Param', [('name', k)], v))
 
-        buffer += '\n\t</Inputs>\n\n\t<Outputs>'
+            f.write('\n\t\t</Parameterset>')
+        f.write('\n\t</Parametersets>\n\n\t<Testsets>')
 
-        # Always use the same logic: outputs are in Inputs with Type='output' or 'input & output'
-        for i in range(0,len(self._df['Inputs']['Name'])):
-            if any([self._df['Inputs']['Type'][i] == 'output',
-                    self._df['Inputs']['Type'][i] == 'input & output']):
+        for testsetname, tset in self._testsetdict.items():
+            f.write('\n\n\t\t' + tag('Testset', [('name', testsetname), ('parameterset', tset.parameterset), ('description', tset.description)], ' >'))
 
-                if self._df['Inputs']['DataType'][i] in ['STRINGARRAY','DATARRAY','INTARRAY','DOUBLEARRAY']:
-                    buffer += '\n\t\t<Output name="{}" description="{}" variablecategory="{}" datatype="{}" len="{}" min="{}" max="{}" unit="{}" uri="{}"/>'.format(self._df['Inputs']['Name'][i],self._df['Inputs']['Description'][i],self._df['Inputs']['Category'][i],self._df['Inputs']['DataType'][i],self._df['Inputs']['Len'][i],self._df['Inputs']['Min'][i],self._df['Inputs']['Max'][i],self._df['Inputs']['Unit'][i],self._df['Inputs']['Uri'][i])
-                else:
-                    buffer += '\n\t\t<Output name="{}" description="{}" variablecategory="{}" datatype="{}" min="{}" max="{}" unit="{}" uri="{}"/>'.format(self._df['Inputs']['Name'][i],self._df['Inputs']['Description'][i],self._df['Inputs']['Category'][i],self._df['Inputs']['DataType'][i],self._df['Inputs']['Min'][i],self._df['Inputs']['Max'][i],self._df['Inputs']['Unit'][i],self._df['Inputs']['Uri'][i])
+            for test in tset.tests:
+                f.write('\n\t\t\t' + tag('Test', [('name', test.name)], ' >'))
 
-        buffer += '\n\t</Outputs>\n'
+                for k, v in test.inputs.items():
+                    f.write('\n\t\t\t\t' + text_element('InputValue', [('name', k)], v))
 
-        if self._df['Functions']:
-            for func in self._df['Functions']:
-                file = func['file']
-                func_type = func['type']
-                # Extract name without extension and path
-                name = file.split('.')[0].split('/')[-1]
-                buffer += '\n\t<Function name="{}" language="Cyml" filename="algo/pyx/{}" type="{}" description="" />'.format(name, file, func_type)
+                for k, (value, precision) in test.outputs.items():
+                    f.write('\n\t\t\t\t' + text_element('OutputValue', [('name', k), ('precision', precision)], value))
 
-        buffer += '\n\n\t<Algorithm language="Cyml" platform="" filename="algo/pyx/{}.pyx" />'.format(self._datas['Model name'].lower())
+                f.write('\n\t\t\t</Test>')
+            f.write('\n\t\t</Testset>')
+        f.write('\n\n\t</Testsets>\n\n</ModelUnit>')
 
-        if ('init' in dir(self._df) and self._df['init']) or (self._change_init):
-            buffer += '\n\n\t<Initialization name="init.{0}" language="Cyml" filename="algo/pyx/init.{0}.pyx" description="" />'.format(self._datas['Model name'].lower())
-        buffer += '\n\n\t<Parametersets>'
 
-        for name, args in self._paramsetdict.items():
-            buffer += '\n\t\t<Parameterset name="{}" description="{}" >'.format(name, args[1])
 
-            for k,v in args[0].items():
-                buffer += '\n\t\t\t<Param name="{}">{}</Param>'.format(k, v)
+    def _is_rename(self):
+        """
+        Returns whether the model is edited under a new name
+        """
+
+        return not self._iscreate and bool(self._datas.get('Old name')) and self._datas['Model name'] != self._datas['Old name']
+
+
 
-            buffer += '\n\t\t</Parameterset>'
-        buffer += '\n\t</Parametersets>\n\n\t<Testsets>'
+    def _touch(self, path):
+        """
+        Creates an empty file if it does not exist
+        """
 
-        for testsetname, args in self._testsetdict.items():
-            buffer += '\n\n\t\t<Testset name="{}" parameterset="{}" description="{}" >'.format(testsetname, args[2], args[1])
+        try:
+            open(path, 'x', encoding='utf8').close()
+        except FileExistsError:
+            pass
 
-            for testname, data in args[0].items():
-                buffer += '\n\t\t\t<Test name="{}" >'.format(testname)
 
-                for k,v in data['inputs'].items():
-                    buffer += '\n\t\t\t\t<InputValue name="{}">{}</InputValue>'.format(k,v)
 
-                for k,v in data['outputs'].items():
-                    buffer += '\n\t\t\t\t<OutputValue name="{}" precision="{}">{}</OutputValue>'.format(k,v[1],v[0])
+    def _write(self):
+        """
+        Saves all gathered datas in an xml format
+        """
+
+        # The algorithm files are only created when missing, the existing
+        # ones keep the algorithm code, and follow the model when renamed
+        try:
+            if self._is_rename():
+                for prefix in ('', 'init.'):
+                    old_pyx = '{0}{1}algo{1}pyx{1}{2}{3}.pyx'.format(self._datas['Path'], os.path.sep, prefix, self._datas['Old name'].lower())
+                    new_pyx = '{0}{1}algo{1}pyx{1}{2}{3}.pyx'.format(self._datas['Path'], os.path.sep, prefix, self._datas['Model name'].lower())
+                    if os.path.exists(old_pyx) and not os.path.exists(new_pyx):
+                        os.rename(old_pyx, new_pyx)
+            if self._change_algo:
+                self._touch("{0}{2}algo{2}pyx{2}{1}.pyx".format(self._datas['Path'], self._datas['Model name'].lower(), os.path.sep))
+            if self._change_init or ('init' in dir(self._df) and self._df["init"]):
+                self._touch("{0}{2}algo{2}pyx{2}init.{1}.pyx".format(self._datas['Path'], self._datas['Model name'].lower(), os.path.sep))
+        except IOError as ioerr:
+            # with self._out:
+            #     raise Exception(ioerr)
+            raise Exception(ioerr)
 
-                buffer += '\n\t\t\t</Test>'
-            buffer += '\n\t\t</Testset>'
-        buffer += '\n\n\t</Testsets>\n\n</ModelUnit>'
 
         try:
-            with open("{}/unit.{}.xml".format(self._datas['Path'], self._datas['Model name']), 'w', encoding='utf8') as f:
-                f.write(buffer)
+            with atomic_write("{}/unit.{}.xml".format(self._datas['Path'], self._datas['Model name'])) as f:
+                self._serialize(f)
         except IOError as ioerr:
             # with self._out:
             #     raise Exception('File unit.{}.xml could not be opened. {}'.format(self._datas['Model name'], ioerr))
@@ -250,7 +292,7 @@ class writeunitXML():
         # if self._change_algo:
         #     self._createAlgo()
 
-        if not self._iscreate and 'Old name' in self._datas and self._datas['Model name'] != self._datas['Old name']:
+        if self._is_rename():
             try:
                 old_xml = '{0}{1}unit.{2}.xml'.format(self._datas['Path'], os.path.sep, self._datas['Old name'])
                 old_pyx = '{0}{1}algo{1}pyx{1}{2}.pyx'.format(self._datas['Path'], os.path.sep, self._datas['Old name'].lower())
@@ -259,7 +301,8 @@ class writeunitXML():
                     os.remove(old_xml)
                     print(f"Removed old XML file: {old_xml}")
 
-                if os.path.exists(old_pyx):
+                # A change of case only keeps the same algorithm file
+                if os.path.exists(old_pyx) and self._datas['Old name'].lower() != self._datas['Model name'].lower():
                     os.remove(old_pyx)
                     print(f"Removed old PYX file: {old_pyx}")
             except Exception as e:
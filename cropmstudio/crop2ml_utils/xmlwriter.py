@@ -0,0 +1,109 @@
+"""
+XML serialization helpers
+
+The model xml files are written incrementally to a temporary file next to
+the target, which replaces the target once the document is complete, so a
+failed write never leaves a truncated model file behind. A target whose
+content did not change is not replaced, so its modification time and the
+caches depending on it stay valid.
+"""
+
+
+from contextlib import contextmanager
+import hashlib
+import os
+import uuid
+from xml.sax.saxutils import escape
+
+
+_ATTRIBUTE_ENTITIES = {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'}
+
+
+def escape_text(value):
+    """
+    Returns the value as xml character data
+    """
+    return escape(str(value))
+
+
+def escape_attribute(value):
+    """
+    Returns the value as the content of a double quoted xml attribute
+    """
+    return escape(str(value), _ATTRIBUTE_ENTITIES)
+
+
+def attributes(pairs):
+    """
+    Returns the name="value" list of the (name, value) pairs
+    """
+    return ' '.join('{}="{}"'.format(name, escape_attribute(value)) for name, value in pairs)
+
+
+def tag(name, pairs, end='/>'):
+    """
+    Returns an element tag with its attributes
+
+    Args:
+        name: The element name
+        pairs: The (name, value) attribute pairs
+        end: What closes the tag ('>' for a start tag, '/>' for an empty element)
+    """
+    return '<{} {}{}'.format(name, attributes(pairs), end)
+
+
+def text_element(name, pairs, text):
+    """
+    Returns an element with its attributes and character data
+    """
+    return '{}{}</{}>'.format(tag(name, pairs, '>'), escape_text(text), name)
+
+
+def _hash_file(path):
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def same_content(path, other):
+    """
+    Returns whether two files exist and have the same content
+    """
+    try:
+        if os.path.getsize(path) != os.path.getsize(other):
+            return False
+        return _hash_file(path) == _hash_file(other)
+    except OSError:
+        return False
+
+
+@contextmanager
+def atomic_write(path, encoding='utf8'):
+    """
+    Opens a temporary text file which replaces path once the block succeeds
+
+    The target is only replaced if the content written differs from its
+    current one. The temporary file is removed if the block raises, and the
+    target is left untouched.
+    """
+    directory, filename = os.path.split(path)
+    tmp = os.path.join(directory, '.{}.{}.tmp'.format(filename, uuid.uuid4().hex[:8]))
+
+    # os.open applies the umask, like the open of the target would
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with open(fd, 'w', encoding=encoding) as f:
+            yield f
+        if same_content(tmp, path):
+            os.remove(tmp)
+        else:
+            os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,202 @@
+"""
+Blocking work executor
+
+The handlers run their blocking work (transpilation, package rendering, ZIP
+building, workflow rendering...) in a bounded thread pool, so that the Jupyter
+server event loop keeps serving the other requests meanwhile.
+
+CPU bound work which is not thread safe, such as the transpilation, runs in a
+bounded process pool instead.
+
+The generated model code, run by the tests and the sweeps, runs in a pool of
+its own, so a model which crashes or hangs does not affect the
+transpilations. The model pool is shut down, and its workers killed, when one
+of its calls times out or a worker dies, and a new one is created on the next
+call. A pool found broken is also replaced.
+"""
+
+
+import asyncio
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+import functools
+import multiprocessing
+import os
+import threading
+import weakref
+
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_PROCESSES = min(4, os.cpu_count() or 1)
+
+_max_workers = DEFAULT_MAX_WORKERS
+_max_processes = DEFAULT_MAX_PROCESSES
+_executor = None
+_process_executor = None
+_model_executor = None
+_model_slots = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def configure(max_workers=DEFAULT_MAX_WORKERS, max_processes=DEFAULT_MAX_PROCESSES):
+    """
+    Sets the size of the executors, replacing the current ones if any
+
+    Args:
+        max_workers: The maximum number of concurrent blocking calls
+        max_processes: The maximum number of worker processes
+    """
+    global _executor, _max_workers, _process_executor, _model_executor, _max_processes
+
+    with _lock:
+        _max_workers = max_workers
+        _max_processes = max_processes
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+        if _process_executor is not None:
+            _process_executor.shutdown(wait=False)
+            _process_executor = None
+        if _model_executor is not None:
+            _model_executor.shutdown(wait=False)
+            _model_executor = None
+        _model_slots.clear()
+
+
+def get_executor():
+    """
+    Returns the shared executor, creating it on first use
+    """
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix="cropmstudio")
+        return _executor
+
+
+def get_max_processes():
+    """
+    Returns the number of worker processes
+    """
+    return _max_processes
+
+
+def get_process_executor():
+    """
+    Returns the shared process pool, creating it on first use
+
+    The workers are spawned rather than forked, as forking the multithreaded
+    server process is not safe.
+    """
+    global _process_executor
+
+    with _lock:
+        if _process_executor is None or _is_broken(_process_executor):
+            _process_executor = _new_process_pool()
+        return _process_executor
+
+
+def get_model_executor():
+    """
+    Returns the process pool of the generated model code, creating it on
+    first use or after a failure
+    """
+    global _model_executor
+
+    with _lock:
+        if _model_executor is None or _is_broken(_model_executor):
+            _model_executor = _new_process_pool()
+        return _model_executor
+
+
+def reset_model_executor(executor):
+    """
+    Shuts a model pool down and kills its workers, the next call creating a
+    new pool
+    """
+    global _model_executor
+
+    with _lock:
+        if _model_executor is executor:
+            _model_executor = None
+    _kill(executor)
+
+
+def _new_process_pool():
+
+    return ProcessPoolExecutor(max_workers=_max_processes, mp_context=multiprocessing.get_context("spawn"))
+
+
+def _is_broken(executor):
+
+    return getattr(executor, '_broken', False)
+
+
+def _kill(executor):
+    """
+    Shuts a process pool down without waiting for its running calls
+    """
+    if hasattr(executor, 'terminate_workers'):  # Python 3.14
+        executor.terminate_workers()
+        return
+    processes = list((getattr(executor, '_processes', None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Runs a blocking function in the executor and returns its result
+
+    Args:
+        func: The function to call
+        args, kwargs: The function arguments
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+async def run_in_process(func, *args):
+    """
+    Runs a function in a worker process and returns its result
+
+    Args:
+        func: A module level function, its arguments and result must be picklable
+        args: The function arguments
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_executor(), func, *args)
+
+
+async def run_model_code(func, *args, timeout=None):
+    """
+    Runs a function calling generated model code in the model pool and
+    returns its result
+
+    At most one call per worker is submitted at a time, so the timeout only
+    counts the time the call runs. A call which times out or whose worker
+    dies replaces the pool, failing the other calls running in it.
+
+    Args:
+        func: A module level function, its arguments and result must be picklable
+        args: The function arguments
+        timeout: The maximum duration of the call in seconds, or None
+
+    Raises:
+        asyncio.TimeoutError: The call did not complete within the timeout
+        BrokenExecutor: The worker process died
+    """
+    loop = asyncio.get_running_loop()
+    slots = _model_slots.get(loop)
+    if slots is None:
+        slots = _model_slots[loop] = asyncio.Semaphore(_max_processes)
+
+    async with slots:
+        executor = get_model_executor()
+        try:
+            future = executor.submit(func, *args)
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except (asyncio.TimeoutError, BrokenExecutor):
+            reset_model_executor(executor)
+            raise
@@ -1,9 +1,14 @@
-from .create_model import CreateModelHandler
-from .create_package import CreatePackageHandler
+from .create_model import CreateModelHandler, CreateModelsHandler
+from .create_package import ClonePackageHandler, CreatePackageHandler, UpdatePackageTemplateHandler
 from .display_model import DisplayModelHandler
 from .download_package import DownloadPackageHandler
+from .get_dependencies import GetDependenciesHandler
 from .get_models import GetModels
-from .get_model_data import GetModelHeader, GetModelUnitInputsOutputs, GetModelUnitParametersets, GetModelUnitTestsets
+from .get_model_data import GetModelFull, GetModelHeader, GetModelUnitInputsOutputs, GetModelUnitParametersets, GetModelUnitTestsets
 from .get_packages import GetPackagesHandler
-from .import_package import ImportPackageHandler
+from .import_package import ImportPackageHandler, ImportPackageUploadHandler
+from .metrics import MetricsHandler
+from .run_sweep import RunSweepHandler
+from .run_tests import RunTestsHandler
+from .transform_jobs import TransformJobHandler, TransformJobsHandler
 from .transform_package import Crop2MLToPlatformHandler, PlatformToCrop2MLHandler
@@ -5,6 +5,231 @@ import tornado
 from jupyter_server.base.handlers import APIHandler
 
 from ..crop2ml_utils import adapt_unit_model_complete, adapt_composition_model_complete, writecompositionXML, writeunitXML
+from ..crop2ml_utils.links import Interface, links_interface, validate_links
+from ..crop2ml_utils.utils import adapt_composition_links, adapt_composition_models
+from ..executor import run_blocking
+from ..metrics import phase
+
+
+MODEL_TYPES = ('unit', 'composition')
+
+
+def model_path(data):
+    """
+    Returns the absolute path of the model file of a payload
+    """
+    header = data.get('model-header', {})
+    return os.path.abspath(os.path.join(header.get('Path', ''), 'crop2ml', '{}.{}.xml'.format(
+        header.get('Model type', '').lower(), header.get('Model name', ''))))
+
+
+def payload_interface(data):
+    """
+    Returns the Interface of the model of a payload, before it is written
+    """
+    header = data.get('model-header', {})
+    if header.get('Model type', '').lower() == 'composition':
+        return links_interface(adapt_composition_links(data.get('composition/links', {})))
+    variables = (data.get('unit/inputs-outputs') or {}).get('Inputs', [])
+    return Interface((var.get('Name', '') for var in variables if var.get('Type') in ('input', 'input & output')),
+                     (var.get('Name', '') for var in variables if var.get('Type') in ('output', 'input & output')))
+
+
+def validate_model(data, pending=None):
+    """
+    Checks a model creation payload
+
+    Args:
+        data: Payload with the 'model-header' and the model data
+        pending: Dict of the model paths of the other payloads of the request
+                 to their Interface, the models a composition may use
+
+    Returns:
+        The error message, or None if the payload is valid
+    """
+    header = data.get('model-header', {})
+    model_type = header.get('Model type', '').lower()
+
+    if not model_type:
+        return "Model type not specified in header"
+    if model_type not in MODEL_TYPES:
+        return f"Unknown model type: {model_type}"
+    if not header.get('Model name'):
+        return "Model name not specified in header"
+    if not header.get('Path') or not os.path.isdir(os.path.join(header['Path'], 'crop2ml')):
+        return f"Package not found: {header.get('Path', '')}"
+    if model_type == 'composition':
+        errors = validate_links(os.path.join(header['Path'], 'crop2ml'),
+                                adapt_composition_models(data.get('composition/models', {})),
+                                adapt_composition_links(data.get('composition/links', {})),
+                                pending=pending)
+        if errors:
+            return "Invalid composition links: " + "; ".join(errors)
+    return None
+
+
+def validate_models(payloads):
+    """
+    Checks the payloads of a batch, before any of them is written
+
+    Returns:
+        The validation result of each model, in the order of the payloads
+    """
+    # The compositions may use the models of the request
+    pending = {model_path(payload): payload_interface(payload)
+               for payload in payloads if isinstance(payload, dict)}
+
+    results = []
+    seen = set()
+    for payload in payloads:
+        header = payload.get('model-header', {}) if isinstance(payload, dict) else {}
+        error = validate_model(payload, pending) if isinstance(payload, dict) else "Invalid model data"
+        key = (os.path.normpath(header.get('Path', '')), header.get('Model type', '').lower(), header.get('Model name', ''))
+        if error is None and key in seen:
+            error = "Duplicate model in the request"
+        seen.add(key)
+
+        result = {
+            "model_name": header.get('Model name', ''),
+            "model_type": header.get('Model type', '').lower(),
+            "success": error is None
+        }
+        if error is not None:
+            result["error"] = error
+        results.append(result)
+    return results
+
+
+def create_model(data, log):
+    """
+    Creates or updates the model of a payload checked by validate_model
+
+    Args:
+        data: Payload with the 'model-header' and the model data
+        log: The logger of the handler
+
+    Returns:
+        The header of the model, with its crop2ml directory as 'Path'
+    """
+    header = dict(data['model-header'])
+    header['Path'] = os.path.join(header['Path'], 'crop2ml')
+
+    if header['Model type'].lower() == 'unit':
+        create_unit_model(header, data, log)
+    else:
+        create_composition_model(header, data, log)
+    return header
+
+
+def create_unit_model(header, model_data, log):
+    """
+    Create or update a unit model XML file
+
+    Args:
+        header: Header data from create-model.json
+        model_data: Model data with inputsOutputs, parametersets, testsets
+        log: The logger of the handler
+    """
+    # Check if this is an edit (presence of "Old name") or create
+    # We check for "Old name" instead of file existence to handle renames
+    is_edit = 'Old name' in header and header['Old name']
+
+    if is_edit:
+        log.info(f"Updating existing unit model: {header['Model name']}")
+    else:
+        log.info(f"Creating new unit model: {header['Model name']}")
+
+    # Extract components
+    inputs_outputs = model_data.get('unit/inputs-outputs', {})
+    parametersets = model_data.get('unit/parametersets', None)
+    testsets = model_data.get('unit/testsets', None)
+
+    # Adapt to writeXML format
+    datas, df, paramsetdict, testsetdict = adapt_unit_model_complete(
+        header,
+        inputs_outputs,
+        parametersets,
+        testsets
+    )
+
+    log.debug(f"Adapted data: datas={datas.keys()}, df={df.keys()}")
+
+    # Create or update XML
+    xml_writer = writeunitXML(
+        datas=datas,
+        df=df,
+        paramsetdict=paramsetdict,
+        testsetdict=testsetdict,
+        iscreate=not is_edit,  # False if editing, True if creating
+        local=False
+    )
+
+    xml_writer._write()
+    action = "updated" if is_edit else "created"
+    log.info(f"Unit model '{datas['Model name']}' {action} successfully")
+
+
+def create_composition_model(header, model_data, log):
+    """
+    Create a composition model XML file
+
+    Args:
+        header: Header data from create-model.json
+        model_data: Model data with models and links
+        log: The logger of the handler
+    """
+    log.info("Creating composition model")
+
+    # Extract components
+    models = model_data.get('composition/models', {})
+    links = model_data.get('composition/links', {})
+
+    # Adapt to writeXML format
+    datas, listmodel, listlink = adapt_composition_model_complete(
+        header,
+        models,
+        links
+    )
+
+    log.debug(f"Adapted data: datas={datas.keys()}, models={len(listmodel)}, links={len(listlink)}")
+
+    # Create XML
+    xml_writer = writecompositionXML(
+        data=datas,
+        listmodel=listmodel,
+        listlink=listlink,
+        iscreate=True
+    )
+
+    xml_writer.write()
+    log.info(f"Composition model '{datas['Model name']}' created successfully")
+
+
+def create_models(payloads, log):
+    """
+    Creates the models of a batch, in a single pass
+
+    A failing model does not prevent the next ones from being written.
+
+    Returns:
+        The result of each model, in the order of the payloads
+    """
+    results = []
+    for data in payloads:
+        header = data['model-header']
+        result = {
+            "model_name": header.get('Model name', ''),
+            "model_type": header['Model type'].lower()
+        }
+        try:
+            create_model(data, log)
+            result["success"] = True
+        except Exception as e:
+            log.error(f"Error creating model {result['model_name']}: {str(e)}", exc_info=True)
+            result["success"] = False
+            result["error"] = str(e)
+        results.append(result)
+    return results
 
 
 class CreateModelHandler(APIHandler):
@@ -25,7 +250,7 @@ class CreateModelHandler(APIHandler):
     """
 
     @tornado.web.authenticated
-    def post(self):
+    async def post(self):
         try:
             data = self.get_json_body()
             self.log.info(f"Received model creation request")
@@ -42,20 +267,26 @@ class CreateModelHandler(APIHandler):
                 }))
                 return
 
-            header['Path'] = os.path.join(header['Path'], 'crop2ml')
-
-            # Create model based on type
-            if model_type == 'unit':
-                self._create_unit_model(header, data)
-            elif model_type == 'composition':
-                self._create_composition_model(header, data)
-            else:
+            if model_type not in MODEL_TYPES:
                 self.finish(json.dumps({
                     "success": False,
                     "error": f"Unknown model type: {model_type}"
                 }))
                 return
 
+            with phase(self, "validate"):
+                error = await run_blocking(validate_model, data)
+            if error is not None:
+                self.finish(json.dumps({
+                    "success": False,
+                    "error": error
+                }))
+                return
+
+            # Create model based on type
+            with phase(self, "write"):
+                await run_blocking(create_model, data, self.log)
+
             self.finish(json.dumps({
                 "success": True,
                 "message": f"{model_type.capitalize()} model created successfully",
@@ -70,82 +301,73 @@ class CreateModelHandler(APIHandler):
                 "error": str(e)
             }))
 
-    def _create_unit_model(self, header, model_data):
-        """
-        Create or update a unit model XML file
-
-        Args:
-            header: Header data from create-model.json
-            model_data: Model data with inputsOutputs, parametersets, testsets
-        """
-        # Check if this is an edit (presence of "Old name") or create
-        # We check for "Old name" instead of file existence to handle renames
-        is_edit = 'Old name' in header and header['Old name']
-
-        if is_edit:
-            self.log.info(f"Updating existing unit model: {header['Model name']}")
-        else:
-            self.log.info(f"Creating new unit model: {header['Model name']}")
-
-        # Extract components
-        inputs_outputs = model_data.get('unit/inputs-outputs', {})
-        parametersets = model_data.get('unit/parametersets', None)
-        testsets = model_data.get('unit/testsets', None)
-
-        # Adapt to writeXML format
-        datas, df, paramsetdict, testsetdict = adapt_unit_model_complete(
-            header,
-            inputs_outputs,
-            parametersets,
-            testsets
-        )
-
-        self.log.debug(f"Adapted data: datas={datas.keys()}, df={df.keys()}")
-
-        # Create or update XML
-        xml_writer = writeunitXML(
-            datas=datas,
-            df=df,
-            paramsetdict=paramsetdict,
-            testsetdict=testsetdict,
-            iscreate=not is_edit,  # False if editing, True if creating
-            local=False
-        )
-
-        xml_writer._write()
-        action = "updated" if is_edit else "created"
-        self.log.info(f"Unit model '{datas['Model name']}' {action} successfully")
-
-    def _create_composition_model(self, header, model_data):
-        """
-        Create a composition model XML file
-
-        Args:
-            header: Header data from create-model.json
-            model_data: Model data with models and links
-        """
-        self.log.info("Creating composition model")
-
-        # Extract components
-        models = model_data.get('composition/models', {})
-        links = model_data.get('composition/links', {})
-
-        # Adapt to writeXML format
-        datas, listmodel, listlink = adapt_composition_model_complete(
-            header,
-            models,
-            links
-        )
-
-        self.log.debug(f"Adapted data: datas={datas.keys()}, models={len(listmodel)}, links={len(listlink)}")
-
-        # Create XML
-        xml_writer = writecompositionXML(
-            data=datas,
-            listmodel=listmodel,
-            listlink=listlink,
-            iscreate=True
-        )
-
-        xml_writer.write()
-        self.log.info(f"Composition model '{datas['Model name']}' created successfully")
+
+class CreateModelsHandler(APIHandler):
+    """
+    Handler for creating a batch of crop models in one request
+
+    Expects JSON data with the following structure:
+    {
+        "models": [
+            {
+                "model-header": { ... },  # create-model.json schema
+                ...                       # model data, as for create-model
+            },
+            ...
+        ]
+    }
+
+    All the models are checked before any of them is written: if one is
+    invalid, nothing is written. The response reports the result of each
+    model, in the request order:
+    {
+        "success": true,
+        "results": [
+            {"model_name": "...", "model_type": "unit", "success": true},
+            {"model_name": "...", "model_type": "unit", "success": false, "error": "..."}
+        ]
+    }
+    """
+
+    @tornado.web.authenticated
+    async def post(self):
+        try:
+            data = self.get_json_body()
+            payloads = data.get('models', [])
+            self.log.info(f"Received batch model creation request for {len(payloads)} models")
+
+            if not isinstance(payloads, list) or not payloads:
+                self.finish(json.dumps({
+                    "success": False,
+                    "error": "You must provide a list of models."
+                }))
+                return
+
+            with phase(self, "validate"):
+                # Validate every model before writing any of them
+                results = await run_blocking(validate_models, payloads)
+
+            if not all(result["success"] for result in results):
+                self.finish(json.dumps({
+                    "success": False,
+                    "error": "Some models are invalid, no model was created.",
+                    "results": results
+                }))
+                return
+
+            with phase(self, "write"):
+                results = await run_blocking(create_models, payloads, self.log)
+            created = sum(result["success"] for result in results)
+
+            self.finish(json.dumps({
+                "success": created == len(results),
+                "message": f"{created} of {len(results)} models created successfully",
+                "results": results
+            }))
+
+        except Exception as e:
+            self.log.error(f"Error creating models: {str(e)}", exc_info=True)
+            self.finish(json.dumps({
+                "success": False,
+                "error": str(e)
+            }))
@@ -1,17 +1,22 @@
 import json
+import os
 from pathlib import Path
 
-from cookiecutter.main import cookiecutter
 import tornado
 
 from jupyter_server.base.handlers import APIHandler
 
+from ..crop2ml_utils.clone import clone_package
+from ..crop2ml_utils.template import package_template
+from ..executor import run_blocking
+from ..metrics import phase
+
 class CreatePackageHandler(APIHandler):
     # The following decorator should be present on all verb methods (head, get, post,
     # patch, put, delete, options) to ensure only authorized user can request the
     # Jupyter server
     @tornado.web.authenticated
-    def post(self):
+    async def post(self):
         data = self.get_json_body()
 
         missing_args = []
@@ -35,18 +40,20 @@ class CreatePackageHandler(APIHandler):
             raise tornado.web.HTTPError(400, "This package already exists.")
 
         try:
-            cookiecutter(
-                "https://github.com/AgriculturalModelExchangeInitiative/cookiecutter-crop2ml",
-                no_input=True,
-                extra_context={
-                    'project_name': project_name,
-                    'repo_name': package_name,
-                    'author_name': authors,
-                    'description': description,
-                    'open_source_license': license
-                },
-                output_dir=dirpath
-            )
+            with phase(self, "write"):
+                await run_blocking(
+                    package_template.render,
+                    dirpath,
+                    {
+                        'project_name': project_name,
+                        'repo_name': package_name,
+                        'author_name': authors,
+                        'description': description,
+                        'open_source_license': license
+                    }
+                )
+        except FileNotFoundError as e:
+            raise tornado.web.HTTPError(500, str(e))
         except:
             raise tornado.web.HTTPError(500, "Could not create the package.")
 
@@ -54,3 +61,67 @@ class CreatePackageHandler(APIHandler):
             "success": True,
             "data": data
         }))
+
+
+class UpdatePackageTemplateHandler(APIHandler):
+    """
+    Fetches the package template from its repository into the local cache,
+    the only request of the package creation using the network
+    """
+    @tornado.web.authenticated
+    async def post(self):
+        data = self.get_json_body() or {}
+
+        try:
+            with phase(self, "write"):
+                path = await run_blocking(package_template.update, data.get("checkout"))
+        except:
+            raise tornado.web.HTTPError(500, "Could not update the package template.")
+
+        self.finish(json.dumps({
+            "success": True,
+            "path": path
+        }))
+
+
+class ClonePackageHandler(APIHandler):
+    """
+    Clones a package under ./packages, sharing its files with the original
+    where the filesystem allows it, and moves the model ids to the new package
+
+    POST /cropmstudio/clone-package
+    {"Path": "<package path>", "packageName": "<new package name>"}
+    """
+    @tornado.web.authenticated
+    async def post(self):
+        data = self.get_json_body() or {}
+
+        with phase(self, "validate"):
+            path = data.get("Path")
+            package_name = data.get("packageName")
+            if not path or not package_name:
+                raise tornado.web.HTTPError(400, "The package path and the new package name are required.")
+            if package_name in (".", "..") or "/" in package_name or "\\" in package_name:
+                raise tornado.web.HTTPError(400, f"Invalid package name: {package_name}")
+            if not Path(path, "crop2ml").is_dir():
+                raise tornado.web.HTTPError(404, f"Package not found: {path}")
+
+            dirpath = "./packages"
+            target = Path(dirpath, package_name)
+            if target.exists():
+                raise tornado.web.HTTPError(400, "This package already exists.")
+            target.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            with phase(self, "write"):
+                stats = await run_blocking(clone_package, path, str(target))
+        except FileExistsError:
+            raise tornado.web.HTTPError(400, "This package already exists.")
+        except:
+            raise tornado.web.HTTPError(500, "Could not clone the package.")
+
+        self.finish(json.dumps({
+            "success": True,
+            "path": os.path.join(dirpath, package_name),
+            "files": stats
+        }))
@@ -5,7 +5,9 @@ import os
 import tornado
 from jupyter_server.base.handlers import APIHandler
 
-from pycropml.topology import Topology
+from ..crop2ml_utils.svg_cache import svg_cache
+from ..executor import run_blocking
+from ..metrics import phase
 
 
 class DisplayModelHandler(APIHandler):
@@ -19,7 +21,7 @@ class DisplayModelHandler(APIHandler):
     """
 
     @tornado.web.authenticated
-    def post(self):
+    async def post(self):
         try:
             data = self.get_json_body()
             self.log.info(f"Received display model request")
@@ -39,12 +41,11 @@ class DisplayModelHandler(APIHandler):
 
             # Create topology instance
             try:
-                topo = Topology(package_name, pkg=path)
-
-                # Generate the workflow image
-                # The Topology class generates an SVGimage file
+                # Generate the workflow image, or get it from the cache if
+                # the package model files did not change
                 # We need to get the image data and encode it
-                image_data = topo.get_wf_svg()
+                with phase(self, "transform"):
+                    image_data = await run_blocking(svg_cache.get_wf_svg, package_name, path)
 
                 # Check if the data is binary or text
                 if isinstance(image_data, bytes):
@@ -1,28 +1,113 @@
-import base64
-from io import BytesIO
+import asyncio
 import json
 import os
 from pathlib import Path
-from zipfile import ZipFile
+from urllib.parse import quote, urlencode
+from zipfile import ZIP_DEFLATED, ZipFile
 
 import tornado
-
 from jupyter_server.base.handlers import APIHandler
+from jupyter_server.utils import url_path_join
+
+from ..crop2ml_utils.utils import STATE_DIRNAME
+from ..executor import run_blocking
+
+
+# Size of the chunks written to the response
+CHUNK_SIZE = 256 * 1024
+
+# Number of chunks waiting to be written to the response
+QUEUE_SIZE = 8
+
+
+class _ChunkStream():
+    """
+    Write-only, non seekable file object passing the ZIP data to the event
+    loop in chunks of CHUNK_SIZE bytes.
+
+    The ZIP is written from an executor thread, which blocks while the queue
+    is full, so at most QUEUE_SIZE chunks are held in memory.
+    """
+
+
+    def __init__(self, queue, loop):
+
+        self._queue = queue
+        self._loop = loop
+        self._buffer = bytearray()
+        self.closed = False
+
+
+
+    def write(self, data):
+
+        if self.closed:
+            raise OSError("The download was interrupted")
+        self._buffer += data
+        if len(self._buffer) >= CHUNK_SIZE:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+        return len(data)
+
+
+
+    def flush(self):
+        pass
+
+
+
+    def close(self):
+
+        if self._buffer:
+            self._put(bytes(self._buffer))
+            self._buffer.clear()
+
+
+
+    def _put(self, item):
+
+        asyncio.run_coroutine_threadsafe(self._queue.put(item), self._loop).result()
+
+
+def _zip_package(directory, stream):
+    """
+    Writes the ZIP of a package directory to the stream, file by file
+    """
+    try:
+        with ZipFile(stream, "w", ZIP_DEFLATED) as zf:
+            for root, dirs, files in os.walk(directory):
+                if root == os.fspath(directory):
+                    dirs[:] = [d for d in dirs if d != STATE_DIRNAME]
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    # Store relative path in ZIP
+                    arcname = os.path.relpath(file_path, os.path.join(directory, '..'))
+                    zf.write(file_path, arcname)
+        stream.close()
+    except BaseException as e:
+        if not stream.closed:
+            stream._put(e)
+        raise
+    stream._put(None)
+
 
 class DownloadPackageHandler(APIHandler):
     """
     Handler for downloading a package as a ZIP file.
 
-    Expects JSON data with the following structure:
+    POST expects JSON data with the following structure:
     {
         "Path": "path/to/package"
     }
 
-    Returns JSON with base64-encoded ZIP data that can be used to trigger a download.
+    and returns JSON with the URL that can be used to trigger the download.
+
+    GET /cropmstudio/download-package?package=path/to/package streams the
+    ZIP file, building its entries while they are sent.
     """
 
     @tornado.web.authenticated
-    def post(self):
+    async def post(self):
         try:
             data = self.get_json_body()
             self.log.info(f"Received download package request")
@@ -46,36 +131,16 @@ class DownloadPackageHandler(APIHandler):
                 }))
                 return
 
-            # Create in-memory ZIP file
-            bytes_zip = BytesIO()
+            package_name = directory.name
+            url = url_path_join(self.base_url, "cropmstudio", "download-package")
 
-            try:
-                with ZipFile(bytes_zip, "w") as zf:
-                    for root, dirs, files in os.walk(directory):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            # Store relative path in ZIP
-                            arcname = os.path.relpath(file_path, os.path.join(directory, '..'))
-                            zf.write(file_path, arcname)
-
-                # Encode ZIP to base64
-                b64_data = base64.b64encode(bytes_zip.getvalue()).decode('utf-8')
-                package_name = directory.name
-
-                self.finish(json.dumps({
-                    "success": True,
-                    "package_name": package_name,
-                    "download": f"data:application/zip;base64,{b64_data}",
-                    "filename": f"{package_name}.zip",
-                    "message": f"Successfully created ZIP for package {package_name}"
-                }))
-
-            except Exception as e:
-                self.log.error(f"Error creating ZIP: {str(e)}", exc_info=True)
-                self.finish(json.dumps({
-                    "success": False,
-                    "error": f"Error creating ZIP file: {str(e)}"
-                }))
+            self.finish(json.dumps({
+                "success": True,
+                "package_name": package_name,
+                "download": f"{url}?{urlencode({'package': path})}",
+                "filename": f"{package_name}.zip",
+                "message": f"Successfully created ZIP for package {package_name}"
+            }))
 
         except Exception as e:
             self.log.error(f"Error downloading package: {str(e)}", exc_info=True)
@@ -83,3 +148,51 @@ class DownloadPackageHandler(APIHandler):
                 "success": False,
                 "error": str(e)
             }))
+
+    @tornado.web.authenticated
+    async def get(self):
+        path = self.get_argument('package', None)
+        if not path:
+            raise tornado.web.HTTPError(400, "You must provide a package path.")
+
+        directory = Path(path)
+        if not directory.is_dir():
+            raise tornado.web.HTTPError(404, f"Directory not found: {path}")
+
+        filename = f"{directory.name}.zip"
+        self.set_header("Content-Type", "application/zip")
+        self.set_header("Content-Disposition", f"attachment; filename*=UTF-8''{quote(filename)}")
+
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        stream = _ChunkStream(queue, asyncio.get_running_loop())
+        producer = asyncio.ensure_future(run_blocking(_zip_package, directory, stream))
+
+        started = False
+        try:
+            while True:
+                chunk = await queue.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, BaseException):
+                    raise chunk
+                self.write(chunk)
+                await self.flush()
+                started = True
+        except tornado.iostream.StreamClosedError:
+            self.log.warning(f"Download of package {path} interrupted")
+            return
+        except Exception as e:
+            self.log.error(f"Error creating ZIP: {str(e)}", exc_info=True)
+            if not started:
+                raise tornado.web.HTTPError(500, f"Error creating ZIP file: {str(e)}")
+            # The response has started, closing it is the only way to report the error
+            self.request.connection.close()
+            return
+        finally:
+            # Unblock the producer if it is waiting for room in the queue
+            stream.closed = True
+            while not queue.empty():
+                queue.get_nowait()
+            await asyncio.gather(producer, return_exceptions=True)
+
+        self.finish(set_content_type="application/zip")
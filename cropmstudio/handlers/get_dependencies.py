@@ -0,0 +1,71 @@
+import json
+import os
+
+import tornado
+from jupyter_server.base.handlers import APIHandler
+
+from ..crop2ml_utils.dependencies import dependency_graph
+from ..executor import run_blocking
+from ..metrics import phase
+
+
+def _node(package, model):
+
+    return {
+        "package": package,
+        "model": model,
+        "path": dependency_graph.resolve(package, model)
+    }
+
+
+def get_dependencies(package, model, recursive):
+    """
+    Returns the models used by a model and the compositions using it
+    """
+    return {
+        "dependencies": [_node(*node) for node in dependency_graph.dependencies(package, model, recursive)],
+        "dependents": [_node(*node) for node in dependency_graph.dependents(package, model, recursive)]
+    }
+
+
+class GetDependenciesHandler(APIHandler):
+    """
+    Handler returning the dependencies of a model, and its dependents
+
+    GET /cropmstudio/get-dependencies?package=<package path>&model=<filename>[&recursive=true]
+
+    Returns JSON with the following structure:
+    {
+        "success": true,
+        "model": {"package": "Pkg", "model": "unit.Alpha.xml", "path": "..."},
+        "dependencies": [...],  # the models used by the composition
+        "dependents": [...]     # the compositions using the model
+    }
+
+    The models are identified by their package name and filename, and the
+    path of their file is null if it does not exist. With recursive, the
+    models used or using transitively are included.
+    """
+
+    # The following decorator should be present on all verb methods (head, get, post,
+    # patch, put, delete, options) to ensure only authorized user can request the
+    # Jupyter server
+    @tornado.web.authenticated
+    async def get(self):
+        path = self.get_argument('package', None)
+        model = self.get_argument('model', None)
+        recursive = self.get_argument('recursive', 'false').lower() in ('1', 'true', 'yes')
+
+        if not path or not model:
+            raise tornado.web.HTTPError(400, "You must provide a package path and a model.")
+
+        package = os.path.basename(os.path.normpath(path))
+        with phase(self, "parse"):
+            data = await run_blocking(get_dependencies, package, model, recursive)
+
+        with phase(self, "serialize"):
+            body = json.dumps(dict({
+                "success": True,
+                "model": _node(package, model)
+            }, **data))
+        self.finish(body)
@@ -4,6 +4,7 @@ import tornado
 from jupyter_server.base.handlers import APIHandler
 
 from ..crop2ml_utils.utils import get_models
+from ..metrics import phase
 
 class GetModels(APIHandler):
     # The following decorator should be present on all verb methods (head, get, post,
@@ -12,7 +13,8 @@ class GetModels(APIHandler):
     @tornado.web.authenticated
     def get(self):
         path = self.get_argument('package', None)
-        models = get_models(path)
+        with phase(self, "parse"):
+            models = get_models(path)
 
         self.finish(json.dumps({
             "success": True,
@@ -1,21 +1,45 @@
 import json
-import os
 
 import tornado
 
 from jupyter_server.base.handlers import APIHandler
 
+from ..crop2ml_utils.package_index import package_index
+from ..executor import run_blocking
+from ..metrics import phase
+
 class GetPackagesHandler(APIHandler):
+    """
+    Handler listing the packages of the package roots
+
+    Returns JSON with the following structure:
+    {
+        "packages": ["path/to/package", ...],
+        "index": [
+            {
+                "path": "path/to/package",
+                "name": "package",
+                "models": {"unit": 3, "composition": 1},
+                "size": 12345,
+                "modified": 1700000000.0,
+                "targets": ["java", "py"]
+            },
+            ...
+        ]
+    }
+    """
+
     # The following decorator should be present on all verb methods (head, get, post,
     # patch, put, delete, options) to ensure only authorized user can request the
     # Jupyter server
     @tornado.web.authenticated
-    def get(self):
-        pkg_directory = "./packages"
-        packages = []
-        for f in os.listdir(pkg_directory):
-            packages.append(os.path.join(pkg_directory, f))
+    async def get(self):
+        with phase(self, "parse"):
+            index = await run_blocking(package_index.get_packages)
 
-        self.finish(json.dumps({
-            "packages": packages
-        }))
+        with phase(self, "serialize"):
+            body = json.dumps({
+                "packages": [package["path"] for package in index],
+                "index": index
+            })
+        self.finish(body)
@@ -1,19 +1,33 @@
 import base64
 from io import BytesIO
 import json
+import os
 from pathlib import Path
+import tempfile
 from zipfile import BadZipFile, ZipFile
 
 import tornado
 
 from jupyter_server.base.handlers import APIHandler
 
+from ..config import get_setting
+from ..executor import run_blocking
+from ..metrics import phase
+
+
+def _extract_package(data_bytes, dirpath):
+    """
+    Extracts the ZIP data in the packages directory
+    """
+    with ZipFile(BytesIO(data_bytes)) as zip:
+        zip.extractall(dirpath)
+
 class ImportPackageHandler(APIHandler):
     # The following decorator should be present on all verb methods (head, get, post,
     # patch, put, delete, options) to ensure only authorized user can request the
     # Jupyter server
     @tornado.web.authenticated
-    def post(self):
+    async def post(self):
         data = self.get_json_body()
         dirpath = "./packages"
 
@@ -22,8 +36,9 @@ class ImportPackageHandler(APIHandler):
             raise tornado.web.HTTPError(400, f"The package is missing")
 
         try:
-            zip_data = package.split('base64,', 1)[1]
-            data_bytes = base64.b64decode(zip_data)
+            with phase(self, "parse"):
+                zip_data = package.split('base64,', 1)[1]
+                data_bytes = base64.b64decode(zip_data)
         except:
             raise tornado.web.HTTPError(500, f"ZIP data can't be extracted from blob")
 
@@ -31,8 +46,8 @@ class ImportPackageHandler(APIHandler):
             Path(dirpath).mkdir()
 
         try:
-            with ZipFile(BytesIO(data_bytes)) as zip:
-                zip.extractall(dirpath)
+            with phase(self, "write"):
+                await run_blocking(_extract_package, data_bytes, dirpath)
         except BadZipFile as e:
             raise tornado.web.HTTPError(500, f"Data are not ZIP")
         except Exception as e:
@@ -42,3 +57,107 @@ class ImportPackageHandler(APIHandler):
             "success": True,
             "data": data
         }))
+
+
+def _extract_package_file(file_path, dirpath):
+    """
+    Extracts the ZIP file in the packages directory
+    """
+    Path(dirpath).mkdir(parents=True, exist_ok=True)
+    with ZipFile(file_path) as zip:
+        zip.extractall(dirpath)
+
+
+@tornado.web.stream_request_body
+class ImportPackageUploadHandler(APIHandler):
+    """
+    Handler importing a package from a raw ZIP upload.
+
+    PUT /cropmstudio/import-package-upload?upload_id=<id>
+
+    The request body is the ZIP file itself (Content-Type: application/zip),
+    which is spooled to a temporary file while it is received and extracted
+    from disk, so that the memory used does not depend on the package size.
+
+    GET /cropmstudio/import-package-upload?upload_id=<id> returns the
+    progress of an upload: {"received": <bytes>, "total": <bytes or null>}
+    """
+
+    # Progress of the uploads in progress, by upload id
+    uploads = {}
+
+    async def prepare(self):
+        await super().prepare()
+
+        if self.request.method != "PUT":
+            return
+
+        # Check the user before receiving the body
+        if not self.current_user:
+            raise tornado.web.HTTPError(403)
+
+        self.request.connection.set_max_body_size(get_setting(self.settings, "max_upload_bytes"))
+
+        total = self.request.headers.get("Content-Length")
+        self._upload_id = self.get_argument("upload_id", None)
+        self._progress = {"received": 0, "total": int(total) if total else None}
+        if self._upload_id:
+            self.uploads[self._upload_id] = self._progress
+
+        self._file = tempfile.NamedTemporaryFile(prefix="cropmstudio-", suffix=".zip", delete=False)
+
+    async def data_received(self, chunk):
+        if self._file is None:
+            return
+
+        # Tornado waits for the write before reading the next chunk
+        await run_blocking(self._file.write, chunk)
+        self._progress["received"] += len(chunk)
+
+    def on_finish(self):
+        self._cleanup()
+
+    def on_connection_close(self):
+        super().on_connection_close()
+        self._cleanup()
+
+    def _cleanup(self):
+        file = getattr(self, "_file", None)
+        if file is None:
+            return
+
+        self._file = None
+        file.close()
+        os.remove(file.name)
+        if self._upload_id:
+            self.uploads.pop(self._upload_id, None)
+
+    @tornado.web.authenticated
+    def get(self):
+        upload_id = self.get_argument("upload_id", None)
+        if upload_id not in self.uploads:
+            raise tornado.web.HTTPError(404, f"Unknown upload {upload_id}")
+
+        self.finish(json.dumps({
+            "success": True,
+            **self.uploads[upload_id]
+        }))
+
+    @tornado.web.authenticated
+    async def put(self):
+        dirpath = "./packages"
+        self._file.close()
+
+        try:
+            with phase(self, "write"):
+                await run_blocking(_extract_package_file, self._file.name, dirpath)
+        except BadZipFile as e:
+            raise tornado.web.HTTPError(400, f"Data are not ZIP")
+        except Exception as e:
+            self.log.error(f"Error extracting ZIP: {str(e)}", exc_info=True)
+            raise tornado.web.HTTPError(500, f"Unexpected error while extracting ZIP")
+
+        self.finish(json.dumps({
+            "success": True,
+            "size": self._progress["received"]
+        }))
@@ -0,0 +1,21 @@
+import tornado
+from jupyter_server.base.handlers import APIHandler
+
+from ..metrics import metrics
+
+
+class MetricsHandler(APIHandler):
+    """
+    Handler returning the request duration histograms in the Prometheus text
+    format, when the metrics setting is enabled
+    """
+
+    # The following decorator should be present on all verb methods (head, get, post,
+    # patch, put, delete, options) to ensure only authorized user can request the
+    # Jupyter server
+    @tornado.web.authenticated
+    def get(self):
+        if not metrics.enabled:
+            raise tornado.web.HTTPError(404, "The metrics are disabled")
+
+        self.finish(metrics.to_prometheus(), set_content_type="text/plain; version=0.0.4; charset=utf-8")
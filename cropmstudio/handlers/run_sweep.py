@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+
+import tornado
+from jupyter_server.base.handlers import APIHandler
+
+from ..config import get_setting
+from ..crop2ml_utils.sweep import SweepError, batch_arguments, encode_columns, failed_batch, plan_sweep, run_batch, sweep_result
+from ..crop2ml_utils.testrun import TIMEOUT_GRACE, worker_error
+from ..executor import run_blocking, run_model_code
+from ..metrics import phase
+
+
+class RunSweepHandler(APIHandler):
+    """
+    Handler evaluating a unit model over combinations of its input values
+
+    Expects JSON data with the following structure:
+    {
+        "Path": "path/to/package",
+        "model": "unit.Model.xml",
+        "parameters": {                      # the swept inputs
+            "rate": {"min": 0, "max": 1, "steps": 100},  # min and max default to the input bounds
+            "tmin": {"values": [0, 5, 10]}
+        },
+        "parameterset": "default",           # optional, values of the other inputs
+        "inputs": {"tmax": 20},              # optional, values of the other inputs
+        "mode": "grid"                       # optional, "grid" or "zip"
+    }
+
+    Returns the results as columns rather than one object per run:
+    {
+        "success": true,
+        "count": 300,                        # number of combinations
+        "columns": ["rate", "tmin", "out"],  # swept inputs then outputs
+        "inputs": ["rate", "tmin"],
+        "outputs": ["out"],
+        "vectorized": true,                  # whether the model ran on NumPy arrays
+        "failed": 0,                         # runs with NaN outputs
+        "error": null,                       # first error of the failed runs
+        "dtype": "<f8",
+        "data": "..."                        # base64 of the columns, one after the other
+    }
+    """
+
+    # The following decorator should be present on all verb methods (head, get, post,
+    # patch, put, delete, options) to ensure only authorized user can request the
+    # Jupyter server
+    @tornado.web.authenticated
+    async def post(self):
+        data = self.get_json_body() or {}
+
+        with phase(self, "validate"):
+            path = data.get("Path")
+            model = data.get("model")
+            if not path or not model:
+                raise tornado.web.HTTPError(400, "You must provide a package path and a model.")
+            if not model.startswith("unit.") or os.path.basename(model) != model:
+                raise tornado.web.HTTPError(400, f"Invalid unit model: {model}")
+            if not os.path.isdir(os.path.join(path, "crop2ml")):
+                raise tornado.web.HTTPError(404, f"Package not found: {path}")
+
+        try:
+            with phase(self, "transform"):
+                plan = await run_blocking(plan_sweep, path, model, data)
+                timeout = get_setting(self.settings, "model_timeout")
+                results = await asyncio.gather(*(self._run_batch(plan, batch, timeout) for batch in plan["batches"]))
+                result = await run_blocking(sweep_result, plan, results)
+        except SweepError as e:
+            raise tornado.web.HTTPError(400, str(e))
+
+        with phase(self, "serialize"):
+            columns = result.pop("data")
+            result.update(success=True, dtype="<f8", data=encode_columns(columns))
+            body = json.dumps(result)
+        self.finish(body)
+
+    async def _run_batch(self, plan, batch, timeout):
+        """
+        Evaluates a batch in the model process pool, and returns its
+        run_batch result
+        """
+        try:
+            return await run_model_code(run_batch, *batch_arguments(plan, batch), timeout,
+                                        timeout=None if timeout is None else timeout + TIMEOUT_GRACE)
+        except Exception as e:
+            self.log.error(f"Error running a sweep batch of {plan['generated'][0]}: {e}")
+            return failed_batch(plan, batch, worker_error(e, timeout))
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import os
+
+import tornado
+from jupyter_server.base.handlers import APIHandler
+
+from ..config import get_setting
+from ..crop2ml_utils.testrun import TIMEOUT_GRACE, complete_tests, plan_tests, run_test, test_arguments, worker_error
+from ..executor import run_blocking, run_model_code
+from ..metrics import phase
+
+
+class RunTestsHandler(APIHandler):
+    """
+    Handler running the testsets of the unit models of a package against its
+    generated Python code
+
+    Expects JSON data with the following structure:
+    {
+        "Path": "path/to/package",
+        "models": ["unit.Model.xml", ...],  # optional, all the unit models by default
+        "force": false                      # optional, run the models whose results are cached
+    }
+
+    Returns JSON with the following structure:
+    {
+        "success": true,
+        "summary": {"passed": 4, "failed": 0, "models": 2, "cached": 1},
+        "models": [
+            {
+                "model": "unit.Model.xml",
+                "cached": false,
+                "success": true,
+                "tests": [
+                    {
+                        "testset": "check", "test": "t1", "success": true,
+                        "outputs": {"out": {"expected": 2.0, "actual": 2.0, "precision": 2, "success": true}}
+                    },
+                    ...
+                ]
+            },
+            ...
+        ]
+    }
+    """
+
+    # The following decorator should be present on all verb methods (head, get, post,
+    # patch, put, delete, options) to ensure only authorized user can request the
+    # Jupyter server
+    @tornado.web.authenticated
+    async def post(self):
+        data = self.get_json_body() or {}
+
+        with phase(self, "validate"):
+            path = data.get("Path")
+            models = data.get("models")
+            if not path:
+                raise tornado.web.HTTPError(400, "You must provide a package path.")
+            if not os.path.isdir(os.path.join(path, "crop2ml")):
+                raise tornado.web.HTTPError(404, f"Package not found: {path}")
+            if models is not None and (not isinstance(models, list)
+                                       or not all(isinstance(m, str) and m.startswith("unit.") and os.path.basename(m) == m for m in models)):
+                raise tornado.web.HTTPError(400, "The models must be a list of unit model files.")
+
+        # The tests are awaited on the event loop, the handler threads only
+        # read the models and write the results
+        with phase(self, "transform"):
+            reports, pending = await run_blocking(plan_tests, path, models, bool(data.get("force", False)))
+            timeout = get_setting(self.settings, "model_timeout")
+            outcomes = await asyncio.gather(*(self._run_test(args, timeout) for args in test_arguments(pending)))
+            reports = await run_blocking(complete_tests, path, reports, pending, outcomes)
+
+        tests = [test for report in reports for test in report.get("tests", ())]
+        passed = sum(test["success"] for test in tests)
+
+        with phase(self, "serialize"):
+            body = json.dumps({
+                "success": all(report["success"] for report in reports),
+                "summary": {
+                    "passed": passed,
+                    "failed": len(tests) - passed,
+                    "models": len(reports),
+                    "cached": sum(report["cached"] for report in reports)
+                },
+                "models": reports
+            })
+        self.finish(body)
+
+    async def _run_test(self, args, timeout):
+        """
+        Runs a test in the model process pool, and returns its run_test result
+        """
+        try:
+            return await run_model_code(run_test, *args, timeout,
+                                        timeout=None if timeout is None else timeout + TIMEOUT_GRACE)
+        except Exception as e:
+            self.log.error(f"Error running a test of {args[0]}: {e}")
+            return {"error": worker_error(e, timeout), "retry": True}
@@ -0,0 +1,102 @@
+import json
+
+import tornado
+from jupyter_server.base.handlers import APIHandler
+
+from ..crop2ml_utils.transpile import get_target_list
+from ..jobs import job_manager
+
+
+class TransformJobsHandler(APIHandler):
+    """
+    Handler submitting and listing background transformation jobs
+
+    POST /cropmstudio/jobs/Crop2ML-to-platform
+    POST /cropmstudio/jobs/platform-to-Crop2ML
+
+    Expects JSON data with the same structure as the synchronous handlers:
+    {
+        "Path": "path/to/package",
+        "Languages": {"Java": true, ...},
+        "Platforms": {"Simplace": true, ...},
+        "Force": false
+    }
+
+    Returns the job status, its id being used to poll /cropmstudio/jobs/<id>.
+
+    GET /cropmstudio/jobs returns the status of all the known jobs.
+    """
+
+    @tornado.web.authenticated
+    def get(self, kind=None):
+        self.finish(json.dumps({
+            "success": True,
+            "jobs": [job.to_json() for job in job_manager.list()]
+        }))
+
+    @tornado.web.authenticated
+    def post(self, kind=None):
+        if kind is None:
+            raise tornado.web.HTTPError(404, "The job kind is missing")
+
+        data = self.get_json_body()
+        self.log.info(f"Received package transformation job {kind}")
+
+        path = data.get('Path', '')
+        languages = data.get('Languages', {})
+        platforms = data.get('Platforms', {})
+        force = data.get('Force', False)
+
+        # Validation
+        if not path:
+            self.finish(json.dumps({
+                "success": False,
+                "error": "You must provide a package path."
+            }))
+            return
+
+        target_list = get_target_list(languages, platforms)
+        if not target_list:
+            self.finish(json.dumps({
+                "success": False,
+                "error": "You must select at least one target language or platform."
+            }))
+            return
+
+        job = job_manager.submit(path, target_list, component=kind == "platform-to-Crop2ML", force=force)
+
+        self.finish(json.dumps({
+            "success": True,
+            "job": job.to_json(),
+            "message": f"Transformation job {job.id} submitted"
+        }))
+
+
+class TransformJobHandler(APIHandler):
+    """
+    Handler polling (GET) or cancelling (DELETE) a background transformation job
+
+    /cropmstudio/jobs/<id>
+    """
+
+    @tornado.web.authenticated
+    def get(self, job_id):
+        job = job_manager.get(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, f"Unknown job {job_id}")
+
+        self.finish(json.dumps({
+            "success": True,
+            "job": job.to_json()
+        }))
+
+    @tornado.web.authenticated
+    def delete(self, job_id):
+        job = job_manager.cancel(job_id)
+        if job is None:
+            raise tornado.web.HTTPError(404, f"Unknown job {job_id}")
+
+        self.finish(json.dumps({
+            "success": True,
+            "job": job.to_json()
+        }))
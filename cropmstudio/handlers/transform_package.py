@@ -3,7 +3,9 @@ import json
 import tornado
 from jupyter_server.base.handlers import APIHandler
 
-from pycropml.cyml import transpile_package, transpile_component
+from ..crop2ml_utils.transpile import get_target_list
+from ..jobs import run_transpile
+from ..metrics import phase
 
 
 class Crop2MLToPlatformHandler(APIHandler):
@@ -15,13 +17,18 @@ class Crop2MLToPlatformHandler(APIHandler):
         "platform-to-Crop2ML": {
             "Path": "path/to/package",
             "Languages": ["Java", "Python", ...],
-            "Platforms": ["Simplace", "Bioma", ...]
+            "Platforms": ["Simplace", "Bioma", ...],
+            "Force": false
         }
     }
+
+    The targets whose inputs did not change since their last successful
+    transpilation are skipped, and listed in the 'skipped' field of the
+    response, unless "Force" is true.
     """
 
     @tornado.web.authenticated
-    def post(self):
+    async def post(self):
         try:
             data = self.get_json_body()
             self.log.info(f"Received package transformation request")
@@ -29,6 +36,7 @@ class Crop2MLToPlatformHandler(APIHandler):
             path = data.get('Path', '')
             languages = data.get('Languages', {})
             platforms = data.get('Platforms', {})
+            force = data.get('Force', False)
 
             # Validation
             if not path:
@@ -38,39 +46,7 @@ class Crop2MLToPlatformHandler(APIHandler):
                 }))
                 return
 
-            # Combine languages and platforms into one list
-            target_list = []
-
-            # Map UI names to transpiler codes
-            language_map = {
-                'Java': 'java',
-                'CSharp': 'cs',
-                'Fortran': 'f90',
-                'Python': 'py',
-                'R': 'r',
-                'Cpp': 'cpp'
-            }
-
-            platform_map = {
-                'Simplace': 'simplace',
-                'Bioma': 'bioma',
-                'Dssat': 'dssat',
-                'OpenAlea': 'openalea',
-                'Record': 'record',
-                'Stics': 'stics',
-                'Apsim': 'apsim',
-                'Sirius': 'sirius'
-            }
-
-            # Add selected languages (check boolean values)
-            for lang_name, lang_code in language_map.items():
-                if languages.get(lang_name, False):
-                    target_list.append(lang_code)
-
-            # Add selected platforms (check boolean values)
-            for platform_name, platform_code in platform_map.items():
-                if platforms.get(platform_name, False):
-                    target_list.append(platform_code)
+            target_list = get_target_list(languages, platforms)
 
             self.log.warning(f"TARGET {target_list}")
             if not target_list:
@@ -83,21 +59,34 @@ class Crop2MLToPlatformHandler(APIHandler):
             # Perform transformation for each target
             errors = []
             successes = []
+            skipped = []
 
+            # The targets share the pyx code, src and test directories of the
+            # package, so they are transpiled one after the other
             for target in target_list:
+                self.log.info(f"Transpiling package {path} to {target}")
                 try:
-                    self.log.info(f"Transpiling package {path} to {target}")
-                    transpile_package(path, target)
-                    successes.append(target)
+                    with phase(self, "transform"):
+                        result = await run_transpile(path, target, False, force)
                 except Exception as e:
                     error_msg = f"Error transpiling to {target}: {str(e)}"
                     self.log.error(error_msg, exc_info=True)
                     errors.append(error_msg)
+                    continue
+
+                if result["success"]:
+                    successes.append(target)
+                    if result["skipped"]:
+                        skipped.append(target)
+                else:
+                    self.log.error(f"{result['error']}\n{result['logs']}")
+                    errors.append(result["error"])
 
             # Prepare response
             response = {
                 "success": len(errors) == 0,
                 "successes": successes,
+                "skipped": skipped,
                 "message": f"Successfully transpiled to: {', '.join(successes)}" if successes else "No successful transformations"
             }
 
@@ -124,13 +113,18 @@ class PlatformToCrop2MLHandler(APIHandler):
         "platform-to-Crop2ML": {
             "Path": "path/to/package",
             "Languages": ["Java", "Python", ...],
-            "Platforms": ["Simplace", "Bioma", ...]
+            "Platforms": ["Simplace", "Bioma", ...],
+            "Force": false
         }
     }
+
+    The targets whose inputs did not change since their last successful
+    transpilation are skipped, and listed in the 'skipped' field of the
+    response, unless "Force" is true.
     """
 
     @tornado.web.authenticated
-    def post(self):
+    async def post(self):
         try:
             data = self.get_json_body()
             self.log.info(f"Received package transformation request")
@@ -138,6 +132,7 @@ class PlatformToCrop2MLHandler(APIHandler):
             path = data.get('Path', '')
             languages = data.get('Languages', {})
             platforms = data.get('Platforms', {})
+            force = data.get('Force', False)
 
             # Validation
             if not path:
@@ -147,39 +142,7 @@ class PlatformToCrop2MLHandler(APIHandler):
                 }))
                 return
 
-            # Combine languages and platforms into one list
-            target_list = []
-
-            # Map UI names to transpiler codes
-            language_map = {
-                'Java': 'java',
-                'CSharp': 'cs',
-                'Fortran': 'f90',
-                'Python': 'py',
-                'R': 'r',
-                'Cpp': 'cpp'
-            }
-
-            platform_map = {
-                'Simplace': 'simplace',
-                'Bioma': 'bioma',
-                'Dssat': 'dssat',
-                'OpenAlea': 'openalea',
-                'Record': 'record',
-                'Stics': 'stics',
-                'Apsim': 'apsim',
-                'Sirius': 'sirius'
-            }
-
-            # Add selected languages (check boolean values)
-            for lang_name, lang_code in language_map.items():
-                if languages.get(lang_name, False):
-                    target_list.append(lang_code)
-
-            # Add selected platforms (check boolean values)
-            for platform_name, platform_code in platform_map.items():
-                if platforms.get(platform_name, False):
-                    target_list.append(platform_code)
+            target_list = get_target_list(languages, platforms)
 
             self.log.warning(f"TARGET {target_list}")
             if not target_list:
@@ -192,21 +155,34 @@ class PlatformToCrop2MLHandler(APIHandler):
             # Perform transformation for each target
             errors = []
             successes = []
+            skipped = []
 
+            # The components are all written back to the package Crop2ML
+            # tree, so the targets are transpiled one after the other
             for target in target_list:
+                self.log.info(f"Transpiling package {path} to {target}")
                 try:
-                    self.log.info(f"Transpiling package {path} to {target}")
-                    transpile_component(path, path, target)
-                    successes.append(target)
+                    with phase(self, "transform"):
+                        result = await run_transpile(path, target, True, force)
                 except Exception as e:
                     error_msg = f"Error transpiling to {target}: {str(e)}"
                     self.log.error(error_msg, exc_info=True)
                     errors.append(error_msg)
+                    continue
+
+                if result["success"]:
+                    successes.append(target)
+                    if result["skipped"]:
+                        skipped.append(target)
+                else:
+                    self.log.error(f"{result['error']}\n{result['logs']}")
+                    errors.append(result["error"])
 
             # Prepare response
             response = {
                 "success": len(errors) == 0,
                 "successes": successes,
+                "skipped": skipped,
                 "message": f"Successfully transpiled to: {', '.join(successes)}" if successes else "No successful transformations"
             }
 
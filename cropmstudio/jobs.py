@@ -0,0 +1,276 @@
+"""
+Background transpilation jobs
+
+A job transpiles a package to a list of targets in the background. The client
+gets the job id back right away, then polls the job status for the progress
+of each target and the captured transpiler logs, and may cancel it.
+
+At most max_jobs jobs run at the same time, the other ones wait in the queue.
+
+The transpilations of the jobs and of the synchronous transform handlers go
+through run_transpile, which holds a lock per package. Besides its own
+src/<target> output, pycropml rewrites files shared by all the targets of a
+package (src/pyx, the src and test directories), so the transpilations of a
+package run one after the other, the ones of different packages concurrently.
+"""
+
+
+import asyncio
+import os
+import time
+import uuid
+import weakref
+
+from .crop2ml_utils.transpile import transpile
+from .executor import run_in_process
+
+
+DEFAULT_MAX_JOBS = 2
+
+# Number of finished jobs kept for status polling
+MAX_FINISHED_JOBS = 100
+
+# Locks of the transpiled packages, dropped once unused
+_locks = weakref.WeakValueDictionary()
+
+
+def transpile_lock(path):
+    """
+    Returns the transpilation lock of a package, must be called from the
+    event loop
+    """
+    key = os.path.normcase(os.path.abspath(path))
+    lock = _locks.get(key)
+    if lock is None:
+        lock = _locks[key] = asyncio.Lock()
+    return lock
+
+
+async def run_transpile(path, target, component=False, force=False):
+    """
+    Transpiles a package target in a worker process, once the other
+    transpilations of the package are done
+
+    Returns:
+        The result of crop2ml_utils.transpile.transpile
+    """
+    async with transpile_lock(path):
+        return await run_in_process(transpile, path, target, component, force)
+
+
+class Job():
+    """
+    A transpilation job and its progress
+
+    Parameters : \n
+        - path : str, the package path
+        - targets : [str], the transpiler codes
+        - component : bool, whether to transpile from a platform to Crop2ML
+        - force : bool, whether to transpile the targets whose inputs did not change
+    """
+
+
+    def __init__(self, path, targets, component=False, force=False):
+
+        self.id = uuid.uuid4().hex
+        self.path = path
+        self.component = component
+        self.force = force
+        self.status = "queued"
+        self.targets = {target: {"status": "pending"} for target in targets}
+        self.logs = []
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+
+
+
+    @property
+    def done(self):
+        return self.status in ("completed", "failed", "cancelled")
+
+
+
+    def to_json(self):
+        """
+        Returns the job status as a JSON serializable dict
+        """
+
+        successes = [t for t, s in self.targets.items() if s["status"] in ("success", "skipped")]
+        errors = [s["error"] for s in self.targets.values() if s["status"] == "error"]
+
+        return {
+            "id": self.id,
+            "path": self.path,
+            "status": self.status,
+            "targets": self.targets,
+            "successes": successes,
+            "errors": errors,
+            "logs": "".join(self.logs),
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished
+        }
+
+
+class JobManager():
+    """
+    Queue of the transpilation jobs
+
+    Parameters : \n
+        - max_jobs : int, the number of jobs running at the same time
+    """
+
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS):
+
+        self.max_jobs = max_jobs
+        self._jobs = {}
+        self._queue = []
+        self._running = 0
+        self._tasks = set()
+
+
+
+    def submit(self, path, targets, component=False, force=False):
+        """
+        Queues a new job and returns it, must be called from the event loop
+        """
+
+        job = Job(path, targets, component, force)
+        self._jobs[job.id] = job
+        self._queue.append(job)
+        self._prune()
+        self._schedule()
+        return job
+
+
+
+    def get(self, job_id):
+        """
+        Returns the job with the given id, or None
+        """
+
+        return self._jobs.get(job_id)
+
+
+
+    def list(self):
+        """
+        Returns all the known jobs, most recent first
+        """
+
+        return sorted(self._jobs.values(), key=lambda job: job.created, reverse=True)
+
+
+
+    def cancel(self, job_id):
+        """
+        Cancels a job and returns it, or None if it does not exist
+
+        A queued job is cancelled right away. A running job is "cancelling"
+        until the targets being transpiled complete, the remaining ones are
+        not transpiled, then "cancelled".
+        """
+
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return job
+
+        job.cancel_requested = True
+        if job in self._queue:
+            self._queue.remove(job)
+            self._finish(job, "cancelled")
+        else:
+            job.status = "cancelling"
+        return job
+
+
+
+    def _schedule(self):
+        """
+        Starts queued jobs while there are free slots
+        """
+
+        while self._queue and self._running < self.max_jobs:
+            job = self._queue.pop(0)
+            self._running += 1
+            task = asyncio.ensure_future(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+
+
+    async def _run(self, job):
+        """
+        Transpiles the job targets, one after the other as they share files
+        of the package
+        """
+
+        job.status = "running"
+        job.started = time.time()
+        try:
+            for target in job.targets:
+                await self._run_target(job, target)
+
+            if job.cancel_requested:
+                self._finish(job, "cancelled")
+            elif any(state["status"] == "error" for state in job.targets.values()):
+                self._finish(job, "failed")
+            else:
+                self._finish(job, "completed")
+        finally:
+            self._running -= 1
+            self._schedule()
+
+
+
+    async def _run_target(self, job, target):
+        """
+        Transpiles one target of the job
+        """
+
+        state = job.targets[target]
+        if job.cancel_requested:
+            state["status"] = "cancelled"
+            return
+
+        state["status"] = "running"
+        try:
+            result = await run_transpile(job.path, target, job.component, job.force)
+        except Exception as e:
+            result = {"success": False, "error": f"Error transpiling to {target}: {str(e)}", "logs": ""}
+
+        if result["logs"]:
+            job.logs.append(f"[{target}]\n{result['logs']}")
+        if result["success"]:
+            state["status"] = "skipped" if result.get("skipped") else "success"
+        else:
+            state["status"] = "error"
+            state["error"] = result["error"]
+
+
+
+    def _finish(self, job, status):
+
+        job.status = status
+        job.finished = time.time()
+        for state in job.targets.values():
+            if state["status"] == "pending":
+                state["status"] = "cancelled"
+
+
+
+    def _prune(self):
+        """
+        Forgets the oldest finished jobs
+        """
+
+        finished = [job for job in self._jobs.values() if job.done]
+        finished.sort(key=lambda job: job.finished)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job.id]
+
+
+job_manager = JobManager()
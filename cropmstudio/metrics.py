@@ -0,0 +1,219 @@
+"""
+Request latency metrics
+
+When enabled, every handler is timed, and the handlers time the phases of
+their work (validate, parse, transform, write, serialize). The durations of
+each request are returned in its Server-Timing header, and aggregated in
+histograms served in the Prometheus text format by the metrics endpoint.
+
+When disabled, the handlers are not wrapped and phase() returns a shared
+no-op context manager, so the instrumentation costs an attribute lookup.
+"""
+
+
+from contextlib import contextmanager, nullcontext
+import time
+
+
+PHASES = ("validate", "parse", "transform", "write", "serialize")
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NO_PHASE = nullcontext()
+
+
+class Histogram():
+    """
+    Cumulative histogram of durations, in the Prometheus way
+    """
+
+
+    def __init__(self):
+
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+
+
+    def observe(self, seconds):
+
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+
+
+    def lines(self, name, labels):
+        """
+        Returns the Prometheus text lines of the histogram
+        """
+
+        lines = []
+        for bound, count in zip(BUCKETS, self.counts):
+            lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, count))
+        lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(name, labels, self.count))
+        lines.append('{}_sum{{{}}} {}'.format(name, labels, self.sum))
+        lines.append('{}_count{{{}}} {}'.format(name, labels, self.count))
+        return lines
+
+
+class PhaseTimer():
+    """
+    Durations of the phases of a request
+    """
+
+
+    def __init__(self):
+
+        self.start = time.perf_counter()
+        self.phases = {}
+
+
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times a phase, the durations of a phase timed several times add up
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+
+
+    def elapsed(self):
+
+        return time.perf_counter() - self.start
+
+
+
+    def header(self):
+        """
+        Returns the Server-Timing header value, with durations in milliseconds
+        """
+
+        timings = ['{};dur={:.2f}'.format(name, seconds * 1000) for name, seconds in self.phases.items()]
+        timings.append('total;dur={:.2f}'.format(self.elapsed() * 1000))
+        return ', '.join(timings)
+
+
+class Metrics():
+    """
+    Request and phase duration histograms, per endpoint
+
+    Parameters : \n
+        - enabled : bool, whether the handlers are timed
+    """
+
+
+    def __init__(self, enabled=False):
+
+        self.enabled = enabled
+        self._requests = {}
+        self._phases = {}
+
+
+
+    def observe(self, endpoint, method, status, timer):
+        """
+        Records the durations of a finished request
+        """
+
+        key = (endpoint, method, str(status))
+        self._requests.setdefault(key, Histogram()).observe(timer.elapsed())
+        for name, seconds in timer.phases.items():
+            self._phases.setdefault((endpoint, name), Histogram()).observe(seconds)
+
+
+
+    def reset(self):
+
+        self._requests.clear()
+        self._phases.clear()
+
+
+
+    def to_prometheus(self):
+        """
+        Returns the histograms in the Prometheus text exposition format
+        """
+
+        lines = [
+            '# HELP cropmstudio_request_duration_seconds Duration of the cropmstudio requests.',
+            '# TYPE cropmstudio_request_duration_seconds histogram'
+        ]
+        for (endpoint, method, status), histogram in sorted(self._requests.items()):
+            labels = 'endpoint="{}",method="{}",status="{}"'.format(endpoint, method, status)
+            lines += histogram.lines('cropmstudio_request_duration_seconds', labels)
+
+        lines += [
+            '# HELP cropmstudio_phase_duration_seconds Duration of the phases of the cropmstudio requests.',
+            '# TYPE cropmstudio_phase_duration_seconds histogram'
+        ]
+        for (endpoint, name), histogram in sorted(self._phases.items()):
+            labels = 'endpoint="{}",phase="{}"'.format(endpoint, name)
+            lines += histogram.lines('cropmstudio_phase_duration_seconds', labels)
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+def phase(handler, name):
+    """
+    Returns a context manager timing a phase of the handler request, which
+    does nothing if the handler is not timed
+    """
+    timer = getattr(handler, '_timer', None)
+    if timer is None:
+        return _NO_PHASE
+    return timer.phase(name)
+
+
+class TimedHandlerMixin():
+    """
+    Times the requests of a handler, adds their Server-Timing header and
+    records them in the metrics
+    """
+
+    endpoint = None
+
+
+    def __init__(self, *args, **kwargs):
+
+        self._timer = PhaseTimer()
+        super().__init__(*args, **kwargs)
+
+
+
+    def finish(self, *args, **kwargs):
+
+        # The headers of a streamed response are already sent
+        if not self._headers_written:
+            self.set_header('Server-Timing', self._timer.header())
+        return super().finish(*args, **kwargs)
+
+
+
+    def on_finish(self):
+
+        super().on_finish()
+        metrics.observe(self.endpoint, self.request.method, self.get_status(), self._timer)
+
+
+def instrument(handler, endpoint):
+    """
+    Returns the handler class timed under the endpoint name if the metrics
+    are enabled, or the handler class itself
+    """
+    if not metrics.enabled:
+        return handler
+    return type(handler.__name__, (TimedHandlerMixin, handler), {'endpoint': endpoint})
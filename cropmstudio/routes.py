@@ -4,7 +4,8 @@ from jupyter_server.base.handlers import APIHandler
 from jupyter_server.utils import url_path_join
 import tornado
 
-from .handlers import CreateModelHandler, CreatePackageHandler, GetModels, GetModelHeader, GetModelUnitInputsOutputs, GetModelUnitParametersets, GetModelUnitTestsets, GetPackagesHandler, ImportPackageHandler, PlatformToCrop2MLHandler, Crop2MLToPlatformHandler, DisplayModelHandler, DownloadPackageHandler
+from .handlers import ClonePackageHandler, CreateModelHandler, CreateModelsHandler, CreatePackageHandler, GetDependenciesHandler, GetModels, GetModelFull, GetModelHeader, GetModelUnitInputsOutputs, GetModelUnitParametersets, GetModelUnitTestsets, GetPackagesHandler, ImportPackageHandler, ImportPackageUploadHandler, MetricsHandler, PlatformToCrop2MLHandler, Crop2MLToPlatformHandler, RunSweepHandler, RunTestsHandler, DisplayModelHandler, DownloadPackageHandler, TransformJobHandler, TransformJobsHandler, UpdatePackageTemplateHandler
+from .metrics import instrument
 
 class HelloRouteHandler(APIHandler):
     # The following decorator should be present on all verb methods (head, get, post,
@@ -31,7 +32,9 @@ def setup_route_handlers(web_app):
         (hello_route_pattern, HelloRouteHandler),
 
         # GET handlers
+        (url_path_join(base_url, "cropmstudio", "get-dependencies"), GetDependenciesHandler),
         (url_path_join(base_url, "cropmstudio", "get-models"), GetModels),
+        (url_path_join(base_url, "cropmstudio", "get-model-full"), GetModelFull),
         (url_path_join(base_url, "cropmstudio", "get-model-header"), GetModelHeader),
         (url_path_join(base_url, "cropmstudio", "get-model-unit-inputs-outputs"), GetModelUnitInputsOutputs),
         (url_path_join(base_url, "cropmstudio", "get-model-unit-parametersets"), GetModelUnitParametersets),
@@ -39,13 +42,30 @@ def setup_route_handlers(web_app):
         (url_path_join(base_url, "cropmstudio", "get-packages"), GetPackagesHandler),
 
         # POST handlers
+        (url_path_join(base_url, "cropmstudio", "clone-package"), ClonePackageHandler),
         (url_path_join(base_url, "cropmstudio", "create-model"), CreateModelHandler),
+        (url_path_join(base_url, "cropmstudio", "create-models"), CreateModelsHandler),
         (url_path_join(base_url, "cropmstudio", "create-package"), CreatePackageHandler),
         (url_path_join(base_url, "cropmstudio", "display-model"), DisplayModelHandler),
         (url_path_join(base_url, "cropmstudio", "download-package"), DownloadPackageHandler),
         (url_path_join(base_url, "cropmstudio", "import-package"), ImportPackageHandler),
+        (url_path_join(base_url, "cropmstudio", "import-package-upload"), ImportPackageUploadHandler),
+        (url_path_join(base_url, "cropmstudio", "run-sweep"), RunSweepHandler),
+        (url_path_join(base_url, "cropmstudio", "run-tests"), RunTestsHandler),
         (url_path_join(base_url, "cropmstudio", "Crop2ML-to-platform"), Crop2MLToPlatformHandler),
-        (url_path_join(base_url, "cropmstudio", "platform-to-Crop2ML"), PlatformToCrop2MLHandler)
+        (url_path_join(base_url, "cropmstudio", "platform-to-Crop2ML"), PlatformToCrop2MLHandler),
+        (url_path_join(base_url, "cropmstudio", "update-package-template"), UpdatePackageTemplateHandler),
+
+        # Background jobs
+        (url_path_join(base_url, "cropmstudio", "jobs"), TransformJobsHandler),
+        (url_path_join(base_url, "cropmstudio", "jobs", "(Crop2ML-to-platform|platform-to-Crop2ML)"), TransformJobsHandler),
+        (url_path_join(base_url, "cropmstudio", "jobs", "([0-9a-f]{32})"), TransformJobHandler),
+
+        # Metrics
+        (url_path_join(base_url, "cropmstudio", "metrics"), MetricsHandler)
     ]
 
+    # Time the requests of the handlers, if the metrics are enabled
+    handlers = [(pattern, instrument(handler, handler.__name__)) for pattern, handler in handlers]
+
     web_app.add_handlers(host_pattern, handlers)
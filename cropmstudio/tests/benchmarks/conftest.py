@@ -0,0 +1,116 @@
+"""
+Fixtures of the benchmarks
+
+The benchmark fixture times a function over a few rounds and records the
+timings, which are written as JSON at the end of the session when
+--benchmark-json is given.
+"""
+import inspect
+import json
+import os
+import platform
+import statistics
+import time
+
+import pytest
+
+
+ROUNDS = 5
+
+class Benchmark():
+    """
+    Times a function and records the timings of the current test
+
+    Parameters : \n
+        - name : str, the benchmark name
+        - params : dict, the benchmark parameters (package size...)
+        - results : [dict], the session results
+    """
+
+
+    def __init__(self, name, params, results):
+
+        self.name = name
+        self.params = params
+        self.results = results
+
+
+
+    async def __call__(self, func, *args, rounds=ROUNDS, setup=None, **kwargs):
+        """
+        Calls func(*args, **kwargs) rounds times, after setup() if given,
+        and returns the last result. func may be a coroutine function.
+        """
+
+        timings = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            timings.append(time.perf_counter() - start)
+
+        self.record(timings)
+        return result
+
+
+
+    def record(self, timings):
+        """
+        Records durations measured by the test itself, in seconds
+        """
+
+        self.results.append({
+            "name": self.name,
+            "params": self.params,
+            "rounds": len(timings),
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.mean(timings),
+            "max": max(timings)
+        })
+
+
+@pytest.fixture(scope="session")
+def benchmark_results(request):
+    results = []
+    yield results
+
+    path = request.config.getoption("--benchmark-json")
+    if path and results:
+        with open(path, "w", encoding="utf8") as f:
+            json.dump({
+                "machine": {
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpus": os.cpu_count()
+                },
+                "created": time.time(),
+                "benchmarks": results
+            }, f, indent=2)
+
+
+@pytest.fixture
+def benchmark(request, benchmark_results):
+    """
+    Returns the Benchmark of the current test, named after the test function
+    and parameterized by its parameters
+    """
+    params = dict(request.node.callspec.params) if hasattr(request.node, "callspec") else {}
+    return Benchmark(request.node.originalname, params, benchmark_results)
+
+
+@pytest.fixture
+def sized_package(tmp_path):
+    """
+    Returns a function writing a synthetic package with size unit models and
+    a composition of all of them, and returning its path
+    """
+    from cropmstudio.crop2ml_utils.generate import generate_package
+
+    def _sized_package(size, name="Bench", **options):
+        return generate_package(os.fspath(tmp_path / "packages"), name, models=size, **options)
+
+    return _sized_package
@@ -0,0 +1,74 @@
+"""Benchmarks of the package handlers, driven through the server."""
+import base64
+from io import BytesIO
+import json
+import os
+import shutil
+from zipfile import ZipFile
+
+import pytest
+
+pytest.importorskip("pycropml")
+
+from cropmstudio.crop2ml_utils.svg_cache import svg_cache
+
+pytestmark = pytest.mark.benchmark
+
+
+def _zip(path):
+    archive = BytesIO()
+    with ZipFile(archive, "w") as zf:
+        for root, _, files in os.walk(path):
+            for file in files:
+                file_path = os.path.join(root, file)
+                zf.write(file_path, os.path.relpath(file_path, os.path.dirname(path)))
+    return archive.getvalue()
+
+
+@pytest.mark.parametrize("models", [10, 100, 500])
+async def test_download_package(benchmark, jp_fetch, sized_package, models):
+    path = sized_package(models)
+
+    response = await benchmark(jp_fetch, "cropmstudio", "download-package", params={"package": path})
+    assert response.code == 200
+    assert len(ZipFile(BytesIO(response.body)).namelist()) == 2 * models + 1
+
+
+@pytest.mark.parametrize("models", [10, 100, 500])
+async def test_import_package(benchmark, jp_fetch, sized_package, tmp_path, monkeypatch, models):
+    archive = _zip(sized_package(models, "Source"))
+    body = json.dumps({"package": "data:application/zip;base64," + base64.b64encode(archive).decode()})
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    monkeypatch.chdir(workspace)
+
+    def remove_package():
+        shutil.rmtree(workspace / "packages", ignore_errors=True)
+
+    response = await benchmark(jp_fetch, "cropmstudio", "import-package", method="POST", body=body,
+                               setup=remove_package)
+    assert response.code == 200
+    assert (workspace / "packages" / "Source" / "crop2ml" / "composition.Source.xml").is_file()
+
+
+@pytest.mark.parametrize("models", [5, 20, 50])
+async def test_display_model_cold(benchmark, jp_fetch, sized_package, models):
+    path = sized_package(models)
+
+    def clear_cache():
+        svg_cache.invalidate()
+        shutil.rmtree(os.path.join(path, ".cropmstudio", "svg"), ignore_errors=True)
+
+    response = await benchmark(jp_fetch, "cropmstudio", "display-model", method="POST",
+                               body=json.dumps({"Path": path}), rounds=3, setup=clear_cache)
+    assert json.loads(response.body)["success"]
+
+
+@pytest.mark.parametrize("models", [5, 20, 50])
+async def test_display_model_cached(benchmark, jp_fetch, sized_package, models):
+    path = sized_package(models)
+    body = json.dumps({"Path": path})
+    await jp_fetch("cropmstudio", "display-model", method="POST", body=body)
+
+    response = await benchmark(jp_fetch, "cropmstudio", "display-model", method="POST", body=body)
+    assert json.loads(response.body)["success"]
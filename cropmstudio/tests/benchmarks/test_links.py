@@ -0,0 +1,36 @@
+"""Benchmarks of the composition link validation."""
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from cropmstudio.crop2ml_utils.links import InterfaceIndex, validate_links
+
+pytestmark = pytest.mark.benchmark
+
+
+def _top_composition(path):
+    crop2ml = os.path.join(path, "crop2ml")
+    composition = ET.parse(os.path.join(crop2ml, f"composition.{os.path.basename(path)}.xml")).getroot().find("Composition")
+    listmodel = [model.get("filename") for model in composition.findall("Model")]
+    listlink = [{"Link type": link.tag, "Source": link.get("source"), "Target": link.get("target")}
+                for link in composition.find("Links")]
+    return crop2ml, listmodel, listlink
+
+
+@pytest.mark.parametrize("models", [10, 100, 1000])
+async def test_validate_links_cold(benchmark, sized_package, models):
+    crop2ml, listmodel, listlink = _top_composition(sized_package(models))
+    index = InterfaceIndex()
+
+    errors = await benchmark(validate_links, crop2ml, listmodel, listlink, index, setup=index.clear)
+    assert errors == []
+
+
+@pytest.mark.parametrize("models", [10, 100, 1000])
+async def test_validate_links_cached(benchmark, sized_package, models):
+    crop2ml, listmodel, listlink = _top_composition(sized_package(models))
+    index = InterfaceIndex()
+    validate_links(crop2ml, listmodel, listlink, index)
+
+    await benchmark(validate_links, crop2ml, listmodel, listlink, index)
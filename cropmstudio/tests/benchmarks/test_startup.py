@@ -0,0 +1,29 @@
+"""Benchmarks of the extension import, as done by the Jupyter server startup."""
+import subprocess
+import sys
+
+import pytest
+
+pytestmark = pytest.mark.benchmark
+
+
+IMPORT_TIME = """
+import time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+"""
+
+
+@pytest.mark.parametrize("module", ["cropmstudio", "cropmstudio.routes"])
+async def test_import_time(benchmark, module):
+    # Each import runs in a new interpreter, the jupyter_server imports
+    # shared by all the extensions are done beforehand
+    code = "import jupyter_server.base.handlers\n" + IMPORT_TIME.format(module=module)
+    timings = []
+    for _ in range(5):
+        output = subprocess.run([sys.executable, "-W", "ignore", "-c", code],
+                                check=True, capture_output=True, text=True).stdout
+        timings.append(float(output))
+
+    benchmark.record(timings)
@@ -0,0 +1,24 @@
+"""Benchmarks of the package transpilation."""
+import pytest
+
+pytest.importorskip("pycropml")
+
+from cropmstudio.crop2ml_utils.transpile import input_hashes, transpile
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("models", [5, 20, 50])
+async def test_transpile_py(benchmark, sized_package, models):
+    path = sized_package(models)
+
+    result = await benchmark(transpile, path, "py", force=True, rounds=3)
+    assert result["success"], result["logs"]
+
+
+@pytest.mark.parametrize("models", [10, 100, 500])
+async def test_input_hashes(benchmark, sized_package, models):
+    path = sized_package(models)
+
+    hashes = await benchmark(input_hashes, path)
+    assert len(hashes) == 2 * models + 1
@@ -0,0 +1,77 @@
+"""Benchmarks of the model xml parsing and writing."""
+import os
+
+import pytest
+
+pytest.importorskip("pycropml")
+
+from cropmstudio.crop2ml_utils import writecompositionXML, writeunitXML
+from cropmstudio.crop2ml_utils.cache import package_cache
+from cropmstudio.crop2ml_utils import records
+from cropmstudio.crop2ml_utils.utils import parse_xml
+
+pytestmark = pytest.mark.benchmark
+
+
+HEADER = {'Model type': 'unit', 'Model ID': 'Bench', 'Version': '1.0', 'Timestep': '1',
+          'Title': 'Bench', 'Authors': 'a', 'Institution': 'i', 'Reference': 'r',
+          'ExtendedDescription': 'e'}
+
+
+def _first_model(path):
+    return min(m for m in os.listdir(os.path.join(path, "crop2ml")) if m.startswith("unit.")).split(".")[1]
+
+
+@pytest.mark.parametrize("models", [10, 100, 1000])
+async def test_parse_xml_cold(benchmark, sized_package, models):
+    path = sized_package(models)
+    name = _first_model(path)
+
+    model = await benchmark(parse_xml, path, name, setup=lambda: package_cache.invalidate(path))
+    assert model.name == name
+
+
+@pytest.mark.parametrize("models", [10, 100, 1000])
+async def test_parse_xml_cached(benchmark, sized_package, models):
+    path = sized_package(models)
+    name = _first_model(path)
+    parse_xml(path, name)
+
+    await benchmark(parse_xml, path, name)
+
+
+@pytest.mark.parametrize("variables", [10, 100, 1000])
+async def test_write_unit(benchmark, tmp_path, variables):
+    directory = os.fspath(tmp_path)
+    os.makedirs(os.path.join(directory, "algo", "pyx"))
+    datas = dict(HEADER, **{'Path': directory, 'Model name': 'Bench'})
+    df = {'Inputs': [records.Variable(f"v{i}", "input & output", "v", "variable", "state", "DOUBLE",
+                                      default="0.0", min="0", max="1", unit="m") for i in range(variables)],
+          'Functions': [], 'init': False}
+    parametersets = {'default': records.Parameterset('default', 'default', {})}
+    testsets = {'check': records.Testset('check', 'check', 'default', tuple(
+        records.Test(f"t{j}", {f"v{i}": j for i in range(variables)}, {"v0": (j, 2)}) for j in range(10)))}
+    xml = os.path.join(directory, "unit.Bench.xml")
+
+    def remove_xml():
+        if os.path.exists(xml):
+            os.remove(xml)
+
+    await benchmark(writeunitXML(datas, df, parametersets, testsets)._write, setup=remove_xml)
+
+
+@pytest.mark.parametrize("models", [10, 100, 1000])
+async def test_write_composition(benchmark, tmp_path, models):
+    directory = os.fspath(tmp_path / "Bench" / "crop2ml")
+    os.makedirs(directory)
+    datas = dict(HEADER, **{'Path': directory, 'Model type': 'composition', 'Model name': 'Bench'})
+    listmodel = [f"unit.Model{i}.xml" for i in range(models)]
+    listlink = [{'Link type': 'InternalLink', 'Target': f"Model{i + 1}.tmin", 'Source': f"Model{i}.model{i}_out"}
+                for i in range(models - 1)]
+    xml = os.path.join(directory, "composition.Bench.xml")
+
+    def remove_xml():
+        if os.path.exists(xml):
+            os.remove(xml)
+
+    await benchmark(writecompositionXML(datas, listmodel, listlink).write, setup=remove_xml)
@@ -0,0 +1,25 @@
+"""Benchmarks of the xml serialization."""
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from cropmstudio.tests.test_xmlwriter import _write_unit
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.mark.parametrize("variables, tests", [(200, 0), (0, 2000)])
+def test_unit_writing_scales_linearly(tmp_path, variables, tests):
+    def best_time(scale):
+        return min(_write_unit(os.fspath(tmp_path / f"{scale}-{run}"), variables * scale, tests * scale)
+                   for run in range(3))
+
+    small, large = best_time(1), best_time(8)
+
+    root = ET.parse(os.fspath(tmp_path / "8-0" / "unit.Big.xml")).getroot()
+    assert len(root.find('Inputs')) == variables * 8
+    assert len(root.find('Testsets/Testset')) == tests * 8
+    # 8 times the data takes about 8 times longer, far from the 64 times of a
+    # quadratic serialization
+    assert large < small * 24
@@ -0,0 +1,67 @@
+import os
+
+import pytest
+
+
+UNIT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE Model PUBLIC " " "https://raw.githubusercontent.com/AgriculturalModelExchangeInitiative/crop2ml/master/ModelUnit.dtd">
+<ModelUnit modelid="{package}.{name}" name="{name}" timestep="1" version="1.0">
+\t<Description>
+\t\t<Title>{name} model</Title>
+\t\t<Authors>cropmstudio</Authors>
+\t\t<Institution>INRAE</Institution>
+\t\t<Reference>test</Reference>
+\t\t<ExtendedDescription>{name} test model</ExtendedDescription>
+\t</Description>
+
+\t<Inputs>
+\t\t<Input name="tmin" description="minimum temperature" inputtype="variable" variablecategory="exogenous" datatype="DOUBLE" default="0.0" min="-50.0" max="50.0" unit="degC" uri=""/>
+\t\t<Input name="rate" description="rate" inputtype="parameter" parametercategory="constant" datatype="DOUBLE" default="1.0" min="0.0" max="10.0" unit="" uri=""/>
+\t</Inputs>
+
+\t<Outputs>
+\t\t<Output name="{output}" description="output" variablecategory="state" datatype="DOUBLE" min="-500.0" max="500.0" unit="degC" uri=""/>
+\t</Outputs>
+
+\t<Algorithm language="Cyml" platform="" filename="algo/pyx/{lname}.pyx" />
+
+\t<Parametersets>
+\t\t<Parameterset name="default" description="default" >
+\t\t\t<Param name="rate">1.0</Param>
+\t\t</Parameterset>
+\t</Parametersets>
+
+\t<Testsets>
+
+\t\t<Testset name="check" parameterset="default" description="check" >
+\t\t\t<Test name="t1" >
+\t\t\t\t<InputValue name="tmin">2.0</InputValue>
+\t\t\t\t<OutputValue name="{output}" precision="2">2.0</OutputValue>
+\t\t\t</Test>
+\t\t</Testset>
+
+\t</Testsets>
+
+</ModelUnit>"""
+
+ALGO_PYX = """{output} = tmin * rate
+"""
+
+
+@pytest.fixture
+def make_package(tmp_path):
+    """
+    Returns a function writing a package with the given unit models under
+    tmp_path/packages and returning its path
+    """
+    def _make_package(name="Pkg", models=("Alpha", "Beta")):
+        path = tmp_path / "packages" / name
+        algo = path / "crop2ml" / "algo" / "pyx"
+        algo.mkdir(parents=True)
+        for model in models:
+            fields = {"package": name, "name": model, "lname": model.lower(), "output": f"{model.lower()}_out"}
+            (path / "crop2ml" / f"unit.{model}.xml").write_text(UNIT_XML.format(**fields), encoding="utf8")
+            (algo / f"{model.lower()}.pyx").write_text(ALGO_PYX.format(**fields), encoding="utf8")
+        return os.fspath(path)
+
+    return _make_package
@@ -0,0 +1,95 @@
+"""Python unit tests for the parsed package cache."""
+import os
+import threading
+
+import pytest
+
+pytest.importorskip("pycropml")
+
+from cropmstudio.crop2ml_utils import cache
+from cropmstudio.crop2ml_utils.cache import PackageCache
+
+
+def test_only_changed_files_are_parsed(make_package, monkeypatch):
+    path = make_package()
+    parsed = []
+    parse_unit_file = cache.parse_unit_file
+
+    def counting_parse(path, filename):
+        parsed.append(filename)
+        return parse_unit_file(path, filename)
+
+    monkeypatch.setattr(cache, "parse_unit_file", counting_parse)
+    package_cache = PackageCache()
+
+    names = sorted(m.name for m in package_cache.get_models(path))
+    assert names == ["Alpha", "Beta"]
+    assert sorted(parsed) == ["unit.Alpha.xml", "unit.Beta.xml"]
+
+    parsed.clear()
+    package_cache.get_models(path)
+    assert parsed == []
+
+    xml = os.path.join(path, "crop2ml", "unit.Beta.xml")
+    st = os.stat(xml)
+    os.utime(xml, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    package_cache.get_models(path)
+    assert parsed == ["unit.Beta.xml"]
+
+
+def test_least_recently_used_package_is_evicted(make_package):
+    first = make_package("First")
+    second = make_package("Second")
+    package_cache = PackageCache()
+
+    package_cache.get_models(first)
+    package_cache.max_bytes = package_cache._total
+    package_cache.get_models(second)
+
+    assert list(package_cache._packages) == [os.path.abspath(second)]
+
+
+def test_single_file_lookup_parses_only_that_file(make_package, monkeypatch):
+    path = make_package()
+    parsed = []
+    parse_unit_file = cache.parse_unit_file
+
+    def counting_parse(path, filename):
+        parsed.append(filename)
+        return parse_unit_file(path, filename)
+
+    monkeypatch.setattr(cache, "parse_unit_file", counting_parse)
+    package_cache = PackageCache()
+
+    models = package_cache.get_file_models(path, "unit.Beta.xml")
+    assert [m.name for m in models] == ["Beta"]
+    assert parsed == ["unit.Beta.xml"]
+
+    parsed.clear()
+    package_cache.get_models(path)
+    assert parsed == ["unit.Alpha.xml"]
+
+
+def test_parsing_does_not_block_other_packages(make_package, monkeypatch):
+    slow, fast = make_package("Slow"), make_package("Fast")
+    parse_unit_file = cache.parse_unit_file
+    parsing, release = threading.Event(), threading.Event()
+
+    def blocking_parse(path, filename):
+        if path == slow:
+            parsing.set()
+            release.wait(5)
+        return parse_unit_file(path, filename)
+
+    monkeypatch.setattr(cache, "parse_unit_file", blocking_parse)
+    package_cache = PackageCache()
+
+    thread = threading.Thread(target=package_cache.get_models, args=(slow,))
+    thread.start()
+    try:
+        assert parsing.wait(5)
+        assert sorted(m.name for m in package_cache.get_models(fast)) == ["Alpha", "Beta"]
+    finally:
+        release.set()
+        thread.join()
+    assert sorted(m.name for m in package_cache.get_models(slow)) == ["Alpha", "Beta"]
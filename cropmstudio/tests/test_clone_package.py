@@ -0,0 +1,106 @@
+"""Python unit tests for the package cloning."""
+import json
+import os
+import sys
+import types
+
+from cropmstudio.crop2ml_utils.clone import clone_package, rewrite_ids, unshare_links
+from cropmstudio.crop2ml_utils.transpile import transpile
+
+
+COMPOSITION = """<ModelComposition name="Pkg" id="Pkg.Pkg" version="1.0" timestep ="1">
+\t<Composition>
+\t\t<Model name="Alpha" id="Pkg.Alpha" filename="unit.Alpha.xml" />
+\t\t<Model name="Energy" id="Other.Energy" filename="unit.Energy.xml" package_name="Other" />
+\t</Composition>
+</ModelComposition>"""
+
+
+def test_ids_are_rewritten():
+    text = rewrite_ids(COMPOSITION, "Fork")
+
+    assert 'id="Fork.Pkg"' in text
+    assert 'id="Fork.Alpha"' in text
+    assert 'id="Other.Energy"' in text
+    assert text.replace("Fork.", "Pkg.") == COMPOSITION
+
+
+def test_dotted_ids_keep_the_model_name():
+    text = rewrite_ids(COMPOSITION.replace('"Pkg.', '"SQ.Wheat.'), "Fork")
+
+    assert 'id="Fork.Pkg"' in text
+    assert 'id="Fork.Alpha"' in text
+    assert 'id="Other.Energy"' in text
+    assert rewrite_ids('<ModelUnit modelid="SQ.Wheat.Alpha" name="Alpha">', "New.Pkg") == \
+        '<ModelUnit modelid="New.Pkg.Alpha" name="Alpha">'
+
+
+def test_package_is_cloned(make_package, tmp_path):
+    path = make_package()
+    src = os.path.join(path, "src", "py", "Pkg")
+    os.makedirs(src)
+    with open(os.path.join(src, "alpha.py"), "w") as f:
+        f.write("generated\n")
+    os.makedirs(os.path.join(path, ".cropmstudio", "svg"))
+
+    fork = str(tmp_path / "packages" / "Fork")
+    stats = clone_package(path, fork)
+
+    assert stats["rewritten"] == 2
+    assert stats["reflinked"] + stats["hardlinked"] + stats["copied"] == 3
+    assert not os.path.exists(os.path.join(fork, ".cropmstudio"))
+    assert sorted(os.listdir(tmp_path / "packages")) == ["Fork", "Pkg"]
+    with open(os.path.join(fork, "crop2ml", "unit.Alpha.xml")) as f:
+        assert 'modelid="Fork.Alpha"' in f.read()
+    with open(os.path.join(path, "crop2ml", "unit.Alpha.xml")) as f:
+        assert 'modelid="Pkg.Alpha"' in f.read()
+
+    # Writing to the generated files of the clone leaves the original as is
+    cloned = os.path.join(fork, "src", "py", "Pkg", "alpha.py")
+    unshare_links(os.path.join(fork, "src"))
+    assert os.stat(cloned).st_nlink == 1
+    with open(cloned, "w") as f:
+        f.write("changed\n")
+    with open(os.path.join(src, "alpha.py")) as f:
+        assert f.read() == "generated\n"
+
+
+async def test_clone_package_handler(jp_fetch, make_package, tmp_path, monkeypatch):
+    path = make_package()
+    monkeypatch.chdir(tmp_path)
+
+    response = await jp_fetch("cropmstudio", "clone-package", method="POST",
+                              body=json.dumps({"Path": path, "packageName": "Fork"}))
+
+    payload = json.loads(response.body)
+    assert payload["success"]
+    assert payload["files"]["rewritten"] == 2
+    assert os.path.isfile(tmp_path / "packages" / "Fork" / "crop2ml" / "unit.Beta.xml")
+
+    response = await jp_fetch("cropmstudio", "clone-package", method="POST", raise_error=False,
+                              body=json.dumps({"Path": path, "packageName": "Fork"}))
+    assert response.code == 400
+
+
+def test_transpiling_a_clone_leaves_the_shared_files_of_the_original(make_package, tmp_path, monkeypatch):
+    path = make_package()
+    pyx = os.path.join(path, "src", "pyx")
+    os.makedirs(pyx)
+    with open(os.path.join(pyx, "alpha.pyx"), "w") as f:
+        f.write("original\n")
+    fork = str(tmp_path / "packages" / "Fork")
+    clone_package(path, fork)
+
+    def transpile_package(package, target):
+        # As pycropml, the pyx code is rewritten for every target
+        with open(os.path.join(package, "src", "pyx", "alpha.pyx"), "w") as f:
+            f.write("transpiled\n")
+
+    cyml = types.ModuleType("pycropml.cyml")
+    cyml.transpile_package = cyml.transpile_component = transpile_package
+    monkeypatch.setitem(sys.modules, "pycropml", types.ModuleType("pycropml"))
+    monkeypatch.setitem(sys.modules, "pycropml.cyml", cyml)
+
+    assert transpile(fork, "java")["success"]
+    with open(os.path.join(pyx, "alpha.pyx")) as f:
+        assert f.read() == "original\n"
@@ -0,0 +1,94 @@
+"""Python unit tests for the batch model creation handler."""
+import json
+import os
+import threading
+
+from cropmstudio.handlers import create_model
+
+
+def _payload(path, name):
+    return {
+        "model-header": {
+            "Path": path, "Model type": "unit", "Model name": name, "Model ID": "Pkg",
+            "Version": "1.0", "Timestep": "1", "Title": name, "Authors": "a",
+            "Institution": "i", "Reference": "r", "ExtendedDescription": "e"
+        },
+        "unit/inputs-outputs": {"Inputs": [
+            {"Name": "tmin", "Type": "input", "Description": "tmin", "InputType": "variable",
+             "Category": "exogenous", "DataType": "DOUBLE", "Default": "0.0", "Min": "0", "Max": "1", "Unit": "degC"}
+        ]}
+    }
+
+
+async def test_models_are_created_in_one_request(jp_fetch, make_package):
+    path = make_package(models=())
+    payloads = [_payload(path, name) for name in ("Gamma", "Delta", "Epsilon")]
+
+    response = await jp_fetch("cropmstudio", "create-models", method="POST",
+                              body=json.dumps({"models": payloads}))
+
+    payload = json.loads(response.body)
+    assert payload["success"]
+    assert [r["model_name"] for r in payload["results"]] == ["Gamma", "Delta", "Epsilon"]
+    assert all(r["success"] for r in payload["results"])
+    for name in ("Gamma", "Delta", "Epsilon"):
+        assert os.path.isfile(os.path.join(path, "crop2ml", f"unit.{name}.xml"))
+
+
+async def test_nothing_is_written_if_a_model_is_invalid(jp_fetch, make_package):
+    path = make_package(models=())
+    payloads = [_payload(path, "Gamma"), _payload(path, ""), _payload(path, "Gamma")]
+
+    response = await jp_fetch("cropmstudio", "create-models", method="POST",
+                              body=json.dumps({"models": payloads}))
+
+    payload = json.loads(response.body)
+    assert not payload["success"]
+    assert [r["success"] for r in payload["results"]] == [True, False, False]
+    assert payload["results"][2]["error"] == "Duplicate model in the request"
+    assert os.listdir(os.path.join(path, "crop2ml")) == ["algo"]
+
+
+async def test_composition_can_use_the_units_of_the_request(jp_fetch, make_package):
+    path = make_package(models=())
+    units = [_payload(path, name) for name in ("Gamma", "Delta")]
+    for unit in units:
+        unit["unit/inputs-outputs"]["Inputs"].append(
+            {"Name": "out", "Type": "output", "Description": "out", "Category": "state",
+             "DataType": "DOUBLE", "Min": "0", "Max": "1", "Unit": "degC"})
+    composition = {
+        "model-header": dict(units[0]["model-header"], **{"Model type": "composition", "Model name": "Chain"}),
+        "composition/models": {"models": ["unit.Gamma.xml", "unit.Delta.xml"]},
+        "composition/links": {"links": [
+            {"Link type": "InputLink", "Source": "tmin", "Target": "Gamma.tmin"},
+            {"Link type": "InternalLink", "Source": "Gamma.out", "Target": "Delta.tmin"},
+            {"Link type": "OutputLink", "Source": "Delta.out", "Target": "out"}
+        ]}
+    }
+
+    response = await jp_fetch("cropmstudio", "create-models", method="POST",
+                              body=json.dumps({"models": units + [composition]}))
+
+    payload = json.loads(response.body)
+    assert payload["success"], payload
+    assert os.path.isfile(os.path.join(path, "crop2ml", "composition.Chain.xml"))
+
+
+async def test_models_are_validated_off_the_event_loop(jp_fetch, make_package, monkeypatch):
+    path = make_package(models=())
+    validate_model = create_model.validate_model
+    threads = []
+
+    def recording_validate_model(*args, **kwargs):
+        threads.append(threading.current_thread())
+        return validate_model(*args, **kwargs)
+
+    monkeypatch.setattr(create_model, "validate_model", recording_validate_model)
+
+    await jp_fetch("cropmstudio", "create-models", method="POST",
+                   body=json.dumps({"models": [_payload(path, "Gamma")]}))
+    await jp_fetch("cropmstudio", "create-model", method="POST",
+                   body=json.dumps(_payload(path, "Delta")))
+
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
@@ -0,0 +1,81 @@
+"""Python unit tests for the model dependency graph."""
+import json
+import os
+
+from cropmstudio.crop2ml_utils import dependencies as dependencies_module
+from cropmstudio.crop2ml_utils.dependencies import DependencyGraph, dependency_graph
+
+
+def _composition(path, name, models):
+    """
+    Writes a composition of the models, 'unit.<name>.xml' or
+    '<package>:unit.<name>.xml'
+    """
+    lines = ['<ModelComposition name="{0}" id="Pkg.{0}" version="1.0" timestep="1">'.format(name), '<Composition>']
+    for model in models:
+        package, _, filename = model.rpartition(':')
+        extra = ' package_name="{}"'.format(package) if package else ''
+        lines.append('<Model name="{0}" id="x.{0}" filename="{1}"{2} />'.format(filename.split('.')[1], filename, extra))
+    lines += ['<Links></Links>', '</Composition>', '</ModelComposition>']
+    with open(os.path.join(path, "crop2ml", f"composition.{name}.xml"), "w", encoding="utf8") as f:
+        f.write("\n".join(lines))
+
+
+def test_forward_and_reverse_indexes(make_package, tmp_path):
+    pkg = make_package("Pkg")
+    other = make_package("Other", models=("Energy",))
+    _composition(pkg, "Inner", ["unit.Alpha.xml", "Other:unit.Energy.xml"])
+    _composition(pkg, "Outer", ["composition.Inner.xml", "unit.Beta.xml"])
+    _composition(other, "Uses", ["Pkg:unit.Alpha.xml", "Pkg:unit.Missing.xml"])
+
+    graph = DependencyGraph([os.fspath(tmp_path / "packages")])
+
+    assert graph.dependencies("Pkg", "composition.Inner.xml") == [("Pkg", "unit.Alpha.xml"), ("Other", "unit.Energy.xml")]
+    assert graph.dependencies("Pkg", "composition.Outer.xml", recursive=True) == [
+        ("Pkg", "composition.Inner.xml"), ("Pkg", "unit.Beta.xml"),
+        ("Pkg", "unit.Alpha.xml"), ("Other", "unit.Energy.xml")]
+    assert graph.dependents("Pkg", "unit.Alpha.xml") == [("Other", "composition.Uses.xml"), ("Pkg", "composition.Inner.xml")]
+    assert graph.dependents("Other", "unit.Energy.xml", recursive=True) == [
+        ("Pkg", "composition.Inner.xml"), ("Pkg", "composition.Outer.xml")]
+    assert graph.resolve("Pkg", "unit.Missing.xml") is None
+    assert graph.resolve("Other", "unit.Energy.xml") == os.path.join(other, "crop2ml", "unit.Energy.xml")
+
+
+def test_only_changed_files_are_parsed(make_package, tmp_path, monkeypatch):
+    pkg = make_package("Pkg")
+    _composition(pkg, "First", ["unit.Alpha.xml"])
+    _composition(pkg, "Second", ["unit.Beta.xml"])
+    graph = DependencyGraph([os.fspath(tmp_path / "packages")])
+    graph.dependents("Pkg", "unit.Alpha.xml")
+
+    parsed = []
+    read = dependencies_module.read_dependencies
+
+    def counting_read(file_path, package):
+        parsed.append(os.path.basename(file_path))
+        return read(file_path, package)
+
+    monkeypatch.setattr(dependencies_module, "read_dependencies", counting_read)
+    assert graph.dependents("Pkg", "unit.Alpha.xml") == [("Pkg", "composition.First.xml")]
+    assert parsed == []
+
+    _composition(pkg, "First", ["unit.Beta.xml", "unit.Alpha.xml", "unit.Gamma.xml"])
+    os.remove(os.path.join(pkg, "crop2ml", "composition.Second.xml"))
+
+    assert graph.dependents("Pkg", "unit.Beta.xml") == [("Pkg", "composition.First.xml")]
+    assert graph.dependents("Pkg", "unit.Gamma.xml") == [("Pkg", "composition.First.xml")]
+    assert parsed == ["composition.First.xml"]
+
+
+async def test_get_dependencies_handler(jp_fetch, make_package, tmp_path, monkeypatch):
+    pkg = make_package("Pkg")
+    _composition(pkg, "Main", ["unit.Alpha.xml", "unit.Beta.xml"])
+    monkeypatch.setattr(dependency_graph, "roots", [os.fspath(tmp_path / "packages")])
+
+    response = await jp_fetch("cropmstudio", "get-dependencies", params={"package": pkg, "model": "unit.Alpha.xml"})
+
+    payload = json.loads(response.body)
+    assert payload["model"] == {"package": "Pkg", "model": "unit.Alpha.xml",
+                                "path": os.path.join(pkg, "crop2ml", "unit.Alpha.xml")}
+    assert payload["dependencies"] == []
+    assert [node["model"] for node in payload["dependents"]] == ["composition.Main.xml"]
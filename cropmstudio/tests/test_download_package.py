@@ -0,0 +1,51 @@
+"""Python unit tests for the package download handler."""
+from io import BytesIO
+import json
+import os
+from urllib.parse import parse_qs, urlparse
+from zipfile import ZipFile
+
+
+async def test_download_url_is_returned(jp_fetch, make_package):
+    path = make_package()
+
+    response = await jp_fetch("cropmstudio", "download-package", method="POST",
+                              body=json.dumps({"Path": path}))
+
+    payload = json.loads(response.body)
+    assert payload["success"]
+    assert payload["filename"] == "Pkg.zip"
+    url = urlparse(payload["download"])
+    assert url.path.endswith("/cropmstudio/download-package")
+    assert parse_qs(url.query) == {"package": [path]}
+
+
+async def test_package_is_downloaded_as_zip(jp_fetch, make_package):
+    path = make_package()
+    # Larger than a chunk of the response
+    content = os.urandom(600 * 1024)
+    with open(os.path.join(path, "crop2ml", "data.bin"), "wb") as f:
+        f.write(content)
+    os.makedirs(os.path.join(path, ".cropmstudio"))
+    with open(os.path.join(path, ".cropmstudio", "index.json"), "w") as f:
+        f.write("{}")
+
+    response = await jp_fetch("cropmstudio", "download-package", params={"package": path})
+
+    assert response.code == 200
+    assert response.headers["Content-Type"] == "application/zip"
+    assert response.headers["Content-Disposition"] == "attachment; filename*=UTF-8''Pkg.zip"
+    with ZipFile(BytesIO(response.body)) as zf:
+        assert zf.testzip() is None
+        names = zf.namelist()
+        assert zf.read("Pkg/crop2ml/data.bin") == content
+    assert "Pkg/crop2ml/unit.Alpha.xml" in names
+    assert "Pkg/crop2ml/algo/pyx/beta.pyx" in names
+    assert not any(name.startswith("Pkg/.cropmstudio") for name in names)
+
+
+async def test_missing_package_is_not_found(jp_fetch, tmp_path):
+    response = await jp_fetch("cropmstudio", "download-package",
+                              params={"package": os.fspath(tmp_path / "Missing")}, raise_error=False)
+
+    assert response.code == 404
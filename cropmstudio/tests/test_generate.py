@@ -0,0 +1,43 @@
+"""Python unit tests for the synthetic package generator."""
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from cropmstudio.crop2ml_utils.generate import generate_package, main
+from cropmstudio.crop2ml_utils.utils import get_models
+
+
+def test_package_layout(tmp_path):
+    path = generate_package(os.fspath(tmp_path), "Pkg", models=3, variables=3,
+                            parametersets=2, testsets=3, tests=4)
+
+    assert sorted(get_models(path)) == ["composition.Pkg.xml", "unit.Model0.xml",
+                                        "unit.Model1.xml", "unit.Model2.xml"]
+    assert sorted(os.listdir(os.path.join(path, "crop2ml", "algo", "pyx"))) == ["model0.pyx", "model1.pyx", "model2.pyx"]
+
+    unit = ET.parse(os.path.join(path, "crop2ml", "unit.Model1.xml")).getroot()
+    assert [i.get("name") for i in unit.find("Inputs")] == ["x", "p1", "p2"]
+    assert len(unit.find("Parametersets")) == 2
+    testsets = unit.find("Testsets")
+    assert len(testsets) == 3 and all(len(testset) == 4 for testset in testsets)
+
+    # The expected outputs follow the algorithm: x + p1 + p2, with the
+    # parameters of the parameterset of the testset
+    test = testsets[1].find("Test[@name='test2']")
+    assert testsets[1].get("parameterset") == "set1"
+    assert float(test.find("OutputValue").text) == pytest.approx(2.0 + 1.1 + 1.2)
+
+
+def test_composition_depth(tmp_path):
+    main([os.fspath(tmp_path), "--name", "Deep", "--models", "27", "--depth", "3"])
+    crop2ml = tmp_path / "Deep" / "crop2ml"
+
+    compositions = sorted(f.name for f in crop2ml.glob("composition.*.xml"))
+    assert len(compositions) == 1 + 3 + 9
+
+    top = ET.parse(crop2ml / "composition.Deep.xml").getroot()
+    children = [model.get("filename") for model in top.find("Composition").findall("Model")]
+    assert children == [f"composition.Level1Group{i}.xml" for i in range(3)]
+    for filename in children:
+        assert (crop2ml / filename).is_file()
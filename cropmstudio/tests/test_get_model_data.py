@@ -0,0 +1,37 @@
+"""Python unit tests for the model data handlers."""
+import json
+
+import pytest
+
+pytest.importorskip("pycropml")
+
+
+async def test_get_model_full(jp_fetch, make_package):
+    path = make_package()
+
+    response = await jp_fetch("cropmstudio", "get-model-full", params={"package": path, "model": "unit.Alpha.xml"})
+
+    assert response.code == 200
+    payload = json.loads(response.body)
+    assert payload["success"]
+    assert set(payload["data"]) == {"header", "inputs-outputs", "parametersets", "testsets"}
+    assert payload["data"]["header"]["Model name"] == "Alpha"
+    assert payload["data"]["parametersets"]["parametersets"][0]["parameters"] == {"rate": "1.0"}
+
+
+async def test_get_model_full_sections(jp_fetch, make_package):
+    path = make_package()
+
+    response = await jp_fetch("cropmstudio", "get-model-full", params={"package": path, "model": "unit.Alpha.xml", "sections": "header,testsets"})
+
+    payload = json.loads(response.body)
+    assert set(payload["data"]) == {"header", "testsets"}
+
+
+async def test_get_model_header_is_a_single_section(jp_fetch, make_package):
+    path = make_package()
+
+    full = await jp_fetch("cropmstudio", "get-model-full", params={"package": path, "model": "unit.Alpha.xml"})
+    header = await jp_fetch("cropmstudio", "get-model-header", params={"package": path, "model": "unit.Alpha.xml"})
+
+    assert json.loads(header.body)["data"] == json.loads(full.body)["data"]["header"]
@@ -0,0 +1,39 @@
+"""Python unit tests for the package import handlers."""
+from io import BytesIO
+import json
+import os
+from zipfile import ZIP_STORED, ZipFile
+
+
+async def test_import_package_upload(jp_fetch, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    archive = BytesIO()
+    with ZipFile(archive, "w") as zf:
+        zf.writestr("Pkg/crop2ml/unit.Alpha.xml", "<ModelUnit/>")
+
+    response = await jp_fetch(
+        "cropmstudio", "import-package-upload",
+        method="PUT", body=archive.getvalue(), params={"upload_id": "abc"},
+        headers={"Content-Type": "application/zip"}
+    )
+
+    assert response.code == 200
+    assert json.loads(response.body) == {"success": True, "size": len(archive.getvalue())}
+    assert (tmp_path / "packages" / "Pkg" / "crop2ml" / "unit.Alpha.xml").read_text() == "<ModelUnit/>"
+
+
+async def test_import_package_upload_in_several_chunks(jp_fetch, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    content = os.urandom(1 << 20)
+    archive = BytesIO()
+    with ZipFile(archive, "w", ZIP_STORED) as zf:
+        zf.writestr("Pkg/data/large.bin", content)
+
+    response = await jp_fetch(
+        "cropmstudio", "import-package-upload",
+        method="PUT", body=archive.getvalue(), params={"upload_id": "abc"},
+        headers={"Content-Type": "application/zip"}
+    )
+
+    assert response.code == 200
+    assert (tmp_path / "packages" / "Pkg" / "data" / "large.bin").read_bytes() == content
@@ -0,0 +1,96 @@
+"""Python unit tests for the background transpilation jobs."""
+import asyncio
+import json
+import os
+
+from cropmstudio import jobs
+from cropmstudio.jobs import JobManager
+
+
+def _fake_transpile(monkeypatch):
+    """
+    Replaces the worker call with one waiting for its release, and returns
+    the started (path, target) and the release event
+    """
+    started = []
+    release = asyncio.Event()
+
+    async def run_in_process(func, path, target, component, force):
+        started.append((path, target))
+        await release.wait()
+        return {"target": target, "success": True, "skipped": False, "logs": ""}
+
+    monkeypatch.setattr(jobs, "run_in_process", run_in_process)
+    return started, release
+
+
+async def _until(condition):
+    for _ in range(500):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timed out")
+
+
+async def test_running_job_is_cancelling_until_its_target_completes(monkeypatch):
+    started, release = _fake_transpile(monkeypatch)
+    manager = JobManager()
+    job = manager.submit("pkg", ["py"])
+    await _until(lambda: started)
+
+    assert manager.cancel(job.id).status == "cancelling"
+    assert not job.done
+
+    release.set()
+    await _until(lambda: job.done)
+    assert job.status == "cancelled"
+    assert job.targets == {"py": {"status": "success"}}
+
+
+async def test_transpilations_of_a_package_are_serialized(monkeypatch):
+    started, release = _fake_transpile(monkeypatch)
+    manager = JobManager()
+    first, second = manager.submit("pkg", ["py"]), manager.submit("pkg", ["java"])
+    await _until(lambda: started and second.status == "running")
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert started == [("pkg", "py")]
+
+    release.set()
+    await _until(lambda: first.done and second.done)
+    assert started == [("pkg", "py"), ("pkg", "java")]
+
+
+async def test_targets_of_a_fresh_package_are_transpiled_one_at_a_time(jp_fetch, make_package, monkeypatch):
+    path = make_package()
+    running = []
+
+    async def run_in_process(func, path, target, component, force):
+        # As pycropml, create the shared directories and rewrite the pyx code
+        assert not running, f"{target} transpiled while {running} is running"
+        running.append(target)
+        try:
+            for directory in ("src", "test", os.path.join("test", target)):
+                if not os.path.isdir(os.path.join(path, directory)):
+                    await asyncio.sleep(0.01)
+                    os.mkdir(os.path.join(path, directory))
+            await asyncio.sleep(0.01)
+        finally:
+            running.remove(target)
+        return {"target": target, "success": True, "skipped": False, "logs": ""}
+
+    monkeypatch.setattr(jobs, "run_in_process", run_in_process)
+    body = json.dumps({"Path": path, "Languages": {"Python": True, "Java": True}, "Platforms": {}})
+
+    job_response, response = await asyncio.gather(
+        jp_fetch("cropmstudio", "jobs", "Crop2ML-to-platform", method="POST",
+                 body=json.dumps({"Path": path, "Languages": {"CSharp": True}, "Platforms": {}})),
+        jp_fetch("cropmstudio", "Crop2ML-to-platform", method="POST", body=body))
+
+    payload = json.loads(response.body)
+    assert payload["success"], payload
+    assert sorted(payload["successes"]) == ["java", "py"]
+    job = jobs.job_manager.get(json.loads(job_response.body)["job"]["id"])
+    await _until(lambda: job.done)
+    assert job.status == "completed"
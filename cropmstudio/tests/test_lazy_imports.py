@@ -0,0 +1,19 @@
+"""Python unit tests for the deferred imports of the extension."""
+import json
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ["pycropml", "cookiecutter", "IPython"]
+
+
+def test_loading_the_extension_does_not_import_heavy_modules():
+    code = (
+        "import json, sys\n"
+        "import cropmstudio, cropmstudio.config, cropmstudio.routes\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+    output = subprocess.run([sys.executable, "-W", "ignore", "-c", code],
+                            check=True, capture_output=True, text=True).stdout
+
+    assert json.loads(output) == []
@@ -0,0 +1,114 @@
+"""Python unit tests for the composition link validation."""
+import json
+import os
+import xml.etree.ElementTree as ET
+
+from cropmstudio.crop2ml_utils.generate import generate_package
+from cropmstudio.crop2ml_utils.links import InterfaceIndex, validate_links
+
+
+def _chain(names):
+    links = [{"Link type": "InputLink", "Source": "x", "Target": f"{names[0]}.x"}]
+    for source, target in zip(names, names[1:]):
+        links.append({"Link type": "InternalLink", "Source": f"{source}.{source.lower()}_out", "Target": f"{target}.x"})
+    links.append({"Link type": "OutputLink", "Source": f"{names[-1]}.{names[-1].lower()}_out", "Target": "out"})
+    return links
+
+
+def _read_composition(file_path):
+    composition = ET.parse(file_path).getroot().find("Composition")
+    listmodel = [model.get("filename") for model in composition.findall("Model")]
+    listlink = [{"Link type": link.tag, "Source": link.get("source"), "Target": link.get("target")}
+                for link in composition.find("Links")]
+    return listmodel, listlink
+
+
+def test_generated_compositions_are_valid(tmp_path):
+    path = generate_package(os.fspath(tmp_path), "Pkg", models=9, depth=2)
+    crop2ml = os.path.join(path, "crop2ml")
+
+    for filename in os.listdir(crop2ml):
+        if filename.startswith("composition."):
+            listmodel, listlink = _read_composition(os.path.join(crop2ml, filename))
+            assert validate_links(crop2ml, listmodel, listlink) == []
+
+
+def test_invalid_links_are_reported(tmp_path):
+    path = generate_package(os.fspath(tmp_path), "Pkg", models=3, depth=0)
+    crop2ml = os.path.join(path, "crop2ml")
+    listmodel = ["unit.Model0.xml", "unit.Model1.xml", "unit.Model2.xml"]
+
+    links = _chain(["Model0", "Model1", "Model2"]) + [
+        {"Link type": "InternalLink", "Source": "Model3.model3_out", "Target": "Model0.p1"},
+        {"Link type": "InternalLink", "Source": "Model0.x", "Target": "Model1.p1"},
+        {"Link type": "InputLink", "Source": "y", "Target": "Model1.x"},
+        {"Link type": "Link", "Source": "a", "Target": "b"},
+    ]
+    errors = validate_links(crop2ml, listmodel, links)
+
+    assert errors == [
+        "InternalLink Model3.model3_out -> Model0.p1: unknown model Model3",
+        "InternalLink Model0.x -> Model1.p1: Model0 has no output x",
+        "InputLink y -> Model1.x: input Model1.x is already linked",
+        "Link a -> b: unknown link type",
+    ]
+
+
+def test_cycles_are_detected(tmp_path):
+    path = generate_package(os.fspath(tmp_path), "Pkg", models=3, depth=0)
+    crop2ml = os.path.join(path, "crop2ml")
+    listmodel = ["unit.Model0.xml", "unit.Model1.xml", "unit.Model2.xml", "unit.Missing.xml"]
+
+    links = _chain(["Model1", "Model2", "Model0"])
+    links.append({"Link type": "InternalLink", "Source": "Model0.model0_out", "Target": "Model1.p1"})
+
+    assert validate_links(crop2ml, listmodel, links) == [
+        "Model file not found: unit.Missing.xml",
+        "Cycle in the internal links: Model1 -> Model2 -> Model0 -> Model1",
+    ]
+
+
+def test_interfaces_are_cached_until_the_file_changes(tmp_path):
+    path = generate_package(os.fspath(tmp_path), "Pkg", models=1, depth=0)
+    file_path = os.path.join(path, "crop2ml", "unit.Model0.xml")
+    index = InterfaceIndex()
+
+    interface = index.get(file_path)
+    assert interface.inputs == {"x", "p1", "p2", "p3"}
+    assert index.get(file_path) is interface
+
+    with open(file_path, encoding="utf8") as f:
+        text = f.read()
+    with open(file_path, "w", encoding="utf8") as f:
+        f.write(text.replace('name="p3"', 'name="rate"'))
+    assert "rate" in index.get(file_path).inputs
+
+
+async def test_invalid_composition_is_not_written(jp_fetch, make_package):
+    path = make_package()
+    header = {
+        "Path": path, "Model type": "composition", "Model name": "Pkg", "Model ID": "Pkg",
+        "Version": "1.0", "Timestep": "1", "Title": "Pkg", "Authors": "a",
+        "Institution": "i", "Reference": "r", "ExtendedDescription": "e"
+    }
+    payload = {
+        "model-header": header,
+        "composition/models": {"models": ["unit.Alpha.xml", "unit.Beta.xml"]},
+        "composition/links": {"links": [
+            {"Link type": "InputLink", "Source": "", "Target": "Alpha.tmin"},
+            {"Link type": "InternalLink", "Source": "Alpha.alpha_out", "Target": "Beta.tmax"},
+        ]}
+    }
+
+    response = await jp_fetch("cropmstudio", "create-models", method="POST", body=json.dumps({"models": [payload]}))
+
+    result = json.loads(response.body)["results"][0]
+    assert not result["success"]
+    assert result["error"] == "Invalid composition links: InternalLink Alpha.alpha_out -> Beta.tmax: Beta has no input tmax"
+    assert not os.path.exists(os.path.join(path, "crop2ml", "composition.Pkg.xml"))
+
+    payload["composition/links"]["links"][1]["Target"] = "Beta.tmin"
+    response = await jp_fetch("cropmstudio", "create-model", method="POST", body=json.dumps(payload))
+
+    assert json.loads(response.body)["success"]
+    assert os.path.isfile(os.path.join(path, "crop2ml", "composition.Pkg.xml"))
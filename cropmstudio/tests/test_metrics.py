@@ -0,0 +1,44 @@
+"""Python unit tests for the request metrics."""
+import json
+
+import pytest
+
+from cropmstudio.metrics import metrics
+
+
+@pytest.fixture
+def jp_server_config(jp_server_config, tmp_path):
+    settings = {"metrics": True, "package_roots": [str(tmp_path / "packages")]}
+    config = dict(jp_server_config)
+    config["ServerApp"] = dict(config["ServerApp"], tornado_settings={"cropmstudio": settings})
+    return config
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    yield
+    metrics.enabled = False
+    metrics.reset()
+
+
+async def test_requests_are_timed(jp_fetch, make_package):
+    path = make_package()
+
+    response = await jp_fetch("cropmstudio", "get-packages")
+
+    assert json.loads(response.body)["packages"] == [path]
+    timings = dict(t.split(";dur=") for t in response.headers["Server-Timing"].split(", "))
+    assert list(timings) == ["parse", "serialize", "total"]
+
+    response = await jp_fetch("cropmstudio", "metrics")
+    text = response.body.decode()
+    assert response.headers["Content-Type"].startswith("text/plain")
+    assert 'cropmstudio_request_duration_seconds_count{endpoint="GetPackagesHandler",method="GET",status="200"} 1' in text
+    assert 'cropmstudio_phase_duration_seconds_count{endpoint="GetPackagesHandler",phase="parse"} 1' in text
+
+
+async def test_metrics_endpoint_is_not_found_when_disabled(jp_fetch):
+    metrics.enabled = False
+    with pytest.raises(Exception) as e:
+        await jp_fetch("cropmstudio", "metrics")
+    assert e.value.code == 404
@@ -0,0 +1,45 @@
+"""Python unit tests for the package index."""
+import os
+
+from cropmstudio.crop2ml_utils import package_index as index_module
+from cropmstudio.crop2ml_utils.package_index import PackageIndex
+
+
+def test_packages_are_summarized(make_package, tmp_path):
+    path = make_package()
+    (tmp_path / "packages" / "notes.txt").write_text("not a package")
+    os.makedirs(os.path.join(path, "src", "py"))
+
+    index = PackageIndex([os.fspath(tmp_path / "packages")])
+    packages = index.get_packages()
+
+    assert [p["name"] for p in packages] == ["Pkg"]
+    summary = packages[0]
+    assert summary["path"] == path
+    assert summary["models"] == {"unit": 2, "composition": 0}
+    assert summary["size"] > 0
+    assert summary["targets"] == ["py"]
+
+
+def test_index_is_invalidated_by_directory_mtime(make_package, tmp_path, monkeypatch):
+    first = make_package("First")
+    index = PackageIndex([os.fspath(tmp_path / "packages")])
+    index.get_packages()
+
+    scanned = []
+    scan_files = index_module._scan_files
+
+    def counting_scan(directory):
+        scanned.append(directory)
+        return scan_files(directory)
+
+    monkeypatch.setattr(index_module, "_scan_files", counting_scan)
+    index.get_packages()
+    assert scanned == []
+
+    make_package("Second", models=("Gamma",))
+    os.remove(os.path.join(first, "crop2ml", "unit.Beta.xml"))
+    packages = {p["name"]: p for p in index.get_packages()}
+
+    assert packages["First"]["models"]["unit"] == 1
+    assert packages["Second"]["models"]["unit"] == 1
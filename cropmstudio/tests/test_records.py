@@ -0,0 +1,28 @@
+"""Python unit tests for the model records."""
+from cropmstudio.crop2ml_utils import records
+
+
+def test_variable_json_round_trip():
+    item = {"Type": "input", "Name": "tmin", "Description": "minimum temperature",
+            "Category": "exogenous", "DataType": "DOUBLE", "Unit": "degC",
+            "InputType": "variable", "Default": "0.0", "Min": "-50.0", "Max": "50.0"}
+
+    var = records.Variable.from_json(item)
+    assert var.len == "" and var.uri == ""
+    assert var.to_json() == item
+
+    output = var._replace(type="output", inputtype="", default="")
+    assert "InputType" not in output.to_json()
+
+
+def test_parameterset_and_testset_json_round_trip():
+    pset = {"name": "default", "description": "default", "parameters": {"rate": "1.0"}}
+    tset = {"name": "check", "description": "check", "parameterset": "default",
+            "tests": [{"name": "t1", "inputs": {"tmin": "1.0"},
+                       "outputs": {"out": {"value": "2.0", "precision": "2"},
+                                   "other": {"value": "3.0"}}}]}
+
+    assert records.Parameterset.from_json(pset).to_json() == pset
+    testset = records.Testset.from_json(tset)
+    assert testset.tests[0].outputs["out"] == ("2.0", "2")
+    assert testset.to_json() == tset
@@ -0,0 +1,126 @@
+"""Python unit tests for the testset execution."""
+import json
+import os
+import sys
+
+from cropmstudio.crop2ml_utils import testrun
+from cropmstudio.crop2ml_utils.testrun import compare, convert, run_tests
+
+
+def _generate(path, model, code):
+    directory = os.path.join(path, "src", "py", os.path.basename(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f"{model.lower()}.py"), "w", encoding="utf8") as f:
+        f.write(code)
+
+
+def test_values_are_converted_and_compared():
+    assert convert(" 2.5 ", "DOUBLE") == 2.5
+    assert convert("3", "INT") == 3
+    assert convert("True", "BOOLEAN") is True
+    assert convert("[1, 2]", "DOUBLEARRAY") == [1.0, 2.0]
+
+    assert compare(2.004, 2.0, 2)
+    assert not compare(2.02, 2.0, 2)
+    assert compare([1.0, 2.0001], [1.0, 2.0], 3)
+    assert not compare([1.0], [1.0, 2.0], 3)
+
+
+def test_tests_are_run_and_cached(make_package, monkeypatch):
+    path = make_package()
+    _generate(path, "Alpha", "def model_alpha(tmin, rate):\n    return tmin * rate\n")
+    _generate(path, "Beta", "from .helpers import double\n\ndef model_beta(tmin, rate):\n    return double(tmin)\n")
+    _generate(path, "Helpers", "def double(x):\n    return 2 * x\n")
+
+    reports = run_tests(path)
+
+    assert [report["model"] for report in reports] == ["unit.Alpha.xml", "unit.Beta.xml"]
+    alpha, beta = reports
+    assert alpha["success"] and not alpha["cached"]
+    assert alpha["tests"] == [{"testset": "check", "test": "t1", "success": True, "outputs": {
+        "alpha_out": {"expected": 2.0, "actual": 2.0, "precision": 2, "success": True}}}]
+    assert not beta["success"]
+    assert beta["tests"][0]["outputs"]["beta_out"]["actual"] == 4.0
+
+    # Unchanged models are not run again, until their code changes
+    calls = []
+    monkeypatch.setattr(testrun, "run_test", lambda *args: calls.append(args) or {"error": "called"})
+    assert all(report["cached"] for report in run_tests(path))
+    assert calls == []
+
+    _generate(path, "Beta", "def model_beta(tmin, rate):\n    return tmin * rate\n")
+    reports = run_tests(path, ["unit.Beta.xml"])
+    assert not reports[0]["cached"]
+    assert len(calls) == 1
+
+
+def test_previous_versions_of_a_module_are_unloaded(tmp_path):
+    file_path = os.path.join(tmp_path, "alpha.py")
+    for version in (1, 2):
+        with open(file_path, "w", encoding="utf8") as f:
+            f.write(f"VERSION = {version}\n")
+        os.utime(file_path, ns=(version * 10**9, version * 10**9))
+        module = testrun.load_module(file_path)
+
+    assert module.VERSION == 2
+    loaded = [name for name in sys.modules
+              if name.startswith("_cropmstudio_generated_") and name.endswith(".alpha")
+              and sys.modules[name].__file__ == file_path]
+    assert loaded == [module.__name__]
+
+
+def test_missing_code_and_parameterset(make_package):
+    path = make_package(models=("Alpha",))
+    assert run_tests(path)[0]["error"].startswith("No generated Python code for model Alpha")
+
+    _generate(path, "Alpha", "def model_alpha(tmin, rate):\n    return tmin * rate\n")
+    xml = os.path.join(path, "crop2ml", "unit.Alpha.xml")
+    with open(xml, encoding="utf8") as f:
+        text = f.read()
+    with open(xml, "w", encoding="utf8") as f:
+        f.write(text.replace('parameterset="default"', 'parameterset="missing"'))
+
+    test = run_tests(path)[0]["tests"][0]
+    assert test == {"testset": "check", "test": "t1", "success": False, "error": "Unknown parameterset missing"}
+
+
+def test_hanging_test_is_interrupted(make_package):
+    path = make_package()
+    _generate(path, "Alpha", "def model_alpha(tmin, rate):\n    while True:\n        pass\n")
+    _generate(path, "Beta", "def model_beta(tmin, rate):\n    return tmin * rate\n")
+
+    alpha, beta = run_tests(path, timeout=0.5)
+
+    assert not alpha["success"] and beta["success"]
+    assert alpha["tests"][0]["error"] == "The model did not complete within 0.5 s"
+    assert os.listdir(os.path.join(path, ".cropmstudio", "tests")) == ["unit.Beta.xml.json"]
+
+
+async def test_crashing_test_does_not_break_the_next_runs(jp_fetch, make_package):
+    path = make_package()
+    _generate(path, "Alpha", "import os\n\ndef model_alpha(tmin, rate):\n    os._exit(1)\n")
+    _generate(path, "Beta", "def model_beta(tmin, rate):\n    return tmin * rate\n")
+
+    response = await jp_fetch("cropmstudio", "run-tests", method="POST", body=json.dumps({"Path": path}))
+
+    alpha = json.loads(response.body)["models"][0]
+    assert not alpha["success"]
+    assert alpha["tests"][0]["error"] == "The worker process stopped unexpectedly"
+
+    _generate(path, "Alpha", "def model_alpha(tmin, rate):\n    return tmin * rate\n")
+    response = await jp_fetch("cropmstudio", "run-tests", method="POST", body=json.dumps({"Path": path}))
+
+    assert json.loads(response.body)["success"]
+
+
+async def test_run_tests_handler(jp_fetch, make_package):
+    path = make_package()
+    _generate(path, "Alpha", "def model_alpha(tmin, rate):\n    return tmin * rate\n")
+    _generate(path, "Beta", "def model_beta(tmin, rate):\n    raise ValueError('broken')\n")
+
+    response = await jp_fetch("cropmstudio", "run-tests", method="POST", body=json.dumps({"Path": path}))
+
+    payload = json.loads(response.body)
+    assert not payload["success"]
+    assert payload["summary"] == {"passed": 1, "failed": 1, "models": 2, "cached": 0}
+    assert "ValueError: broken" in payload["models"][1]["tests"][0]["error"]
@@ -0,0 +1,27 @@
+"""Python unit tests for the workflow image cache."""
+import os
+
+from cropmstudio.crop2ml_utils.svg_cache import WorkflowSvgCache
+
+
+def test_image_is_rendered_again_only_when_models_change(make_package):
+    path = make_package()
+    rendered = []
+
+    def render(package_name, path):
+        rendered.append(package_name)
+        return f"<svg>{len(rendered)}</svg>".encode()
+
+    svg_cache = WorkflowSvgCache(render)
+    assert svg_cache.get_wf_svg("Pkg", path) == b"<svg>1</svg>"
+    assert svg_cache.get_wf_svg("Pkg", path) == b"<svg>1</svg>"
+
+    # The disk cache survives the memory cache
+    assert WorkflowSvgCache(render).get_wf_svg("Pkg", path) == b"<svg>1</svg>"
+    assert rendered == ["Pkg"]
+
+    xml = os.path.join(path, "crop2ml", "unit.Alpha.xml")
+    with open(xml, "a", encoding="utf8") as f:
+        f.write("\n")
+    assert svg_cache.get_wf_svg("Pkg", path) == b"<svg>2</svg>"
+    assert len(os.listdir(os.path.join(path, ".cropmstudio", "svg"))) == 1
@@ -0,0 +1,123 @@
+"""Python unit tests for the parameter sweeps."""
+import base64
+from array import array
+import json
+import os
+import sys
+
+import pytest
+
+from cropmstudio.crop2ml_utils.sweep import SweepError, combine, run_sweep, sweep_values
+
+
+LINEAR = "def model_alpha(tmin, rate):\n    return tmin * rate\n"
+
+BRANCHING = "def model_alpha(tmin, rate):\n    if tmin > 0:\n        return tmin * rate\n    return 0.0\n"
+
+
+def _generate(path, code):
+    directory = os.path.join(path, "src", "py", os.path.basename(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, "alpha.py"), "w", encoding="utf8") as f:
+        f.write(code)
+
+
+def test_values_and_combinations():
+    assert sweep_values("rate", {"min": 0, "max": 1, "steps": 5}, "DOUBLE", ("", "")) == [0.0, 0.25, 0.5, 0.75, 1.0]
+    assert sweep_values("rate", {"steps": 3}, "DOUBLE", ("0.0", "10.0")) == [0.0, 5.0, 10.0]
+    assert sweep_values("n", {"values": [1.4, 2.6]}, "INT", ("", "")) == [1.0, 3.0]
+    with pytest.raises(SweepError):
+        sweep_values("name", {"values": ["a"]}, "STRING", ("", ""))
+
+    columns = combine({"a": [1.0, 2.0], "b": [10.0, 20.0, 30.0]})
+    assert list(columns["a"]) == [1.0, 1.0, 1.0, 2.0, 2.0, 2.0]
+    assert list(columns["b"]) == [10.0, 20.0, 30.0] * 2
+    assert list(combine({"a": [1.0, 2.0], "b": [3.0, 4.0]}, "zip")["b"]) == [3.0, 4.0]
+    with pytest.raises(SweepError):
+        combine({"a": [1.0], "b": [3.0, 4.0]}, "zip")
+
+
+@pytest.mark.parametrize("code", [LINEAR, BRANCHING])
+def test_sweep_runs_per_combination_without_numpy(make_package, monkeypatch, code):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    path = make_package(models=("Alpha",))
+    _generate(path, code)
+
+    result = run_sweep(path, "unit.Alpha.xml", {
+        "parameters": {"tmin": {"values": [-1, 2]}, "rate": {"min": 0, "max": 2, "steps": 3}}
+    })
+
+    assert not result["vectorized"]
+    assert result["columns"] == ["tmin", "rate", "alpha_out"]
+    assert result["count"] == 6 and result["failed"] == 0
+    expected = [t * r if code == LINEAR or t > 0 else 0.0 for t in (-1, 2) for r in (0, 1, 2)]
+    assert list(result["data"]["alpha_out"]) == expected
+
+
+def test_sweep_is_vectorized_with_numpy(make_package):
+    pytest.importorskip("numpy")
+    path = make_package(models=("Alpha",))
+    _generate(path, LINEAR)
+
+    result = run_sweep(path, "unit.Alpha.xml", {"parameters": {"rate": {"values": [1, 2, 3]}}, "inputs": {"tmin": 2}})
+
+    assert result["vectorized"]
+    assert list(result["data"]["alpha_out"]) == [2.0, 4.0, 6.0]
+
+
+def test_failed_runs_are_nan(make_package, monkeypatch):
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    path = make_package(models=("Alpha",))
+    _generate(path, "def model_alpha(tmin, rate):\n    return 1 / rate\n")
+
+    result = run_sweep(path, "unit.Alpha.xml", {"parameters": {"rate": {"values": [0, 2]}}})
+
+    assert result["failed"] == 1
+    assert "ZeroDivisionError" in result["error"]
+    out = list(result["data"]["alpha_out"])
+    assert out[0] != out[0] and out[1] == 0.5
+
+
+def test_hanging_batch_is_interrupted(make_package):
+    path = make_package(models=("Alpha",))
+    _generate(path, "def model_alpha(tmin, rate):\n    while True:\n        pass\n")
+
+    result = run_sweep(path, "unit.Alpha.xml", {"parameters": {"rate": {"values": [1, 2]}}}, timeout=0.5)
+
+    assert result["failed"] == 2
+    assert result["error"] == "The model did not complete within 0.5 s"
+    assert all(value != value for value in result["data"]["alpha_out"])
+
+
+async def test_crashing_sweep_does_not_break_the_next_runs(jp_fetch, make_package):
+    path = make_package(models=("Alpha",))
+    _generate(path, "import os\n\ndef model_alpha(tmin, rate):\n    os._exit(1)\n")
+    body = json.dumps({"Path": path, "model": "unit.Alpha.xml", "parameters": {"rate": {"values": [1, 2]}}})
+
+    payload = json.loads((await jp_fetch("cropmstudio", "run-sweep", method="POST", body=body)).body)
+    assert payload["failed"] == 2
+    assert payload["error"] == "The worker process stopped unexpectedly"
+
+    _generate(path, LINEAR)
+    payload = json.loads((await jp_fetch("cropmstudio", "run-sweep", method="POST", body=body)).body)
+    assert payload["failed"] == 0
+
+
+async def test_run_sweep_handler(jp_fetch, make_package):
+    path = make_package(models=("Alpha",))
+    _generate(path, BRANCHING)
+
+    response = await jp_fetch("cropmstudio", "run-sweep", method="POST", body=json.dumps({
+        "Path": path, "model": "unit.Alpha.xml", "parameterset": "default",
+        "parameters": {"tmin": {"min": -10, "max": 10, "steps": 3}}
+    }))
+
+    payload = json.loads(response.body)
+    assert payload["count"] == 3 and payload["columns"] == ["tmin", "alpha_out"]
+    data = array("d", base64.b64decode(payload["data"]))
+    assert list(data) == [-10.0, 0.0, 10.0, 0.0, 0.0, 10.0]
+
+    response = await jp_fetch("cropmstudio", "run-sweep", method="POST", raise_error=False, body=json.dumps({
+        "Path": path, "model": "unit.Alpha.xml", "parameters": {"unknown": {"values": [1]}}
+    }))
+    assert response.code == 400
@@ -0,0 +1,79 @@
+"""Python unit tests for the local package template."""
+import json
+import os
+import subprocess
+
+import pytest
+
+from cropmstudio.crop2ml_utils.template import package_template
+
+pytest.importorskip("cookiecutter")
+
+
+def _make_template(root):
+    template = os.path.join(root, "template")
+    package = os.path.join(template, "{{cookiecutter.repo_name}}")
+    os.makedirs(os.path.join(package, "crop2ml"))
+    with open(os.path.join(template, "cookiecutter.json"), "w") as f:
+        json.dump({"project_name": "", "repo_name": "", "author_name": "",
+                   "description": "", "open_source_license": ""}, f)
+    with open(os.path.join(package, "README.md"), "w") as f:
+        f.write("{{cookiecutter.project_name}}: {{cookiecutter.description}}\n")
+    return template
+
+
+def _body(name):
+    return json.dumps({"projectName": "Project", "packageName": name, "description": "A package"})
+
+
+async def test_package_is_created_from_local_template(jp_fetch, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(package_template, "local", _make_template(str(tmp_path)))
+
+    response = await jp_fetch("cropmstudio", "create-package", method="POST", body=_body("Local"))
+
+    assert json.loads(response.body)["success"]
+    with open(tmp_path / "packages" / "Local" / "README.md") as f:
+        assert f.read() == "Project: A package\n"
+
+
+async def test_template_is_cloned_once_into_cache(jp_fetch, tmp_path, monkeypatch):
+    template = _make_template(str(tmp_path))
+    try:
+        for args in (["init", "-q"], ["add", "."],
+                     ["-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "template"]):
+            subprocess.run(["git"] + args, cwd=template, check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip("git is not available")
+
+    cache = str(tmp_path / "cache" / "cookiecutter-crop2ml")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(package_template, "local", None)
+    monkeypatch.setattr(package_template, "cache_dir", cache)
+    monkeypatch.setattr(package_template, "url", "git+" + template)
+
+    response = await jp_fetch("cropmstudio", "update-package-template", method="POST", body="{}")
+    assert json.loads(response.body)["path"] == cache
+    assert os.path.isfile(os.path.join(cache, "cookiecutter.json"))
+
+    # No network from now on
+    monkeypatch.setattr(package_template, "url", "git+" + str(tmp_path / "missing"))
+    response = await jp_fetch("cropmstudio", "create-package", method="POST", body=_body("Cached"))
+
+    assert json.loads(response.body)["success"]
+    assert os.path.isfile(tmp_path / "packages" / "Cached" / "README.md")
+    assert os.listdir(tmp_path / "cache") == ["cookiecutter-crop2ml"]
+
+
+async def test_missing_template_is_not_fetched(jp_fetch, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(package_template, "local", None)
+    monkeypatch.setattr(package_template, "cache_dir", str(tmp_path / "cache" / "cookiecutter-crop2ml"))
+    monkeypatch.setattr(package_template, "url", "git+" + str(tmp_path / "missing"))
+
+    response = await jp_fetch("cropmstudio", "create-package", method="POST", body=_body("Missing"),
+                              raise_error=False)
+
+    assert response.code == 500
+    assert "update-package-template" in json.loads(response.body)["message"]
+    assert not os.path.exists(tmp_path / "cache")
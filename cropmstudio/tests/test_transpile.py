@@ -0,0 +1,97 @@
+"""Python unit tests for the incremental transpilation state."""
+import os
+
+from cropmstudio.crop2ml_utils.transpile import (
+    generated_tests_dir, input_hashes, is_up_to_date, output_dir, record_state
+)
+
+
+COMPOSITION_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<ModelComposition name="Chain" id="Pkg.Chain" version="1.0" timestep="1">
+\t<Composition>
+\t\t<Model name="Alpha" id="Pkg.Alpha" filename="unit.Alpha.xml"/>
+\t\t<Model name="Gamma" id="Other.Gamma" filename="unit.Gamma.xml" package_name="Other"/>
+\t</Composition>
+</ModelComposition>
+"""
+
+
+def _generate(path, target):
+    for directory in (output_dir(path, target), generated_tests_dir(path, target)):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "alpha.txt"), "w") as f:
+            f.write("generated\n")
+
+
+def test_state_follows_input_changes(make_package):
+    path = make_package()
+    hashes = input_hashes(path)
+
+    assert sorted(hashes) == sorted([
+        os.path.join("crop2ml", "unit.Alpha.xml"),
+        os.path.join("crop2ml", "unit.Beta.xml"),
+        os.path.join("crop2ml", "algo", "pyx", "alpha.pyx"),
+        os.path.join("crop2ml", "algo", "pyx", "beta.pyx"),
+    ])
+    assert not is_up_to_date(path, "py", hashes)
+
+    _generate(path, "py")
+    record_state(path, "py", hashes)
+    assert is_up_to_date(path, "py", input_hashes(path))
+    assert not is_up_to_date(path, "java", input_hashes(path))
+
+    with open(os.path.join(path, "crop2ml", "algo", "pyx", "alpha.pyx"), "a") as f:
+        f.write("# edited\n")
+    assert not is_up_to_date(path, "py", input_hashes(path))
+
+
+def test_state_follows_output_changes(make_package):
+    path = make_package()
+    _generate(path, "py")
+    record_state(path, "py", input_hashes(path))
+    assert is_up_to_date(path, "py", input_hashes(path))
+
+    generated = os.path.join(output_dir(path, "py"), "alpha.txt")
+    with open(generated, "a") as f:
+        f.write("# edited\n")
+    assert not is_up_to_date(path, "py", input_hashes(path))
+
+    record_state(path, "py", input_hashes(path))
+    os.remove(generated)
+    assert not is_up_to_date(path, "py", input_hashes(path))
+
+    os.rmdir(output_dir(path, "py"))
+    assert not is_up_to_date(path, "py", input_hashes(path))
+
+
+def test_state_follows_generated_test_changes(make_package):
+    path = make_package()
+    _generate(path, "py")
+    record_state(path, "py", input_hashes(path))
+    assert is_up_to_date(path, "py", input_hashes(path))
+
+    os.remove(os.path.join(generated_tests_dir(path, "py"), "alpha.txt"))
+    assert not is_up_to_date(path, "py", input_hashes(path))
+
+
+def test_state_follows_the_packages_used_by_compositions(make_package):
+    other = make_package("Other", models=("Gamma",))
+    path = make_package()
+    with open(os.path.join(path, "crop2ml", "composition.Chain.xml"), "w") as f:
+        f.write(COMPOSITION_XML)
+
+    hashes = input_hashes(path)
+    assert os.path.join("..", "Other", "crop2ml", "unit.Gamma.xml") in hashes
+    assert os.path.join("..", "Other", "crop2ml", "algo", "pyx", "gamma.pyx") in hashes
+
+    _generate(path, "py")
+    record_state(path, "py", hashes)
+    assert is_up_to_date(path, "py", input_hashes(path))
+
+    with open(os.path.join(other, "crop2ml", "algo", "pyx", "gamma.pyx"), "a") as f:
+        f.write("# edited\n")
+    assert not is_up_to_date(path, "py", input_hashes(path))
+
+    record_state(path, "py", input_hashes(path))
+    os.remove(os.path.join(other, "crop2ml", "unit.Gamma.xml"))
+    assert not is_up_to_date(path, "py", input_hashes(path))
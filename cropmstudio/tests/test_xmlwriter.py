@@ -0,0 +1,78 @@
+"""Python unit tests for the xml serialization."""
+import os
+import time
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from cropmstudio.crop2ml_utils import writeunitXML
+from cropmstudio.crop2ml_utils import records
+from cropmstudio.crop2ml_utils.xmlwriter import atomic_write, tag, text_element
+
+
+def _write_unit(directory, variables, tests):
+    os.makedirs(os.path.join(directory, "algo", "pyx"), exist_ok=True)
+    inputs = [records.Variable(f"v{i}", "input & output", f"variable {i}", "variable", "state", "DOUBLE",
+                               default="0.0", min="0.0", max="1.0", unit="m")
+              for i in range(variables)]
+
+    datas = {'Path': directory, 'Model type': 'unit', 'Model name': 'Big', 'Model ID': 'Pkg',
+             'Version': '1.0', 'Timestep': '1', 'Title': 'Big', 'Authors': 'a',
+             'Institution': 'i', 'Reference': 'r', 'ExtendedDescription': 'e'}
+    df = {'Inputs': inputs, 'Functions': [], 'init': False}
+    parametersets = {'default': records.Parameterset('default', 'default', {})}
+    testsets = {'check': records.Testset('check', 'check', 'default',
+                                         tuple(records.Test(f"test{j}", {'v0': j}, {'v0': (j, 2)}) for j in range(tests)))}
+
+    start = time.perf_counter()
+    writeunitXML(datas, df, parametersets, testsets)._write()
+    return time.perf_counter() - start
+
+
+def test_values_are_escaped(tmp_path):
+    path = os.fspath(tmp_path / "doc.xml")
+    with atomic_write(path) as f:
+        f.write(tag('Root', [('name', 'a "quoted" <name> & co')], '>'))
+        f.write(text_element('Value', [('name', 'x')], '1 < 2'))
+        f.write('</Root>')
+
+    root = ET.parse(path).getroot()
+    assert root.get('name') == 'a "quoted" <name> & co'
+    assert root.find('Value').text == '1 < 2'
+    assert os.listdir(tmp_path) == ["doc.xml"]
+
+
+def test_failed_write_keeps_the_previous_file(tmp_path):
+    path = os.fspath(tmp_path / "doc.xml")
+    with atomic_write(path) as f:
+        f.write('<Root/>')
+
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as f:
+            f.write('<Ro')
+            raise RuntimeError()
+
+    assert open(path).read() == '<Root/>'
+    assert os.listdir(tmp_path) == ["doc.xml"]
+
+
+def test_unchanged_files_are_not_rewritten(tmp_path):
+    directory = os.fspath(tmp_path)
+    _write_unit(directory, 3, 2)
+    xml = os.path.join(directory, "unit.Big.xml")
+    pyx = os.path.join(directory, "algo", "pyx", "big.pyx")
+    with open(pyx, "w", encoding="utf8") as f:
+        f.write("big_out = 1.0\n")
+    mtime = os.stat(xml).st_mtime_ns
+    inode = os.stat(xml).st_ino
+
+    _write_unit(directory, 3, 2)
+
+    assert os.stat(xml).st_mtime_ns == mtime
+    assert os.stat(xml).st_ino == inode
+    assert open(pyx, encoding="utf8").read() == "big_out = 1.0\n"
+    assert sorted(os.listdir(directory)) == ["algo", "unit.Big.xml"]
+
+    _write_unit(directory, 4, 2)
+    assert os.stat(xml).st_ino != inode
+    assert open(pyx, encoding="utf8").read() == "big_out = 1.0\n"
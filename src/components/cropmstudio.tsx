@@ -1,7 +1,10 @@
+import { UUID } from '@lumino/coreutils';
 import React from 'react';
 
 import { BaseForm } from './form';
+import { JobStatus } from './job';
 import { Menu } from './menu';
+import { getSelectedFile, UploadProgress } from './upload';
 import { menuItems } from '../menuItems';
 import { IDict, IFormBuild, IMenuItem } from '../types';
 
@@ -13,6 +16,10 @@ export type CropmstudioProps = {
    * The function called when submitting a form.
    */
   submit: (endpoint: string, data: IDict<any>) => Promise<any>;
+  /**
+   * The function called when submitting a form uploading a file.
+   */
+  upload: (endpoint: string, uploadId: string, file: File) => Promise<any>;
   /**
    * The landing page.
    */
@@ -140,9 +147,37 @@ export function Cropmstudio(props: CropmstudioProps): JSX.Element {
         // Send only the current data.
         dataToSend = data;
       }
-      const response = await props.submit(current.submit, dataToSend);
+      let response: any;
+      if (current.upload) {
+        // Upload the selected file as is, displaying the upload progress.
+        const file = getSelectedFile(data[current.upload]);
+        if (!file) {
+          console.error('There is no file to upload.');
+          return;
+        }
+        const endpoint = current.submit;
+        const uploadId = UUID.uuid4();
+        setDisplay(() => () => (
+          <UploadProgress
+            endpoint={endpoint}
+            uploadId={uploadId}
+            filename={file.name}
+          />
+        ));
+        response = await props.upload(endpoint, uploadId, file);
+        setDisplay(undefined);
+      } else {
+        response = await props.submit(current.submit, dataToSend);
+      }
       if (response.success) {
-        if (response.image) {
+        if (response.job) {
+          // Display the progress of the background job
+          const job = response.job;
+          setCurrent(undefined);
+          navigation.current = [];
+          setCanGoBack(false);
+          setDisplay(() => () => <JobStatus job={job} />);
+        } else if (response.image) {
           // Display image
           setDisplay(() => () => <img src={response.image} />);
         } else if (response.download && response.filename) {
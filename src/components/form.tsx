@@ -11,6 +11,12 @@ import { customizeValidator } from '@rjsf/validator-ajv8';
 import React from 'react';
 
 import { IDict, IFormBuild } from '../types';
+import { FileWidget } from './upload';
+
+/**
+ * The custom widgets, usable by name in the UI schemas.
+ */
+const widgets = { rawFile: FileWidget };
 
 /**
  * The base form properties.
@@ -94,6 +100,7 @@ export function BaseForm(props: IBaseFormProps): JSX.Element {
         onChange={handleChange}
         onSubmit={() => onSubmit(formData)}
         validator={validator}
+        widgets={widgets}
       >
         <div className={'form-buttons'}>
           {props.onNavigateBack !== null && (
@@ -1,4 +1,6 @@
 export * from './about';
 export * from './cropmstudio';
 export * from './form';
+export * from './job';
 export * from './menu';
+export * from './upload';
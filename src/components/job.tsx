@@ -0,0 +1,94 @@
+import { Button } from '@jupyterlab/ui-components';
+import React from 'react';
+
+import { requestAPI } from '../request';
+import { IDict } from '../types';
+
+/**
+ * The delay between two job status requests, in milliseconds.
+ */
+const POLL_INTERVAL = 1000;
+
+/**
+ * The job status component properties.
+ */
+export type JobStatusProps = {
+  /**
+   * The job returned when submitting it.
+   */
+  job: IDict;
+};
+
+/**
+ * Component polling a background transformation job, displaying the progress
+ * of each target and the transpiler logs.
+ */
+export function JobStatus(props: JobStatusProps): JSX.Element {
+  const [job, setJob] = React.useState<IDict>(props.job);
+
+  /**
+   * Poll the job status until it is done.
+   */
+  React.useEffect(() => {
+    let timeout: number | undefined;
+    let disposed = false;
+
+    const poll = () => {
+      requestAPI<any>(`jobs/${props.job.id}`, { method: 'GET' })
+        .then(response => {
+          if (disposed) {
+            return;
+          }
+          setJob(response.job);
+          if (
+            !['completed', 'failed', 'cancelled'].includes(response.job.status)
+          ) {
+            timeout = window.setTimeout(poll, POLL_INTERVAL);
+          }
+        })
+        .catch(reason => {
+          console.error(
+            `An error occurred while polling the job.\n${reason}`
+          );
+        });
+    };
+    timeout = window.setTimeout(poll, POLL_INTERVAL);
+
+    return () => {
+      disposed = true;
+      window.clearTimeout(timeout);
+    };
+  }, [props.job.id]);
+
+  const onCancel = () => {
+    requestAPI<any>(`jobs/${job.id}`, { method: 'DELETE' })
+      .then(response => setJob(response.job))
+      .catch(reason => {
+        console.error(
+          `An error occurred while cancelling the job.\n${reason}`
+        );
+      });
+  };
+
+  const running = job.status === 'queued' || job.status === 'running';
+
+  return (
+    <div className={'job-container'}>
+      <h3>Transformation {job.status}</h3>
+      <ul className={'job-targets'}>
+        {Object.entries(job.targets as IDict<IDict>).map(([target, state]) => (
+          <li key={target}>
+            <strong>{target}</strong>: {state.status}
+            {state.error && <div className={'job-error'}>{state.error}</div>}
+          </li>
+        ))}
+      </ul>
+      {job.logs && <pre className={'job-logs'}>{job.logs}</pre>}
+      {running && (
+        <Button className={'jp-mod-styled jp-mod-reject'} onClick={onCancel}>
+          Cancel
+        </Button>
+      )}
+    </div>
+  );
+}
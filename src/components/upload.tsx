@@ -0,0 +1,125 @@
+import { UUID } from '@lumino/coreutils';
+import { WidgetProps } from '@rjsf/utils';
+import React from 'react';
+
+import { requestAPI } from '../request';
+
+/**
+ * The delay between two upload progress requests, in milliseconds.
+ */
+const POLL_INTERVAL = 500;
+
+/**
+ * The files selected in the file widgets, by form value.
+ */
+const selectedFiles = new Map<string, File>();
+
+/**
+ * Get the file selected in a file widget, from the form value.
+ */
+export function getSelectedFile(value: string): File | undefined {
+  return selectedFiles.get(value);
+}
+
+/**
+ * Form widget selecting a file to upload as is.
+ *
+ * Unlike the default data URL widget, the file is not read in memory: the form
+ * value is an id of the selected file, which is sent later as the request body.
+ */
+export function FileWidget(props: WidgetProps): JSX.Element {
+  const onChange = (event: React.ChangeEvent<HTMLInputElement>) => {
+    const file = event.target.files?.[0];
+    if (!file) {
+      props.onChange(undefined);
+      return;
+    }
+    const value = `${UUID.uuid4()}/${file.name}`;
+    selectedFiles.set(value, file);
+    props.onChange(value);
+  };
+
+  return (
+    <input
+      id={props.id}
+      type={'file'}
+      accept={props.options.accept as string | undefined}
+      required={props.required}
+      disabled={props.disabled || props.readonly}
+      onChange={onChange}
+    />
+  );
+}
+
+/**
+ * The upload progress component properties.
+ */
+export type UploadProgressProps = {
+  /**
+   * The upload endpoint.
+   */
+  endpoint: string;
+  /**
+   * The id of the upload.
+   */
+  uploadId: string;
+  /**
+   * The name of the uploaded file.
+   */
+  filename: string;
+};
+
+/**
+ * Component polling the progress of an upload.
+ */
+export function UploadProgress(props: UploadProgressProps): JSX.Element {
+  const [progress, setProgress] = React.useState<{
+    received: number;
+    total: number | null;
+  }>({ received: 0, total: null });
+
+  /**
+   * Poll the upload progress until the server does not know it anymore.
+   */
+  React.useEffect(() => {
+    let timeout: number | undefined;
+    let disposed = false;
+
+    const poll = () => {
+      requestAPI<any>(`${props.endpoint}?upload_id=${props.uploadId}`, {
+        method: 'GET'
+      })
+        .then(response => {
+          if (disposed) {
+            return;
+          }
+          setProgress({ received: response.received, total: response.total });
+          timeout = window.setTimeout(poll, POLL_INTERVAL);
+        })
+        .catch(() => {
+          // The upload did not start yet or is over.
+          if (!disposed) {
+            timeout = window.setTimeout(poll, POLL_INTERVAL);
+          }
+        });
+    };
+    timeout = window.setTimeout(poll, POLL_INTERVAL);
+
+    return () => {
+      disposed = true;
+      window.clearTimeout(timeout);
+    };
+  }, [props.endpoint, props.uploadId]);
+
+  const percent = progress.total
+    ? Math.floor((100 * progress.received) / progress.total)
+    : null;
+
+  return (
+    <div className={'upload-container'}>
+      <h3>Uploading {props.filename}</h3>
+      <progress value={progress.received} max={progress.total ?? undefined} />
+      {percent !== null && <span> {percent}%</span>}
+    </div>
+  );
+}
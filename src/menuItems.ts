@@ -5,6 +5,7 @@ import { About } from './components';
 import { requestAPI } from './request';
 import { IDict, IFormBuild, IMenuItem } from './types';
 import {
+  clearModelDataCache,
   getModelHeaderData,
   getModelUnitInputsOutputs,
   getModelUnitParametersets,
@@ -39,9 +40,11 @@ const formBuilds: { [name: string]: IFormBuild } = {
   },
   importPackage: {
     schema: importPackageSchema,
-    submit: 'import-package',
+    submit: 'import-package-upload',
+    upload: 'package',
     uiSchema: {
       package: {
+        'ui:widget': 'rawFile',
         'ui:options': { accept: '.zip' }
       }
     }
@@ -145,7 +148,8 @@ const formBuilds: { [name: string]: IFormBuild } = {
         delete schema.properties.package.enum;
         delete schema.properties.model.enum;
       } else {
-        // First time: load packages enum
+        // First time: load packages enum and drop the data of previous edits
+        clearModelDataCache();
         const packages = await getPackages();
         schema.properties.package.enum = packages;
       }
@@ -173,7 +177,7 @@ const formBuilds: { [name: string]: IFormBuild } = {
   },
   crop2MLToPlatform: {
     schema: platformTransformSchema,
-    submit: 'Crop2ML-to-platform',
+    submit: 'jobs/Crop2ML-to-platform',
     initSchema: async (data: IDict) => {
       const schema = JSONExt.deepCopy(platformTransformSchema) as IDict;
       const packages = await getPackages();
@@ -183,7 +187,7 @@ const formBuilds: { [name: string]: IFormBuild } = {
   },
   platformToCrop2ML: {
     schema: platformTransformSchema,
-    submit: 'platform-to-Crop2ML',
+    submit: 'jobs/platform-to-Crop2ML',
     initSchema: async (data: IDict) => {
       const schema = JSONExt.deepCopy(platformTransformSchema) as IDict;
       const packages = await getPackages();
@@ -16,6 +16,12 @@ export interface IFormBuild {
    * The submit endpoint.
    */
   submit: string | null;
+  /**
+   * The field holding a file selected with the FileWidget, if the file must be
+   * uploaded as the raw request body of a PUT to the submit endpoint instead of
+   * posting the form data.
+   */
+  upload?: string;
   /**
    * The form schema.
    */
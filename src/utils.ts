@@ -19,6 +19,58 @@ export async function getPackages(): Promise<string[]> {
     });
 }
 
+/**
+ * The pending full model data requests, by package and model.
+ */
+const modelDataRequests = new Map<string, Promise<IDict>>();
+
+/**
+ * Clear the cached model data, to fetch fresh data on the next request.
+ */
+export function clearModelDataCache(): void {
+  modelDataRequests.clear();
+}
+
+/**
+ * Get all the sections of a model (header, inputs-outputs, parametersets and
+ * testsets) given a package and a model, with a single request.
+ *
+ * The request is shared by all the forms editing the same model.
+ */
+export async function getModelFullData(
+  packagePath: string,
+  model: string
+): Promise<IDict> {
+  const key = JSON.stringify([packagePath, model]);
+  let request = modelDataRequests.get(key);
+  if (!request) {
+    const endpoint = 'get-model-full';
+    const params = new URLSearchParams({
+      package: packagePath,
+      model
+    });
+    request = requestAPI<any>(`${endpoint}?${params.toString()}`, {
+      method: 'GET'
+    })
+      .then(response => {
+        if (!response.success) {
+          modelDataRequests.delete(key);
+          return {};
+        }
+        return response.data;
+      })
+      .catch(reason => {
+        modelDataRequests.delete(key);
+        console.error(
+          `An error occurred while getting the model data.\n${reason}`
+        );
+        return {};
+      });
+    modelDataRequests.set(key, request);
+  }
+  return request;
+}
+
 /**
  * Get the model header data given a package and a model.
  */
@@ -26,23 +78,8 @@ export async function getModelHeaderData(
   packagePath: string,
   model: string
 ): Promise<IDict> {
-  const endpoint = 'get-model-header';
-  const params = new URLSearchParams({
-    package: packagePath,
-    model
-  });
-  return requestAPI<any>(`${endpoint}?${params.toString()}`, {
-    method: 'GET'
-  })
-    .then(response => {
-      return response.data;
-    })
-    .catch(reason => {
-      console.error(
-        `An error occurred while getting the packages list.\n${reason}`
-      );
-      return {};
-    });
+  const data = await getModelFullData(packagePath, model);
+  return data['header'] ?? {};
 }
 
 /**
@@ -52,23 +89,8 @@ export async function getModelUnitInputsOutputs(
   packagePath: string,
   model: string
 ): Promise<IDict> {
-  const endpoint = 'get-model-unit-inputs-outputs';
-  const params = new URLSearchParams({
-    package: packagePath,
-    model
-  });
-  return requestAPI<any>(`${endpoint}?${params.toString()}`, {
-    method: 'GET'
-  })
-    .then(response => {
-      return response.data;
-    })
-    .catch(reason => {
-      console.error(
-        `An error occurred while getting the packages list.\n${reason}`
-      );
-      return {};
-    });
+  const data = await getModelFullData(packagePath, model);
+  return data['inputs-outputs'] ?? {};
 }
 
 /**
@@ -78,23 +100,8 @@ export async function getModelUnitParametersets(
   packagePath: string,
   model: string
 ): Promise<IDict> {
-  const endpoint = 'get-model-unit-parametersets';
-  const params = new URLSearchParams({
-    package: packagePath,
-    model
-  });
-  return requestAPI<any>(`${endpoint}?${params.toString()}`, {
-    method: 'GET'
-  })
-    .then(response => {
-      return response.data;
-    })
-    .catch(reason => {
-      console.error(
-        `An error occurred while getting the parametersets.\n${reason}`
-      );
-      return {};
-    });
+  const data = await getModelFullData(packagePath, model);
+  return data['parametersets'] ?? {};
 }
 
 /**
@@ -104,19 +111,6 @@ export async function getModelUnitTestsets(
   packagePath: string,
   model: string
 ): Promise<IDict> {
-  const endpoint = 'get-model-unit-testsets';
-  const params = new URLSearchParams({
-    package: packagePath,
-    model
-  });
-  return requestAPI<any>(`${endpoint}?${params.toString()}`, {
-    method: 'GET'
-  })
-    .then(response => {
-      return response.data;
-    })
-    .catch(reason => {
-      console.error(`An error occurred while getting the testsets.\n${reason}`);
-      return {};
-    });
+  const data = await getModelFullData(packagePath, model);
+  return data['testsets'] ?? {};
 }
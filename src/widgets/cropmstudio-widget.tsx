@@ -41,7 +41,38 @@ export class CropmstudioWidget extends ReactWidget {
       });
   };
 
+  /**
+   * Function uploading a file as the raw body of a PUT request.
+   */
+  private _upload = async (
+    endpoint: string,
+    uploadId: string,
+    file: File
+  ): Promise<any> => {
+    return requestAPI<any>(`${endpoint}?upload_id=${uploadId}`, {
+      method: 'PUT',
+      body: file,
+      headers: { 'Content-Type': 'application/zip' }
+    })
+      .then(data => {
+        console.log('RECEIVED', endpoint, data);
+        return data;
+      })
+      .catch(reason => {
+        console.error(
+          `An error occurred while uploading the file.\n${reason}`
+        );
+        return { success: false, error: reason };
+      });
+  };
+
   render(): JSX.Element {
-    return <Cropmstudio submit={this._submit} default="About" />;
+    return (
+      <Cropmstudio
+        submit={this._submit}
+        upload={this._upload}
+        default="About"
+      />
+    );
   }
 }